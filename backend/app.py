@@ -5,6 +5,7 @@ from routes.insights_routes import insights_bp
 from routes.feature_routes import features_bp
 from routes.model_scores_routes import model_scores_bp
 from routes.model_routes import model_bp
+from services import conditional, json_response, metrics
 
 
 
@@ -17,6 +18,15 @@ app.register_blueprint(features_bp, url_prefix="/api/features")
 app.register_blueprint(model_scores_bp, url_prefix="/api/model_metrics")
 app.register_blueprint(model_bp, url_prefix="/api/models")
 
+# NumPy/pandas-aware JSON (orjson when installed); installed first so the metrics timing wraps it
+json_response.init_app(app)
+
+# Gzip large JSON/CSV bodies for clients that accept it
+conditional.init_app(app)
+
+# Per-route latency / in-flight counts, served in Prometheus format at /metrics
+metrics.init_app(app)
+
 
 @app.route("/")
 def home():
@@ -0,0 +1,68 @@
+"""
+Walk-forward backtest cost: the notebook's per-step refit loop vs. services/backtest.py.
+
+The notebook loop is timed on its first STEPS steps and extrapolated to the
+full run; the engine runs the whole backtest with a few refit intervals and
+worker counts. Run from the backend folder:
+    python benchmarks/bench_backtest.py
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.backtest import backtest  # noqa: E402
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DATA_PATH = os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "backend", "models", "backtested_models", "usage_cpu_best_model.pkl")
+
+WINDOW = 30
+STEPS = 20
+CONFIGS = [(7, 1), (30, 1), (30, os.cpu_count() or 1)]
+
+
+def notebook_backtest(df, target, model, steps):
+    """The Model/backtest.ipynb loop (refit on every step), limited to `steps` steps."""
+    feature_cols = [c for c in df.columns if c not in ["date", "usage_cpu", "usage_storage", "users_active", "unique_id"]]
+    temp_model = clone(model)
+    errors = []
+    for start in range(steps):
+        train = df.iloc[: start + WINDOW]
+        test = df.iloc[start + WINDOW: start + WINDOW + 1]
+        temp_model.fit(train[feature_cols], train[target])
+        errors.append(float(temp_model.predict(test[feature_cols])[0] - test[target].iloc[0]))
+    return errors
+
+
+def main():
+    df = pd.read_csv(DATA_PATH)
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values("date", kind="stable").reset_index(drop=True)
+    model = joblib.load(MODEL_PATH)
+    total_steps = len(df) - WINDOW
+
+    start = time.perf_counter()
+    reference = notebook_backtest(df, "usage_cpu", model, STEPS)
+    per_step = (time.perf_counter() - start) / STEPS
+    print(f"notebook loop: {per_step * 1000:.0f} ms/step, ~{per_step * total_steps:.0f} s for {total_steps} steps")
+
+    metrics, _ = backtest(model, "usage_cpu", df.iloc[:WINDOW + STEPS], initial_window=WINDOW, max_workers=1)
+    match = np.allclose(np.abs(reference), metrics["mae"].to_numpy(), rtol=0, atol=1e-6)
+    print(f"engine matches notebook on the first {STEPS} steps: {match}")
+
+    print(f"{'refit_every':>11} {'workers':>8} {'fits':>6} {'seconds':>8} {'MAE':>8}")
+    for refit_every, workers in CONFIGS:
+        _, summary = backtest(model, "usage_cpu", df, initial_window=WINDOW,
+                              refit_every=refit_every, max_workers=workers)
+        print(f"{refit_every:>11} {workers:>8} {summary['fits']:>6} {summary['seconds']:>8.1f} {summary['MAE']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Startup cost of loading the processed datasets: legacy per-module read_csv vs. the shared columnar store.
+
+Each mode runs in a fresh interpreter so load time and resident memory are measured cold.
+Run from the backend folder:
+    python benchmarks/bench_data_loading.py
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODES = ["legacy", "store"]
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def run_mode(mode):
+    sys.path.insert(0, BACKEND_DIR)
+    import pandas as pd
+    from services.data_store import DATASETS, load_dataset
+
+    before = rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        # What the blueprints did at import: insights.csv and feature_engineered.csv twice each
+        frames = []
+        for name in ["insights", "insights", "feature_engineered", "feature_engineered", "enhanced_features"]:
+            df = pd.read_csv(DATASETS[name]["path"])
+            df["date"] = pd.to_datetime(df["date"])
+            frames.append(df)
+    else:
+        frames = [load_dataset(name) for name in ["insights", "insights", "feature_engineered", "feature_engineered", "enhanced_features"]]
+    elapsed = time.perf_counter() - start
+
+    unique = {id(df): df for df in frames}.values()
+    print(json.dumps({
+        "mode": mode,
+        "load_ms": elapsed * 1000,
+        "rss_delta_mb": rss_mb() - before,
+        "frames_mb": sum(df.memory_usage(deep=True).sum() for df in unique) / 1e6,
+    }))
+
+
+def main():
+    # Make sure the columnar copies exist so the store mode measures a warm-disk, cold-process start
+    sys.path.insert(0, BACKEND_DIR)
+    from services.data_store import DATASETS, load_dataset
+    for name in DATASETS:
+        load_dataset(name)
+
+    print(f"{'mode':>8} {'load (ms)':>10} {'RSS delta (MB)':>15} {'frames (MB)':>12}")
+    for mode in MODES:
+        out = subprocess.run([sys.executable, __file__, mode], capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:>8} {result['load_ms']:>10.1f} {result['rss_delta_mb']:>15.1f} {result['frames_mb']:>12.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+    else:
+        main()
@@ -0,0 +1,82 @@
+"""
+Direct multi-horizon vs. recursive forecasting: latency and accuracy.
+
+Both strategies are fit on everything before the last HOLDOUT days, using
+the best model's hyperparameters (a one-step model for the recursive
+forecaster, the horizon-conditioned model for the direct one). Each
+unique_id series is then forecast HOLDOUT days ahead and scored against the
+held-out actuals. Run from the backend folder:
+    python benchmarks/bench_direct.py
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.direct_forecast import train_direct_model, DirectForecaster  # noqa: E402
+from services.forecast_engine import RecursiveForecaster, get_feature_cols  # noqa: E402
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DATA_PATH = os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv")
+MODEL_DIR = os.path.join(BASE_DIR, "backend", "models", "backtested_models")
+
+TARGETS = ["usage_cpu", "usage_storage", "users_active"]
+HOLDOUT = 30
+REPEATS = 5
+
+
+def per_call(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS
+
+
+def main():
+    df = pd.read_csv(DATA_PATH)
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values(["unique_id", "date"], kind="stable")
+    cutoff = df["date"].max() - pd.Timedelta(days=HOLDOUT)
+    train = df[df["date"] <= cutoff]
+    series = [(train[train["unique_id"] == uid], df[(df["unique_id"] == uid) & (df["date"] > cutoff)])
+              for uid in df["unique_id"].unique()]
+
+    print(f"holdout: {HOLDOUT} days after {cutoff:%Y-%m-%d}, {len(series)} series")
+    print(f"{'target':>14} {'strategy':>10} {'fit s':>7} {'ms/forecast':>12} {'MAE':>9} {'MAE d1-7':>9} {'MAE d22-30':>10}")
+    for target in TARGETS:
+        best = joblib.load(os.path.join(MODEL_DIR, f"{target}_best_model.pkl"))
+
+        start = time.perf_counter()
+        one_step = clone(best)
+        if "early_stopping_rounds" in one_step.get_params():
+            one_step.set_params(early_stopping_rounds=None)
+        one_step.fit(train[get_feature_cols(train.columns)].fillna(0), train[target])
+        recursive_fit = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bundle = train_direct_model(best, target, train, max_horizon=HOLDOUT)
+        direct_fit = time.perf_counter() - start
+
+        strategies = {
+            "recursive": (recursive_fit, lambda hist: RecursiveForecaster(one_step, target, hist).forecast(horizon=HOLDOUT)),
+            "direct": (direct_fit, lambda hist: DirectForecaster(bundle, target, hist).forecast(horizon=HOLDOUT)),
+        }
+        for name, (fit_seconds, forecast) in strategies.items():
+            errors = np.array([
+                [r["predicted"] for r in forecast(hist)] - future[target].to_numpy()
+                for hist, future in series
+            ])
+            latency = per_call(lambda: forecast(series[0][0]))
+            abs_errors = np.abs(errors)
+            print(f"{target:>14} {name:>10} {fit_seconds:>7.1f} {latency * 1000:>12.1f} "
+                  f"{abs_errors.mean():>9.2f} {abs_errors[:, :7].mean():>9.2f} {abs_errors[:, 21:].mean():>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Feature pipeline: parity with the stored tables, notebook vs. vectorized
+daily aggregates, and a bounded-memory run on synthetic hourly telemetry.
+
+1. Generates DAYS days of hourly rows for REGIONS regions x 3 resources,
+   rebuilds the tables with per-series rolling windows and reports wall
+   time and the peak RSS of the parent and of the largest worker.
+2. Rebuilds the four tables from Data/Raw and compares them byte for byte
+   with the files in Data/Processed and Data/models.
+3. Times the time_based notebook's groupby/agg + per-day Python loops
+   against services.feature_pipeline.daily_aggregates on the same rows.
+Run from the backend folder:
+    python benchmarks/bench_feature_pipeline.py [--regions 300] [--days 365]
+"""
+import argparse
+import filecmp
+import os
+import resource
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.feature_pipeline import build_tables, clean_factors, clean_merge, daily_aggregates  # noqa: E402
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+RAW_DIR = os.path.join(BASE_DIR, "Data", "Raw")
+STORED = {
+    "cleaned_merged": os.path.join(BASE_DIR, "Data", "Processed", "cleaned_merged.csv"),
+    "insights": os.path.join(BASE_DIR, "Data", "Processed", "insights.csv"),
+    "feature_engineered": os.path.join(BASE_DIR, "Data", "Processed", "feature_engineered.csv"),
+    "enhanced_features": os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv"),
+}
+REPEATS = 5
+
+
+def notebook_aggregates(df):
+    """The time_based notebook's cells, unchanged apart from being a function."""
+    warnings.filterwarnings("ignore", message="obj.round has no effect")
+    timely_data = df.groupby("date").agg(
+        cpu_mean=("usage_cpu", "mean"), cpu_tot=("usage_cpu", "sum"), cpu_std=("usage_cpu", "std"),
+        storage_mean=("usage_storage", "mean"), storage_tot=("usage_storage", "sum"), storage_std=("usage_storage", "std"),
+        users_mean=("users_active", "mean"), users_tot=("users_active", "sum"), users_std=("users_active", "std"),
+        economic_index=("economic_index", "first"), cloud_market_demand=("cloud_market_demand", "first"),
+        holiday=("holiday", "first"), unique_regions=("region", "nunique"), total_records=("resource_type", "count"),
+    ).reset_index().round(2)
+
+    def get_extremes(sub_df, col):
+        min_row = sub_df.loc[sub_df[col].idxmin()]
+        max_row = sub_df.loc[sub_df[col].idxmax()]
+        return {
+            "min": {"value": round(float(min_row[col]), 2), "region": min_row["region"], "resource": min_row["resource_type"]},
+            "max": {"value": round(float(max_row[col]), 2), "region": max_row["region"], "resource": max_row["resource_type"]},
+        }
+
+    extremes_df = pd.DataFrame([
+        {"date": d, "cpu": get_extremes(sub, "usage_cpu"), "storage": get_extremes(sub, "usage_storage"),
+         "users": get_extremes(sub, "users_active")}
+        for d, sub in df.groupby("date")
+    ])
+    region_data = df.groupby("date")["region"].unique().reset_index().rename(columns={"region": "active_regions"})
+    resources_data = (
+        df.groupby(["date", "region"])["resource_type"].unique().reset_index()
+        .groupby("date")
+        .apply(lambda x: {row["region"]: list(row["resource_type"]) for _, row in x.iterrows()})
+        .reset_index(name="resources_per_region")
+    )
+    return timely_data.merge(extremes_df, on="date").merge(region_data, on="date").merge(resources_data, on="date")
+
+
+def per_call(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def synthetic_raw(raw_dir, regions, days, seed=0):
+    """Hourly usage rows (ordered by timestamp) and daily external factors."""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2023-01-01", periods=days * 24, freq="h")
+    names = [f"region {i:03d}" for i in range(regions)]
+    resources = ["vm", "storage", "container"]
+    per_hour = regions * len(resources)
+    with open(os.path.join(raw_dir, "azure_usage.csv"), "w") as f:
+        f.write("date,region,resource_type,usage_cpu,usage_storage,users_active\n")
+        region_col = np.repeat(names, len(resources))
+        resource_col = np.tile(resources, regions)
+        for day in range(days):
+            block = hours[day * 24:(day + 1) * 24]
+            n = len(block) * per_hour
+            pd.DataFrame({
+                "date": np.repeat(block.strftime("%Y-%m-%d %H:%M:%S"), per_hour),
+                "region": np.tile(region_col, len(block)),
+                "resource_type": np.tile(resource_col, len(block)),
+                "usage_cpu": rng.integers(50, 100, n),
+                "usage_storage": rng.integers(500, 2000, n),
+                "users_active": rng.integers(200, 500, n),
+            }).to_csv(f, header=False, index=False)
+    dates = pd.date_range("2023-01-01", periods=days, freq="D")
+    pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "economic_index": rng.uniform(95, 110, days).round(2),
+        "cloud_market_demand": rng.uniform(0.9, 1.2, days).round(2),
+        "holiday": rng.integers(0, 2, days),
+    }).to_csv(os.path.join(raw_dir, "external_factors.csv"), index=False)
+    return days * 24 * per_hour
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regions", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    # Scale run first, so the parent's peak RSS is not inflated by the steps below
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = os.path.join(tmp, "raw")
+        os.makedirs(raw_dir)
+        start = time.perf_counter()
+        rows = synthetic_raw(raw_dir, args.regions, args.days)
+        size_mb = os.path.getsize(os.path.join(raw_dir, "azure_usage.csv")) / 1e6
+        print(f"synthetic: {rows:,} hourly rows ({size_mb:.0f} MB) in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        paths = build_tables(os.path.join(tmp, "out"), raw_dir, chunk_rows=args.chunk_rows, workers=args.workers,
+                             period="D", legacy_rolling=False)
+        elapsed = time.perf_counter() - start
+        # ru_maxrss is in KiB on Linux
+        parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        days = len(pd.read_csv(paths["feature_engineered"], usecols=["date"]))
+        print(f"pipeline: {elapsed:.1f} s, {days} days, chunk_rows={args.chunk_rows:,}, peak RSS parent "
+              f"{parent:.0f} MB (after imports {baseline:.0f} MB), largest worker {children:.0f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_tables(os.path.join(tmp, "sample"), RAW_DIR, workers=1)
+        for name, path in paths.items():
+            print(f"{name:>20}: {'identical' if filecmp.cmp(path, STORED[name], shallow=False) else 'DIFFERENT'}")
+
+    merged = clean_merge(pd.read_csv(os.path.join(RAW_DIR, "azure_usage.csv")),
+                         clean_factors(pd.read_csv(os.path.join(RAW_DIR, "external_factors.csv"))))
+    notebook = per_call(lambda: notebook_aggregates(merged))
+    vectorized = per_call(lambda: daily_aggregates(merged))
+    print(f"daily aggregates on {len(merged)} rows: notebook {notebook * 1000:.1f} ms, "
+          f"vectorized {vectorized * 1000:.1f} ms ({notebook / vectorized:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Range-lookup latency of feature_routes' DateIndex vs. the legacy boolean-mask scan.
+
+Builds a multi-year synthetic daily feature table and times 7/30/365-day ranges.
+Run from the backend folder:
+    python benchmarks/bench_feature_ranges.py [years]
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.date_index import DateIndex  # noqa: E402
+
+RANGES = [7, 30, 365]
+REPEATS = 20
+
+
+def synthetic_features(years):
+    dates = pd.date_range("2000-01-01", periods=int(years * 365.25), freq="D")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "date": dates,
+        "cpu_mean": rng.normal(75, 10, len(dates)),
+        "cpu_tot": rng.integers(500, 1200, len(dates)),
+        "cpu_std": rng.normal(14, 2, len(dates)),
+    })
+
+
+def legacy_range(df, start_date_str, days):
+    """The original mask scan plus O(days x rows) completeness check."""
+    start_date = pd.to_datetime(start_date_str)
+    end_date = start_date + timedelta(days=days - 1)
+    range_df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+    expected_days = pd.date_range(start=start_date, end=end_date, freq="D")
+    if not all(day in range_df["date"].values for day in expected_days):
+        return None
+    return range_df
+
+
+def indexed_range(df, index, start_date_str, days):
+    start_date = DateIndex.parse(start_date_str)
+    end_date = start_date + (days - 1)
+    if not index.is_complete(start_date, end_date):
+        return None
+    lo, hi = index.bounds(start_date, end_date)
+    return df.iloc[lo:hi]
+
+
+def best_of(fn):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    df = synthetic_features(years)
+    index = DateIndex(df["date"])
+    start = df["date"].iloc[len(df) // 2].strftime("%Y-%m-%d")
+
+    print(f"{len(df)} rows ({years:g} years), range start {start}")
+    print(f"{'days':>6} {'legacy (ms)':>12} {'indexed (ms)':>13} {'speedup':>8}  match")
+    for days in RANGES:
+        legacy_time, legacy = best_of(lambda: legacy_range(df, start, days))
+        indexed_time, indexed = best_of(lambda: indexed_range(df, index, start, days))
+        print(f"{days:>6} {legacy_time * 1000:>12.3f} {indexed_time * 1000:>13.3f} "
+              f"{legacy_time / indexed_time:>7.1f}x  {legacy.equals(indexed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Per-request latency of the recursive forecaster vs. the legacy pandas loop.
+
+Run from the backend folder:
+    python benchmarks/bench_forecast.py
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.forecast_engine import RecursiveForecaster  # noqa: E402
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DATA_PATH = os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "backend", "models", "backtested_models", "usage_cpu_best_model.pkl")
+
+HORIZONS = [7, 30, 90, 365]
+PATHS = [1, 100, 1000, 5000]
+REPEATS = 3
+
+
+def legacy_forecast(model, target_col, df, horizon, variability_factor=0.25, seed=42):
+    """The original per-day pandas loop, kept here as the reference implementation."""
+    np.random.seed(seed)
+    hist_df = df.copy()
+    hist_df["date"] = pd.to_datetime(hist_df["date"])
+    last_date = hist_df["date"].max()
+    forecasts = []
+
+    for i in range(horizon):
+        next_date = last_date + timedelta(days=i + 1)
+        new_row = hist_df.iloc[-1:].copy()
+        new_row["date"] = next_date
+        new_row["month"] = next_date.month
+        new_row["dayofweek"] = next_date.dayofweek
+        new_row["dayofmonth"] = next_date.day
+        new_row["quarter"] = (next_date.month - 1) // 3 + 1
+        new_row["is_weekend"] = 1 if next_date.weekday() >= 5 else 0
+
+        for lag in [1, 7, 14]:
+            prev_val = hist_df[target_col].iloc[-lag]
+            new_row[f"{target_col}_lag_{lag}"] = prev_val * (1 + np.random.normal(0, variability_factor))
+
+        for win in [7, 14]:
+            adjusted_window = hist_df[target_col].iloc[-win:] * (1 + np.random.normal(0, variability_factor, size=win))
+            new_row[f"{target_col}_roll_mean_{win}"] = adjusted_window.mean()
+            new_row[f"{target_col}_roll_std_{win}"] = adjusted_window.std(ddof=0)
+
+        feature_cols = [col for col in hist_df.columns if col not in ["date", "usage_cpu", "usage_storage", "users_active", "unique_id"]]
+        pred = model.predict(new_row[feature_cols])[0]
+        forecasts.append(float(pred))
+
+        new_row[target_col] = pred
+        hist_df = pd.concat([hist_df, new_row], ignore_index=True)
+
+    return forecasts
+
+
+def best_of(fn):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    df = pd.read_csv(DATA_PATH)
+    model = joblib.load(MODEL_PATH)
+
+    print(f"{'horizon':>8} {'legacy (ms)':>12} {'engine (ms)':>12} {'speedup':>8}  match")
+    for horizon in HORIZONS:
+        legacy_time, legacy = best_of(lambda: legacy_forecast(model, "usage_cpu", df, horizon))
+        engine_time, engine = best_of(
+            lambda: RecursiveForecaster(model, "usage_cpu", df).forecast(horizon=horizon)
+        )
+        match = np.allclose(legacy, [f["predicted"] for f in engine], rtol=0, atol=1e-9)
+        print(f"{horizon:>8} {legacy_time * 1000:>12.1f} {engine_time * 1000:>12.1f} "
+              f"{legacy_time / engine_time:>7.1f}x  {match}")
+
+    # Monte Carlo: every path advances in the same batched predict per day
+    print(f"\n{'paths':>8} {'30-day (ms)':>12} {'ms/path':>8}")
+    for paths in PATHS:
+        mc_time, _ = best_of(lambda: RecursiveForecaster(model, "usage_cpu", df).simulate(paths=paths, horizon=30))
+        print(f"{paths:>8} {mc_time * 1000:>12.1f} {mc_time * 1000 / paths:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+JSON serialization of DataFrame responses: the previous to_dict + stdlib
+encoder path vs. services.json_response (records and ?orient=columns).
+
+For synthetic insights tables of 1k, 100k and 1M rows it times, and
+measures the peak traced memory of, the body of
+  /api/monthly-trends   the month x region x resource rollup of the table
+  /api/raw-data-*       the whole table
+Run from the backend folder:
+    python benchmarks/bench_json.py [--rows 1000,100000,1000000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.json_response import FastJSONProvider, frame_response, orjson  # noqa: E402
+
+RESOURCES = ["vm", "storage", "container"]
+DAYS = 365
+
+
+def synthetic_insights(rows, seed=0):
+    """insights.csv-shaped rows: one year of days, as many regions as needed for `rows`."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2023-01-01", periods=DAYS, freq="D")
+    regions = max(1, -(-rows // (DAYS * len(RESOURCES))))
+    grid = pd.MultiIndex.from_product([days, [f"region {i:04d}" for i in range(regions)], RESOURCES],
+                                      names=["date", "region", "resource_type"])
+    df = grid.to_frame(index=False).iloc[:rows]
+    n = len(df)
+    df["region"] = df["region"].astype("category")
+    df["resource_type"] = df["resource_type"].astype("category")
+    df["usage_cpu"] = rng.integers(50, 100, n)
+    df["usage_storage"] = rng.integers(500, 2000, n)
+    df["users_active"] = rng.integers(200, 500, n)
+    df["economic_index"] = rng.uniform(95, 110, n).round(2)
+    df["cloud_market_demand"] = rng.uniform(0.9, 1.2, n).round(2)
+    df["holiday"] = rng.integers(0, 2, n)
+    df["storage_allocated"] = 2000
+    df["storage_efficiency"] = (df["usage_storage"] / 2000 * 100).round(2)
+    # A few missing values, as in the std columns of single-row groups
+    df.loc[df.index[::97], "storage_efficiency"] = np.nan
+    return df
+
+
+def monthly_trends(df):
+    """insights_routes.build_monthly_trends before the final safe_df."""
+    df = df.assign(month=df["date"].dt.to_period("M").astype(str))
+    return (
+        df.groupby(["month", "region", "resource_type"], observed=True)
+        .agg({"usage_cpu": "mean", "usage_storage": "mean", "users_active": "mean"})
+        .round(2)
+        .reset_index()
+    )
+
+
+# ---------- Previous implementations ----------
+def legacy_safe_df(df):
+    df_copy = df.copy()
+    for col in df_copy.columns:
+        if isinstance(df_copy[col].dtype, pd.PeriodDtype):
+            df_copy[col] = df_copy[col].astype(str)
+    return df_copy.reset_index().to_dict(orient="records")
+
+
+def legacy_records(frame):
+    out = frame.astype(object).where(frame.notna(), None)
+    for col in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[col]):
+            out[col] = frame[col].dt.strftime("%Y-%m-%d")
+    return out.to_dict(orient="records")
+
+
+def measure(fn, repeats):
+    """(best seconds, peak traced MB, body MB); memory is traced in a separate, untimed call."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 1e6, size / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1000,100000,1000000")
+    args = parser.parse_args()
+
+    legacy_app = Flask("legacy")
+    fast_app = Flask("fast")
+    fast_app.json = FastJSONProvider(fast_app)
+    print(f"orjson: {orjson.__version__ if orjson is not None else 'not installed (stdlib fallback)'}")
+
+    def legacy(frame, to_records):
+        with legacy_app.test_request_context():
+            return legacy_app.json.response(to_records(frame)).get_data()
+
+    def fast(frame, orient):
+        with fast_app.test_request_context():
+            return frame_response(frame, orient).get_data()
+
+    print(f"{'endpoint':<16} {'rows':>9} {'out rows':>9} {'variant':<16} {'time (ms)':>10} {'peak MB':>9} {'body MB':>8}")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        df = synthetic_insights(rows)
+        repeats = 5 if rows <= 100_000 else 2
+        monthly = monthly_trends(df)
+        # The rollup is precomputed by the aggregate store; only its serialization is on the request path
+        cases = [
+            ("/monthly-trends", monthly, lambda: legacy(monthly, legacy_safe_df),
+             lambda: fast(monthly.reset_index(), "records"), lambda: fast(monthly.reset_index(), "columns")),
+            ("/raw-data-*", df, lambda: legacy(df, legacy_records),
+             lambda: fast(df, "records"), lambda: fast(df, "columns")),
+        ]
+        for endpoint, frame, *variants in cases:
+            bodies = [json.loads(variant()) for variant in variants[:2]]
+            match = "same records" if bodies[0] == bodies[1] else "RECORDS DIFFER"
+            for name, variant in zip(["legacy records", "fast records", "fast columns"], variants):
+                seconds, peak, size = measure(variant, repeats)
+                print(f"{endpoint:<16} {rows:>9,} {len(frame):>9,} {name:<16} {seconds * 1000:>10.1f} {peak:>9.1f} {size:>8.1f}")
+            print(f"{'':<16} {'':>9} {'':>9} {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+NumPy LSTM/GRU runtime (services/recurrent.py) vs. Keras on the Model/models/*.h5 networks.
+
+Rebuilds the notebook's validation/test windows (70/20/10 split per
+unique_id, daily means, min-max scaled per split, 7-day sequences) and
+reports load time and forward-pass latency. When TensorFlow is installed,
+it also reports the max abs difference against `keras.Model.predict` on the
+same windows; `--write-reference` then stores those windows and Keras
+outputs in benchmarks/reference/recurrent_keras.npz, which
+check_reference_outputs.py compares against without TensorFlow.
+Run from the backend folder:
+    python benchmarks/bench_recurrent.py [--write-reference]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.recurrent import load_keras_h5, daily_series, sequence_windows  # noqa: E402
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DATA_PATH = os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv")
+MODEL_DIR = os.path.join(BASE_DIR, "Model", "models")
+REFERENCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference", "recurrent_keras.npz")
+
+TOLERANCE = 1e-5
+REPEATS = 50
+
+
+def notebook_splits(df, train_ratio=0.7, val_ratio=0.2):
+    """The notebook's create_train_val_test_split: chronological split of every unique_id."""
+    splits = {"validation": [], "test": []}
+    for _, group in df.sort_values(["unique_id", "date"]).groupby("unique_id", sort=False):
+        n = len(group)
+        train_end = int(n * train_ratio)
+        val_end = int(n * (train_ratio + val_ratio))
+        splits["validation"].append(group.iloc[train_end:val_end])
+        splits["test"].append(group.iloc[val_end:])
+    return {name: pd.concat(parts) for name, parts in splits.items()}
+
+
+def scaled_windows(df, target):
+    _, values = daily_series(df, target)
+    span = values.max() - values.min() or 1.0
+    return sequence_windows((values - values.min()) / span)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--write-reference", action="store_true",
+                        help="store the windows and Keras outputs for check_reference_outputs.py")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_PATH)
+    df["date"] = pd.to_datetime(df["date"])
+    splits = notebook_splits(df)
+
+    try:
+        import keras
+    except ImportError:
+        keras = None
+        print("TensorFlow/Keras not installed: skipping the Keras parity check")
+        if args.write_reference:
+            sys.exit("--write-reference needs TensorFlow/Keras")
+
+    reference_arrays = {}
+
+    for path in sorted(glob.glob(os.path.join(MODEL_DIR, "*.h5"))):
+        name = os.path.basename(path)[:-3]
+        target = next(t for t in ["usage_cpu", "usage_storage", "users_active"] if name.endswith(t))
+
+        start = time.perf_counter()
+        network = load_keras_h5(path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        windows = {split: scaled_windows(split_df, target) for split, split_df in splits.items()}
+        all_windows = np.concatenate(list(windows.values()))
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            network.predict(all_windows[:1])
+        single_ms = (time.perf_counter() - start) / REPEATS * 1000
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            network.predict(all_windows)
+        batch_ms = (time.perf_counter() - start) / REPEATS * 1000
+
+        print(f"\n{name}: loaded in {load_ms:.1f} ms, 1 window {single_ms:.3f} ms, "
+              f"{len(all_windows)} windows {batch_ms:.3f} ms")
+
+        if keras is not None:
+            start = time.perf_counter()
+            reference = keras.models.load_model(path, compile=False)
+            print(f"  keras load {(time.perf_counter() - start) * 1000:.0f} ms")
+            for split, X in windows.items():
+                expected = reference.predict(X, verbose=0)
+                diff = float(np.max(np.abs(network.predict(X) - expected)))
+                print(f"  {split}: {len(X)} windows, max abs diff {diff:.2e} ({'ok' if diff <= TOLERANCE else 'MISMATCH'})")
+                reference_arrays[f"{name}.{split}.X"] = X
+                reference_arrays[f"{name}.{split}.expected"] = expected
+
+    if args.write_reference:
+        np.savez_compressed(REFERENCE_PATH, keras_version=keras.__version__, **reference_arrays)
+        print(f"\nKeras {keras.__version__} outputs written to {REFERENCE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
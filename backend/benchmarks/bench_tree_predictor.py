@@ -0,0 +1,70 @@
+"""
+Predict latency of the compiled tree ensembles (services/tree_compiler.py) vs. model.predict.
+
+For every best model: compile time, max abs difference against predict on
+the full feature matrix, and per-call latency for batches of 1..N rows
+(model.predict gets a DataFrame, as the forecaster used to pass it). Run
+from the backend folder:
+    python benchmarks/bench_tree_predictor.py
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.forecast_engine import RecursiveForecaster, get_feature_cols  # noqa: E402
+from services.tree_compiler import compile_model, validate  # noqa: E402
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DATA_PATH = os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv")
+MODEL_DIR = os.path.join(BASE_DIR, "backend", "models", "backtested_models")
+
+TARGETS = ["usage_cpu", "usage_storage", "users_active"]
+BATCHES = [1, 10, 100, 1000]
+REPEATS = 20
+
+
+def per_call(fn, repeats=REPEATS):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    df = pd.read_csv(DATA_PATH)
+    feature_cols = get_feature_cols(df.columns)
+    X = df[feature_cols]
+
+    for target in TARGETS:
+        model = joblib.load(os.path.join(MODEL_DIR, f"{target}_best_model.pkl"))
+        start = time.perf_counter()
+        compiled = compile_model(model)
+        compile_ms = (time.perf_counter() - start) * 1000
+        max_diff, ok = validate(compiled, model, X)
+        exact = np.array_equal(compiled.predict(X), model.predict(X))
+        print(f"\n{target}: {type(model).__name__}, {compiled.n_trees} trees, {compiled.n_nodes} nodes, "
+              f"depth {compiled.max_depth}, compiled in {compile_ms:.0f} ms, "
+              f"max abs diff {max_diff:.2e} (within tolerance: {ok}, bit-exact: {exact})")
+
+        print(f"{'rows':>6} {'predict ms':>11} {'compiled ms':>12} {'speedup':>8}")
+        for n in BATCHES:
+            rows = X.iloc[np.arange(n) % len(X)]
+            array = rows.to_numpy(dtype=np.float64)
+            original = per_call(lambda: model.predict(rows))
+            fast = per_call(lambda: compiled.predict(array))
+            print(f"{n:>6} {original * 1000:>11.3f} {fast * 1000:>12.3f} {original / fast:>7.1f}x")
+
+        original = per_call(lambda: RecursiveForecaster(model, target, df).forecast(horizon=30), 3)
+        fast = per_call(lambda: RecursiveForecaster(compiled, target, df).forecast(horizon=30), 3)
+        print(f"30-day forecast: {original * 1000:.1f} ms -> {fast * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
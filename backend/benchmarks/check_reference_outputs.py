@@ -0,0 +1,98 @@
+"""
+Compare endpoint outputs with reference outputs stored under benchmarks/reference/.
+
+  forecast_download   /api/models/forecast/download CSVs, byte for byte, as
+                      written before the shared data store (e61f898)
+  recurrent_keras     RecurrentNetwork.predict on the notebook's validation/test
+                      windows vs. keras.Model.predict (Keras 3.11.3, TensorFlow
+                      backend), within 1e-5; written by
+                      `bench_recurrent.py --write-reference`, no TensorFlow needed
+
+Run from the backend folder; exits non-zero when any output differs:
+    python benchmarks/check_reference_outputs.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+MODEL_DIR = os.path.join(BASE_DIR, "Model", "models")
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference")
+
+DOWNLOADS = {
+    "compute_h7.csv": "service=compute&horizon=7",
+    "storage_h14_r1.csv": "service=storage&horizon=14&region=1",
+    "users_h30_r0.csv": "service=users&horizon=30&region=0",
+}
+RECURRENT_TOLERANCE = 1e-5
+
+
+# ---------- Checks ----------
+def check_forecast_download():
+    """(name, ok, detail) per stored download."""
+    from app import app
+
+    client = app.test_client()
+    results = []
+    for file, query in DOWNLOADS.items():
+        with open(os.path.join(REFERENCE_DIR, "forecast_download", file), "rb") as f:
+            expected = f.read()
+        response = client.get(f"/api/models/forecast/download?{query}")
+        if response.status_code != 200:
+            results.append((query, False, f"status {response.status_code}"))
+            continue
+        got = response.data
+        if got == expected:
+            results.append((query, True, f"{len(got)} bytes"))
+            continue
+        # First differing line, to show what changed
+        for line, (a, b) in enumerate(zip(expected.decode().splitlines(), got.decode().splitlines()), start=1):
+            if a != b:
+                results.append((query, False, f"line {line}: expected {a!r}, got {b!r}"))
+                break
+        else:
+            results.append((query, False, f"expected {len(expected)} bytes, got {len(got)}"))
+    return results
+
+
+def check_recurrent_keras():
+    """(model/split, ok, detail) per stored window set."""
+    from services.recurrent import load_keras_h5
+
+    reference = np.load(os.path.join(REFERENCE_DIR, "recurrent_keras.npz"))
+    results = []
+    networks = {}
+    for key in reference.files:
+        if not key.endswith(".expected"):
+            continue
+        name, split, _ = key.split(".")
+        if name not in networks:
+            networks[name] = load_keras_h5(os.path.join(MODEL_DIR, f"{name}.h5"))
+        X = reference[f"{name}.{split}.X"]
+        diff = float(np.max(np.abs(networks[name].predict(X) - reference[key])))
+        results.append((f"{name} {split}", diff <= RECURRENT_TOLERANCE,
+                        f"{len(X)} windows, max abs diff {diff:.2e} vs. Keras {reference['keras_version']}"))
+    return results
+
+
+CHECKS = {
+    "forecast_download": check_forecast_download,
+    "recurrent_keras": check_recurrent_keras,
+}
+
+
+def main():
+    failed = 0
+    for name, check in CHECKS.items():
+        for case, ok, detail in check():
+            failed += not ok
+            print(f"{'ok' if ok else 'FAIL':<5} {name:<18} {case:<40} {detail}")
+    print(f"{failed} failed" if failed else "all outputs match")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,130 @@
-import os
-import pandas as pd
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from services.data_store import dataset_path
+from services.date_index import DateIndex
+from services.raw_table import RawTable
+from services.ingestion import Ingestor
+from services.json_response import ORIENTS, frame_columns, frame_records, frame_response, request_orient
+from services.snapshots import SnapshotHolder
+from services.conditional import conditional, snapshot_sources
 
 data_bp = Blueprint("data", __name__)
 
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-file_path1 = os.path.join(BASE_DIR, "Data", "Processed", "insights.csv")
-file_path2 = os.path.join(BASE_DIR, "Data", "Processed", "feature_engineered.csv")
+file_path1 = dataset_path("insights")
+file_path2 = dataset_path("feature_engineered")
 
 print("🔍 Loading file from:", file_path1)
 
-insights_data = pd.read_csv(file_path1)
-feature_data = pd.read_csv(file_path2)
+# Frames are shared with insights_routes / feature_routes through the data store;
+# a changed or appended CSV publishes a new table without a restart
+INSIGHTS_TABLE = SnapshotHolder("raw-insights", ["insights"], lambda frames: {"table": RawTable(frames["insights"])})
+FEATURE_TABLE = SnapshotHolder(
+    "raw-features", ["feature_engineered"], lambda frames: {"table": RawTable(frames["feature_engineered"])}
+)
+INSIGHTS_TABLE.reload()
+FEATURE_TABLE.reload()
+# Polling clients get a 304 until either table changes
+conditional(data_bp, lambda: snapshot_sources(INSIGHTS_TABLE, FEATURE_TABLE))
+
+INGESTOR = Ingestor()
+
+MAX_PAGE_SIZE = 10000
+EXPORT_PARAMS = ["columns", "from", "to", "format", "limit", "offset", "cursor"]
+
+
+def raw_data_response(table, name):
+    """
+    Export a raw table.
+    Without query params the whole table is returned as records (legacy behaviour).
+    Optional params:
+      columns=a,b,c       project onto these columns
+      from=, to=          inclusive YYYY-MM-DD date filter
+      limit=, offset=     page of records; `cursor` is accepted as an alias of offset
+      format=ndjson|csv   stream the selection in chunks instead of one JSON document
+      orient=columns      JSON as {"columns": [...], "data": {column: [values]}} instead of records
+    """
+    orient = request_orient()
+    if orient is None:
+        return jsonify({"error": f"Invalid orient. Must be one of {ORIENTS}"}), 400
+    if not any(param in request.args for param in EXPORT_PARAMS):
+        return frame_response(table.df, orient)
+
+    columns = [c.strip() for c in request.args.get("columns", "").split(",") if c.strip()]
+    unknown = table.unknown_columns(columns)
+    if unknown:
+        return jsonify({"error": f"Unknown columns {unknown}"}), 400
+
+    start, end = request.args.get("from"), request.args.get("to")
+    start = DateIndex.parse(start) if start is not None else None
+    end = DateIndex.parse(end) if end is not None else None
+    if (request.args.get("from") is not None and start is None) or (request.args.get("to") is not None and end is None):
+        return jsonify({"error": "Invalid 'from'/'to' date, expected YYYY-MM-DD"}), 400
+
+    frame = table.select(columns, start, end)
+
+    fmt = request.args.get("format", "json").lower()
+    if fmt == "ndjson":
+        return Response(stream_with_context(table.iter_ndjson(frame)), mimetype="application/x-ndjson")
+    if fmt == "csv":
+        return Response(
+            stream_with_context(table.iter_csv(frame)),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f"attachment;filename={name}.csv"}
+        )
+    if fmt != "json":
+        return jsonify({"error": f"Invalid format '{fmt}'. Must be json, ndjson or csv"}), 400
+
+    offset = request.args.get("cursor", request.args.get("offset", 0))
+    limit = request.args.get("limit", MAX_PAGE_SIZE)
+    try:
+        offset, limit = int(offset), int(limit)
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit and offset/cursor must be integers"}), 400
+    if offset < 0 or limit < 1:
+        return jsonify({"error": "offset must be >= 0 and limit >= 1"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    total = len(frame)
+    page = frame.iloc[offset:offset + limit]
+    next_offset = offset + len(page)
+
+    return jsonify({
+        "data": frame_columns(page) if orient == "columns" else frame_records(page),
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_cursor": next_offset if next_offset < total else None
+    })
+
 
 # Route for insights.csv
 @data_bp.route("/raw-data-insights", methods=["GET"])
 def get_raw_data_insights():
-    return insights_data.to_dict(orient="records")
+    return raw_data_response(INSIGHTS_TABLE.get().table, "insights")
 
 # Route for feature_engineered.csv
 @data_bp.route("/raw-data-features", methods=["GET"])
 def get_raw_data_features():
-    return feature_data.to_dict(orient="records")
+    return raw_data_response(FEATURE_TABLE.get().table, "feature_engineered")
+
+
+# ---------- Ingestion ----------
+@data_bp.route("/ingest", methods=["POST"])
+def ingest():
+    """
+    Append new days to the processed tables.
+    Body (optional): {"usage": [records], "external_factors": [records]} with the
+    Data/Raw column layout; without a body the Data/Raw files are scanned for new days.
+    """
+    body = request.get_json(silent=True) or {}
+    usage = body.get("usage")
+    factors = body.get("external_factors")
+    if usage is not None and not isinstance(usage, list) or factors is not None and not isinstance(factors, list):
+        return jsonify({"error": "usage and external_factors must be lists of records"}), 400
+
+    try:
+        summary, _ = INGESTOR.ingest(usage, factors)
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    print(f"Ingested {summary['ingested_rows']} rows for {len(summary['days'])} new days")
+    return jsonify(summary)
@@ -1,48 +1,39 @@
-import os
-import json
-import ast
-import re
+import numpy as np
 import pandas as pd
-from flask import Blueprint, jsonify
-from datetime import timedelta
+from flask import Blueprint, jsonify, request
+from services.data_store import dataset_path
+from services.date_index import DateIndex
+from services.feature_store import FeatureStore
+from services.rolling_stats import RollingStats
+from services.snapshots import SnapshotHolder
+from services.conditional import conditional, snapshot_sources
 
 features_bp = Blueprint("features", __name__)
 
 # ---------- Load dataset ----------
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-file_path = os.path.join(BASE_DIR, "Data", "Processed", "feature_engineered.csv")
+file_path = dataset_path("feature_engineered")
 
-df = pd.read_csv(file_path)
-df["date"] = pd.to_datetime(df["date"])
+def build_state(frame):
+    """Every structure the routes read, derived from one version of feature_engineered."""
+    df = frame.sort_values("date", kind="stable").reset_index(drop=True)
+    return {
+        "df": df,
+        "date_index": DateIndex(df["date"]),
+        # Dict/list columns are decoded once here instead of on every request
+        "feature_store": FeatureStore(df),
+        # Prefix sums for rolling windows over the daily means, computed once
+        "rolling_stats": RollingStats({col: df[col] for col in ["cpu_mean", "storage_mean", "users_mean"]}),
+        "date_strings": df["date"].dt.strftime("%Y-%m-%d").to_numpy(),
+    }
 
 
-# ---------- Helpers ----------
-def parse_json_field(value):
-    """Parse JSON, numpy-style arrays, or leave as-is."""
-    if isinstance(value, str):
-        value = value.strip()
-
-        # Case 1: Looks like JSON object or list
-        if value.startswith("{") or value.startswith("["):
-            try:
-                return json.loads(value.replace("'", '"'))
-            except Exception:
-                try:
-                    return ast.literal_eval(value)
-                except Exception:
-                    pass
-
-        # Case 2: NumPy-like array: ['east us' 'west us']
-        if value.startswith("[") and "'" in value and " " in value:
-            try:
-                items = re.findall(r"'([^']+)'", value)
-                return items
-            except Exception:
-                pass
-
-    return value
+# Requests read one pinned version; a changed or appended CSV publishes the next in the background
+FEATURES = SnapshotHolder("features", ["feature_engineered"], lambda frames: build_state(frames["feature_engineered"]))
+FEATURES.reload()
+conditional(features_bp, lambda: snapshot_sources(FEATURES))
 
 
+# ---------- Helpers ----------
 def safe_value(val):
     """Convert numpy & pandas types to Python builtins"""
     if isinstance(val, (pd.Period,)):
@@ -53,10 +44,12 @@ def safe_value(val):
 
 
 def get_row(date):
-    row = df[df["date"] == date]
-    if row.empty:
+    state = FEATURES.get()
+    day = DateIndex.parse(date)
+    if day not in state.date_index:
         return None
-    return row.iloc[0]
+    lo, _ = state.date_index.locate(day)
+    return state.df.iloc[lo]
 
 
 # ---------- Routes ----------
@@ -64,13 +57,15 @@ def get_row(date):
 @features_bp.route("/dates", methods=["GET"])
 def get_all_dates():
     """Return all available dates in the dataset"""
-    dates = df["date"].dt.strftime("%Y-%m-%d").unique().tolist()
+    state = FEATURES.get()
+    dates = state.df["date"].dt.strftime("%Y-%m-%d").unique().tolist()
     return jsonify({"available_dates": dates})
 
 @features_bp.route("/months", methods=["GET"])
 def get_all_months():
     """Return all available months in the dataset"""
-    months = df["date"].dt.to_period("M").astype(str).unique().tolist()
+    state = FEATURES.get()
+    months = state.df["date"].dt.to_period("M").astype(str).unique().tolist()
     months.sort()
     return jsonify({"available_months": months})
 
@@ -81,8 +76,9 @@ def get_dates_in_month(month):
     Return all available dates in a given month (YYYY-MM format).
     Example: /api/features/dates/2023-01
     """
+    state = FEATURES.get()
     try:
-        filtered = df[df["date"].dt.to_period("M").astype(str) == month]
+        filtered = state.df[state.df["date"].dt.to_period("M").astype(str) == month]
         if filtered.empty:
             return jsonify({"error": f"No data found for month {month}"}), 404
 
@@ -94,11 +90,12 @@ def get_dates_in_month(month):
 
 @features_bp.route("/<date>/cpu", methods=["GET"])
 def cpu_by_date(date):
+    state = FEATURES.get()
     row = get_row(date)
     if row is None:
         return jsonify({"error": "Date not found"}), 404
 
-    extremes = parse_json_field(row["cpu"])
+    extremes = state.feature_store.extremes["cpu"].point(row.name)
     return jsonify({
         "mean": safe_value(row["cpu_mean"]),
         "total": safe_value(row["cpu_tot"]),
@@ -110,11 +107,12 @@ def cpu_by_date(date):
 
 @features_bp.route("/<date>/storage", methods=["GET"])
 def storage_by_date(date):
+    state = FEATURES.get()
     row = get_row(date)
     if row is None:
         return jsonify({"error": "Date not found"}), 404
 
-    extremes = parse_json_field(row["storage"])
+    extremes = state.feature_store.extremes["storage"].point(row.name)
     return jsonify({
         "mean": safe_value(row["storage_mean"]),
         "total": safe_value(row["storage_tot"]),
@@ -126,11 +124,12 @@ def storage_by_date(date):
 
 @features_bp.route("/<date>/users", methods=["GET"])
 def users_by_date(date):
+    state = FEATURES.get()
     row = get_row(date)
     if row is None:
         return jsonify({"error": "Date not found"}), 404
 
-    extremes = parse_json_field(row["users"])
+    extremes = state.feature_store.extremes["users"].point(row.name)
     return jsonify({
         "mean": safe_value(row["users_mean"]),
         "total": safe_value(row["users_tot"]),
@@ -156,6 +155,7 @@ def economy_by_date(date):
 
 @features_bp.route("/<date>/summary", methods=["GET"])
 def summary_by_date(date):
+    state = FEATURES.get()
     row = get_row(date)
     if row is None:
         return jsonify({"error": "Date not found"}), 404
@@ -163,29 +163,47 @@ def summary_by_date(date):
     return jsonify({
         "unique_regions": safe_value(row["unique_regions"]),
         "total_records": safe_value(row["total_records"]),
-        "resources_per_region": parse_json_field(row["resources_per_region"]),
+        "resources_per_region": state.feature_store.resources_per_region[row.name],
     })
 
 #-------------------------------------------------------------------------------
 
 def get_range_data(start_date_str, days):
     """Return dataframe for a given range (date + days-1)."""
+    state = FEATURES.get()
     try:
-        start_date = pd.to_datetime(start_date_str)
         days = int(days)
         if days < 1:
             return None
     except Exception:
         return None
-    
-    end_date = start_date + timedelta(days=days - 1)
-    range_df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
-    
+
+    start_date = DateIndex.parse(start_date_str)
+    if start_date is None:
+        return None
+    end_date = start_date + (days - 1)
+
     # Ensure all expected days are present
-    expected_days = pd.date_range(start=start_date, end=end_date, freq="D")
-    if not all(day in range_df["date"].values for day in expected_days):
+    if not state.date_index.is_complete(start_date, end_date):
         return None
-    return range_df
+
+    lo, hi = state.date_index.bounds(start_date, end_date)
+    return state.df.iloc[lo:hi]
+
+
+def extremes_range_response(range_df, col_prefix):
+    """Aggregate stats plus the lowest/highest resource over a range, via the decoded extremes arrays."""
+    state = FEATURES.get()
+    lo, hi = range_df.index[0], range_df.index[-1] + 1
+    min_resource, max_resource = state.feature_store.extremes[col_prefix].range_extremes(lo, hi)
+
+    return {
+        "mean": safe_value(range_df[f"{col_prefix}_mean"].mean().round(2)),
+        "total": safe_value(range_df[f"{col_prefix}_tot"].sum()),
+        "std": safe_value(range_df[f"{col_prefix}_std"].mean().round(2)),
+        "min_resource": min_resource,
+        "max_resource": max_resource,
+    }
 
 
 #-------------------------------------------------------------------------------
@@ -195,24 +213,7 @@ def cpu_by_range(date, days):
     range_df = get_range_data(date, days)
     if range_df is None or range_df.empty:
         return jsonify({"error": f"No data for full range starting at {date} for {days} days"}), 404
-
-    # Parse min/max from each day
-    min_candidates, max_candidates = [], []
-    for _, row in range_df.iterrows():
-        parsed = parse_json_field(row["cpu"])
-        if isinstance(parsed, dict):
-            if "min" in parsed:
-                min_candidates.append(parsed["min"])
-            if "max" in parsed:
-                max_candidates.append(parsed["max"])
-
-    return jsonify({
-        "mean": safe_value(range_df["cpu_mean"].mean().round(2)),
-        "total": safe_value(range_df["cpu_tot"].sum()),
-        "std": safe_value(range_df["cpu_std"].mean().round(2)),
-        "min_resource": min(min_candidates, key=lambda x: x["value"]) if min_candidates else None,
-        "max_resource": max(max_candidates, key=lambda x: x["value"]) if max_candidates else None,
-    })
+    return jsonify(extremes_range_response(range_df, "cpu"))
 
 
 
@@ -223,24 +224,7 @@ def storage_by_range(date, days):
     range_df = get_range_data(date, days)
     if range_df is None or range_df.empty:
         return jsonify({"error": f"No data for full range starting at {date} for {days} days"}), 404
-
-    min_candidates, max_candidates = [], []
-    for _, row in range_df.iterrows():
-        parsed = parse_json_field(row["storage"])
-        if isinstance(parsed, dict):
-            if "min" in parsed:
-                min_candidates.append(parsed["min"])
-            if "max" in parsed:
-                max_candidates.append(parsed["max"])
-
-    return jsonify({
-        "mean": safe_value(range_df["storage_mean"].mean().round(2)),
-        "total": safe_value(range_df["storage_tot"].sum()),
-        "std": safe_value(range_df["storage_std"].mean().round(2)),
-        "min_resource": min(min_candidates, key=lambda x: x["value"]) if min_candidates else None,
-        "max_resource": max(max_candidates, key=lambda x: x["value"]) if max_candidates else None,
-    })
-
+    return jsonify(extremes_range_response(range_df, "storage"))
 
 
 
@@ -250,23 +234,7 @@ def users_by_range(date, days):
     range_df = get_range_data(date, days)
     if range_df is None or range_df.empty:
         return jsonify({"error": f"No data for full range starting at {date} for {days} days"}), 404
-
-    min_candidates, max_candidates = [], []
-    for _, row in range_df.iterrows():
-        parsed = parse_json_field(row["users"])
-        if isinstance(parsed, dict):
-            if "min" in parsed:
-                min_candidates.append(parsed["min"])
-            if "max" in parsed:
-                max_candidates.append(parsed["max"])
-
-    return jsonify({
-        "mean": safe_value(range_df["users_mean"].mean().round(2)),
-        "total": safe_value(range_df["users_tot"].sum()),
-        "std": safe_value(range_df["users_std"].mean().round(2)),
-        "min_resource": min(min_candidates, key=lambda x: x["value"]) if min_candidates else None,
-        "max_resource": max(max_candidates, key=lambda x: x["value"]) if max_candidates else None,
-    })
+    return jsonify(extremes_range_response(range_df, "users"))
 
 
 
@@ -301,6 +269,7 @@ def economy_by_range(date, days):
 
 @features_bp.route("/range/<date>/<days>/summary", methods=["GET"])
 def summary_by_range(date, days):
+    state = FEATURES.get()
     range_df = get_range_data(date, days)
     if range_df is None or range_df.empty:
         return jsonify({"error": f"No data for full range starting at {date} for {days} days"}), 404
@@ -308,7 +277,7 @@ def summary_by_range(date, days):
     return jsonify({
         "unique_regions": safe_value(range_df["unique_regions"].sum()),
         "total_records": safe_value(range_df["total_records"].sum()),
-        "resources_per_region": range_df["resources_per_region"].apply(parse_json_field).tolist()
+        "resources_per_region": state.feature_store.resources_per_region[range_df.index[0]:range_df.index[-1] + 1]
     })
 
 
@@ -352,67 +321,127 @@ def holidays_by_range(date, days):
 
 # ---------------------------------------------------------------
 
-@features_bp.route("/cpu/rolling/<int:window>", methods=["GET"])
-def cpu_with_rolling(window):
-    """Return CPU values, dates, and rolling averages for a given window size."""
-    if df is None or df.empty:
-        return jsonify({"error": "No data available"}), 404
-    temp_df = df.sort_values("date").copy()
+def rolling_bounds():
+    """Row bounds for the optional ?from=YYYY-MM-DD&to=YYYY-MM-DD query params, or None if invalid."""
+    state = FEATURES.get()
+    lo, hi = 0, len(state.df)
+    start, end = request.args.get("from"), request.args.get("to")
+    if start is not None:
+        start = DateIndex.parse(start)
+        if start is None:
+            return None
+        lo, _ = state.date_index.bounds(start, start)
+    if end is not None:
+        end = DateIndex.parse(end)
+        if end is None:
+            return None
+        _, hi = state.date_index.bounds(end, end)
+    return lo, max(lo, hi)
 
-    temp_df["rolling_avg"] = temp_df["cpu_mean"].rolling(window=window).mean()
 
-    temp_df = temp_df.dropna(subset=["rolling_avg"])
+def rolling_response(col_prefix, window):
+    """Values and rolling average for rows with a full window, restricted to ?from=&to=."""
+    state = FEATURES.get()
+    if window < 1:
+        return jsonify({"error": "Window must be a positive integer"}), 400
+    bounds = rolling_bounds()
+    if bounds is None:
+        return jsonify({"error": "Invalid 'from'/'to' date, expected YYYY-MM-DD"}), 400
 
+    lo, hi = bounds
+    rolling_avg, _ = state.rolling_stats.window(f"{col_prefix}_mean", window, lo, hi)
+    full = ~np.isnan(rolling_avg)
+
+    return jsonify({
+        "dates": state.date_strings[lo:hi][full].tolist(),
+        "values": np.round(state.rolling_stats.values[f"{col_prefix}_mean"][lo:hi][full], 2).tolist(),
+        "rolling_avg": np.round(rolling_avg[full], 2).tolist(),
+    })
+
+
+def multi_rolling_response(col_prefix):
+    """
+    Several rolling windows in one response: ?windows=7,14,30[&from=&to=].
+    Every window shares the same date axis; rows without a full window are null.
+    """
+    state = FEATURES.get()
+    try:
+        windows = [int(w) for w in request.args.get("windows", "7").split(",") if w.strip()]
+    except ValueError:
+        return jsonify({"error": "windows must be a comma-separated list of integers"}), 400
+    if not windows or min(windows) < 1:
+        return jsonify({"error": "windows must be positive integers"}), 400
+    bounds = rolling_bounds()
+    if bounds is None:
+        return jsonify({"error": "Invalid 'from'/'to' date, expected YYYY-MM-DD"}), 400
+
+    lo, hi = bounds
     result = {
-        "dates": temp_df["date"].dt.strftime("%Y-%m-%d").tolist(),
-        "values": temp_df["cpu_mean"].round(2).tolist(),
-        "rolling_avg": temp_df["rolling_avg"].round(2).tolist(),
+        "dates": state.date_strings[lo:hi].tolist(),
+        "values": np.round(state.rolling_stats.values[f"{col_prefix}_mean"][lo:hi], 2).tolist(),
+        "windows": {}
     }
-
+    for window in windows:
+        mean, std = state.rolling_stats.window(f"{col_prefix}_mean", window, lo, hi)
+        result["windows"][str(window)] = {
+            "rolling_avg": [None if np.isnan(v) else v for v in np.round(mean, 2).tolist()],
+            "rolling_std": [None if np.isnan(v) else v for v in np.round(std, 2).tolist()],
+        }
     return jsonify(result)
 
 
-# ---------------------------------------------------------------
+@features_bp.route("/cpu/rolling/<int:window>", methods=["GET"])
+def cpu_with_rolling(window):
+    """Return CPU values, dates, and rolling averages for a given window size."""
+    state = FEATURES.get()
+    if state.df is None or state.df.empty:
+        return jsonify({"error": "No data available"}), 404
+    return rolling_response("cpu", window)
+
 
 @features_bp.route("/storage/rolling/<int:window>", methods=["GET"])
 def storage_with_rolling(window):
     """Return storage values, dates, and rolling averages for a given window size."""
-    if df is None or df.empty:
+    state = FEATURES.get()
+    if state.df is None or state.df.empty:
         return jsonify({"error": "No data available"}), 404
-    temp_df = df.sort_values("date").copy()
+    return rolling_response("storage", window)
 
-    temp_df["rolling_avg"] = temp_df["storage_mean"].rolling(window=window).mean()
-
-    temp_df = temp_df.dropna(subset=["rolling_avg"])
-
-    result = {
-        "dates": temp_df["date"].dt.strftime("%Y-%m-%d").tolist(),
-        "values": temp_df["storage_mean"].round(2).tolist(),
-        "rolling_avg": temp_df["rolling_avg"].round(2).tolist(),
-    }
-
-    return jsonify(result)
-
-# ---------------------------------------------------------------
 
 @features_bp.route("/users/rolling/<int:window>", methods=["GET"])
 def users_with_rolling(window):
     """Return users values, dates, and rolling averages for a given window size."""
-    if df is None or df.empty:
+    state = FEATURES.get()
+    if state.df is None or state.df.empty:
         return jsonify({"error": "No data available"}), 404
-    temp_df = df.sort_values("date").copy()
+    return rolling_response("users", window)
 
-    temp_df["rolling_avg"] = temp_df["users_mean"].rolling(window=window).mean()
 
-    temp_df = temp_df.dropna(subset=["rolling_avg"])
+@features_bp.route("/cpu/rolling", methods=["GET"])
+def cpu_with_rolling_windows():
+    """Return CPU values with rolling mean/std for every window in ?windows=."""
+    state = FEATURES.get()
+    if state.df is None or state.df.empty:
+        return jsonify({"error": "No data available"}), 404
+    return multi_rolling_response("cpu")
 
-    result = {
-        "dates": temp_df["date"].dt.strftime("%Y-%m-%d").tolist(),
-        "values": temp_df["users_mean"].round(2).tolist(),
-        "rolling_avg": temp_df["rolling_avg"].round(2).tolist(),
-    }
 
-    return jsonify(result)
+@features_bp.route("/storage/rolling", methods=["GET"])
+def storage_with_rolling_windows():
+    """Return storage values with rolling mean/std for every window in ?windows=."""
+    state = FEATURES.get()
+    if state.df is None or state.df.empty:
+        return jsonify({"error": "No data available"}), 404
+    return multi_rolling_response("storage")
+
+
+@features_bp.route("/users/rolling", methods=["GET"])
+def users_with_rolling_windows():
+    """Return users values with rolling mean/std for every window in ?windows=."""
+    state = FEATURES.get()
+    if state.df is None or state.df.empty:
+        return jsonify({"error": "No data available"}), 404
+    return multi_rolling_response("users")
 
 
 # ---------------------------------------------------------------------------------------
@@ -1,30 +1,31 @@
-import os
 import pandas as pd
 from flask import Blueprint, jsonify
+from services.aggregate_store import AggregateStore
+from services.data_store import dataset_path
+from services.json_response import frame_response
+from services.conditional import conditional, snapshot_sources
 
 insights_bp = Blueprint("insights", __name__)
 
 # ---------- Load dataset ----------
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-file_path = os.path.join(BASE_DIR, "Data", "Processed", "insights.csv")
+file_path = dataset_path("insights")
 
-df = pd.read_csv(file_path)
-df["date"] = pd.to_datetime(df["date"])
+def load_insights(df):
+    return df.assign(month=df["date"].dt.to_period("M").astype(str))
 
 
-# ---------- Helpers ----------
-def safe_df(df):
-    """Ensure DataFrame is JSON serializable"""
-    df_copy = df.copy()
-
-    for col in df_copy.columns:
-        if pd.api.types.is_period_dtype(df_copy[col]):
-            df_copy[col] = df_copy[col].astype(str)
+# Every rollup below is built once per version of insights.csv; routes only look them up.
+# Ingested rows are published before the ingest returns, other changes within seconds.
+aggregates = AggregateStore("insights", load_insights)
+conditional(insights_bp, lambda: snapshot_sources(aggregates.snapshots))
 
-    if isinstance(df_copy.columns, pd.MultiIndex):
-        df_copy.columns = ["_".join([str(c) for c in col if c]) for col in df_copy.columns]
 
-    return df_copy.reset_index().to_dict(orient="records")
+# ---------- Helpers ----------
+def safe_df(df):
+    """Flat columns with the index moved into them; frame_response serializes the values directly"""
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.set_axis(["_".join([str(c) for c in col if c]) for col in df.columns], axis=1)
+    return df.reset_index()
 
 
 
@@ -37,20 +38,18 @@ def safe_value(val):
     return val
 
 
-# ---------- Routes ----------
+# ---------- Aggregates ----------
 
-# 1. Usage trends (avg CPU per region)
-@insights_bp.route("/usage-trends", methods=["GET"])
-def usage_trends():
-    trends = df.groupby("region")["usage_cpu"].mean().round(2).reset_index()
+@aggregates.aggregate("usage_trends")
+def build_usage_trends(df):
+    trends = df.groupby("region", observed=True)["usage_cpu"].mean().round(2).reset_index()
     return safe_df(trends)
 
 
-# 2. Top regions by demand
-@insights_bp.route("/top-regions", methods=["GET"])
-def top_regions():
+@aggregates.aggregate("top_regions")
+def build_top_regions(df):
     top = (
-        df.groupby("region")["usage_cpu"]
+        df.groupby("region", observed=True)["usage_cpu"]
         .sum()
         .reset_index()
         .sort_values(by="usage_cpu", ascending=False)
@@ -59,20 +58,16 @@ def top_regions():
     return safe_df(top)
 
 
-# 3. Peak demand per month
-@insights_bp.route("/peak-demand", methods=["GET"])
-def peak_demand():
-    df_copy = df.copy()
-    df_copy["month"] = df_copy["date"].dt.to_period("M").astype(str)
-    monthly = df_copy.groupby("month")["usage_cpu"].max().reset_index()
+@aggregates.aggregate("peak_demand")
+def build_peak_demand(df):
+    monthly = df.groupby("month")["usage_cpu"].max().reset_index()
     return safe_df(monthly)
 
 
-# 4. Regional comparison (flattened columns)
-@insights_bp.route("/regional-comparison", methods=["GET"])
-def regional_comparison():
+@aggregates.aggregate("regional_comparison")
+def build_regional_comparison(df):
     comparison = (
-        df.groupby("region")
+        df.groupby("region", observed=True)
         .agg({
             "usage_cpu": ["mean", "max", "std"],
             "usage_storage": ["mean", "max", "std"],
@@ -83,11 +78,10 @@ def regional_comparison():
     return safe_df(comparison)
 
 
-# 5. Holiday vs Non-holiday impact
-@insights_bp.route("/holiday-impact", methods=["GET"])
-def holiday_impact():
+@aggregates.aggregate("holiday_impact")
+def build_holiday_impact(df):
     if "holiday" not in df.columns:
-        return jsonify({"error": "holiday column not found in dataset"}), 400
+        return None
 
     holiday_stats = (
         df.groupby("holiday")
@@ -102,13 +96,10 @@ def holiday_impact():
     return safe_df(holiday_stats)
 
 
-# 6. Monthly trends
-@insights_bp.route("/monthly-trends", methods=["GET"])
-def monthly_trends():
-    df_copy = df.copy()
-    df_copy["month"] = df_copy["date"].dt.to_period("M").astype(str)
+@aggregates.aggregate("monthly_trends")
+def build_monthly_trends(df):
     monthly = (
-        df_copy.groupby(["month", "region", "resource_type"])
+        df.groupby(["month", "region", "resource_type"], observed=True)
         .agg({
             "usage_cpu": "mean",
             "usage_storage": "mean",
@@ -120,39 +111,36 @@ def monthly_trends():
     return safe_df(monthly)
 
 
-# 7. Insights summary
-@insights_bp.route("/insights", methods=["GET"])
-def insights():
-    summary = {
+@aggregates.aggregate("insights")
+def build_insights(df):
+    return {
         "avg_cpu_usage": safe_value(df["usage_cpu"].mean().round(2)),
         "peak_usage": safe_value(df["usage_cpu"].max()),
         "total_records": int(len(df)),
-        "top_region": str(df.groupby("region")["usage_cpu"].mean().idxmax())
+        "top_region": str(df.groupby("region", observed=True)["usage_cpu"].mean().idxmax())
     }
-    return jsonify(summary)
 
-# 8. Insights summary for storage
-@insights_bp.route("/insights-storage", methods=["GET"])
-def storage_insights():
-    summary = {
+
+@aggregates.aggregate("insights_storage")
+def build_storage_insights(df):
+    return {
         "avg_storage_usage": safe_value(df["usage_storage"].mean().round(2)),
         "peak_usage": safe_value(df["usage_storage"].max()),
         "total_records": int(len(df)),
-        "top_region": str(df.groupby("region")["usage_storage"].mean().idxmax())
+        "top_region": str(df.groupby("region", observed=True)["usage_storage"].mean().idxmax())
     }
-    return jsonify(summary)
 
-# 9. Usage trends (avg storage per region)
-@insights_bp.route("/usage-trends-storage", methods=["GET"])
-def storage_usage_trends():
-    trends = df.groupby("region")["usage_storage"].mean().round(2).reset_index()
+
+@aggregates.aggregate("usage_trends_storage")
+def build_storage_usage_trends(df):
+    trends = df.groupby("region", observed=True)["usage_storage"].mean().round(2).reset_index()
     return safe_df(trends)
 
-# 10. Top regions by storage demand
-@insights_bp.route("/top-regions-storage", methods=["GET"])
-def storage_top_regions():
+
+@aggregates.aggregate("top_regions_storage")
+def build_storage_top_regions(df):
     top = (
-        df.groupby("region")["usage_storage"]
+        df.groupby("region", observed=True)["usage_storage"]
         .sum()
         .reset_index()
         .sort_values(by="usage_storage", ascending=False)
@@ -161,26 +149,16 @@ def storage_top_regions():
     return safe_df(top)
 
 
-# 11. Peak storage demand per month
-@insights_bp.route("/peak-demand-storage", methods=["GET"])
-def storage_peak_demand():
-    df_copy = df.copy()
-    df_copy["month"] = df_copy["date"].dt.to_period("M").astype(str)
-    monthly = df_copy.groupby("month")["usage_storage"].max().reset_index()
+@aggregates.aggregate("peak_demand_storage")
+def build_storage_peak_demand(df):
+    monthly = df.groupby("month")["usage_storage"].max().reset_index()
     return safe_df(monthly)
 
 
-
-#-----------------------------milestone - 2 -----------------------------------------------------
-
-
-
-
-# 12. Top regions by efficiency
-@insights_bp.route("/top-regions-efficiency", methods=["GET"])
-def top_regions_efficiency():
+@aggregates.aggregate("top_regions_efficiency")
+def build_top_regions_efficiency(df):
     top = (
-        df.groupby("region")["storage_efficiency"]
+        df.groupby("region", observed=True)["storage_efficiency"]
         .mean().round(2)
         .reset_index()
         .sort_values(by="storage_efficiency", ascending=False)
@@ -189,20 +167,16 @@ def top_regions_efficiency():
     return safe_df(top)
 
 
-# 13. Peak efficiency per month
-@insights_bp.route("/peak-efficiency", methods=["GET"])
-def peak_efficiency():
-    df_copy = df.copy()
-    df_copy["month"] = df_copy["date"].dt.to_period("M").astype(str)
-    monthly = df_copy.groupby("month")["storage_efficiency"].max().reset_index()
+@aggregates.aggregate("peak_efficiency")
+def build_peak_efficiency(df):
+    monthly = df.groupby("month")["storage_efficiency"].max().reset_index()
     return safe_df(monthly)
 
 
-# 14. Regional comparison including efficiency
-@insights_bp.route("/regional-comparison-efficiency", methods=["GET"])
-def regional_comparison_efficiency():
+@aggregates.aggregate("regional_comparison_efficiency")
+def build_regional_comparison_efficiency(df):
     comparison = (
-        df.groupby("region")
+        df.groupby("region", observed=True)
         .agg({
             "storage_efficiency": ["mean", "max", "std"],
             "usage_storage": ["mean", "max", "std"]
@@ -212,11 +186,10 @@ def regional_comparison_efficiency():
     return safe_df(comparison)
 
 
-# 15. Holiday vs Non-holiday efficiency impact
-@insights_bp.route("/holiday-efficiency-impact", methods=["GET"])
-def holiday_efficiency_impact():
+@aggregates.aggregate("holiday_efficiency_impact")
+def build_holiday_efficiency_impact(df):
     if "holiday" not in df.columns:
-        return jsonify({"error": "holiday column not found in dataset"}), 400
+        return None
 
     holiday_stats = (
         df.groupby("holiday")
@@ -228,3 +201,107 @@ def holiday_efficiency_impact():
     )
     return safe_df(holiday_stats)
 
+
+aggregates.refresh()
+
+
+# ---------- Routes ----------
+
+# 1. Usage trends (avg CPU per region)
+@insights_bp.route("/usage-trends", methods=["GET"])
+def usage_trends():
+    return frame_response(aggregates.get("usage_trends"))
+
+
+# 2. Top regions by demand
+@insights_bp.route("/top-regions", methods=["GET"])
+def top_regions():
+    return frame_response(aggregates.get("top_regions"))
+
+
+# 3. Peak demand per month
+@insights_bp.route("/peak-demand", methods=["GET"])
+def peak_demand():
+    return frame_response(aggregates.get("peak_demand"))
+
+
+# 4. Regional comparison (flattened columns)
+@insights_bp.route("/regional-comparison", methods=["GET"])
+def regional_comparison():
+    return frame_response(aggregates.get("regional_comparison"))
+
+
+# 5. Holiday vs Non-holiday impact
+@insights_bp.route("/holiday-impact", methods=["GET"])
+def holiday_impact():
+    holiday_stats = aggregates.get("holiday_impact")
+    if holiday_stats is None:
+        return jsonify({"error": "holiday column not found in dataset"}), 400
+    return frame_response(holiday_stats)
+
+
+# 6. Monthly trends
+@insights_bp.route("/monthly-trends", methods=["GET"])
+def monthly_trends():
+    return frame_response(aggregates.get("monthly_trends"))
+
+
+# 7. Insights summary
+@insights_bp.route("/insights", methods=["GET"])
+def insights():
+    return jsonify(aggregates.get("insights"))
+
+# 8. Insights summary for storage
+@insights_bp.route("/insights-storage", methods=["GET"])
+def storage_insights():
+    return jsonify(aggregates.get("insights_storage"))
+
+# 9. Usage trends (avg storage per region)
+@insights_bp.route("/usage-trends-storage", methods=["GET"])
+def storage_usage_trends():
+    return frame_response(aggregates.get("usage_trends_storage"))
+
+# 10. Top regions by storage demand
+@insights_bp.route("/top-regions-storage", methods=["GET"])
+def storage_top_regions():
+    return frame_response(aggregates.get("top_regions_storage"))
+
+
+# 11. Peak storage demand per month
+@insights_bp.route("/peak-demand-storage", methods=["GET"])
+def storage_peak_demand():
+    return frame_response(aggregates.get("peak_demand_storage"))
+
+
+
+#-----------------------------milestone - 2 -----------------------------------------------------
+
+
+
+
+# 12. Top regions by efficiency
+@insights_bp.route("/top-regions-efficiency", methods=["GET"])
+def top_regions_efficiency():
+    return frame_response(aggregates.get("top_regions_efficiency"))
+
+
+# 13. Peak efficiency per month
+@insights_bp.route("/peak-efficiency", methods=["GET"])
+def peak_efficiency():
+    return frame_response(aggregates.get("peak_efficiency"))
+
+
+# 14. Regional comparison including efficiency
+@insights_bp.route("/regional-comparison-efficiency", methods=["GET"])
+def regional_comparison_efficiency():
+    return frame_response(aggregates.get("regional_comparison_efficiency"))
+
+
+# 15. Holiday vs Non-holiday efficiency impact
+@insights_bp.route("/holiday-efficiency-impact", methods=["GET"])
+def holiday_efficiency_impact():
+    holiday_stats = aggregates.get("holiday_efficiency_impact")
+    if holiday_stats is None:
+        return jsonify({"error": "holiday column not found in dataset"}), 400
+    return frame_response(holiday_stats)
+
@@ -2,185 +2,348 @@ import os
 import pandas as pd
 from flask import Blueprint, jsonify, request
 import joblib
-from datetime import timedelta, datetime
+from datetime import datetime
 import numpy as np
 import requests
 from flask import request, jsonify
 import pickle
-from sklearn.base import clone
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 import shutil
+from services.forecast_engine import RecursiveForecaster, BatchRecursiveForecaster, get_feature_cols
+from services.forecast_cache import ForecastCache, dataset_fingerprint
+from services.data_store import dataset_path
+from services.model_registry import ModelRegistry
+from services.retraining import retrain_targets, plan_retrain, training_cutoff, default_workers, default_threads
+from services.retrain_jobs import RetrainJobQueue
+from services.backtest import backtest, WINDOWS
+from services.tree_compiler import compile_model, validate
+from services.recurrent import load_keras_h5, SequenceForecaster
+from services.direct_forecast import DirectForecaster, bundle_path, is_current, model_file_stamp, save_bundle, train_direct_model
+from services.feature_matrix import FeatureMatrix
+from services.date_index import DateIndex
+from services.metrics import timed
+from services.snapshots import SnapshotHolder
+from services.conditional import conditional, file_sources, registry_sources, snapshot_sources
 
 model_bp = Blueprint("models", __name__)
 
 # ---------- Load dataset ----------
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-file_path_cpu = os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv")
+file_path_cpu = dataset_path("enhanced_features")
 
 model_cpu_path = os.path.join(BASE_DIR, "backend", "models","backtested_models", "usage_cpu_best_model.pkl")
 model_storage_path = os.path.join(BASE_DIR, "backend", "models", "backtested_models", "usage_storage_best_model.pkl")
 model_users_path = os.path.join(BASE_DIR, "backend", "models", "backtested_models", "users_active_best_model.pkl")
 
-encoded_insights = pd.read_csv(file_path_cpu)
+
+def build_model_data(frames):
+    """Everything the model routes read, derived from one version of enhanced_features."""
+    frame = frames["enhanced_features"]
+    return {
+        "encoded_insights": frame,
+        # Features as one float32 matrix with a date index; prediction windows are slices of it
+        "feature_matrix": FeatureMatrix(frame),
+        "fingerprint": dataset_fingerprint(frame),
+    }
+
+
+# Requests pin one version for their whole duration; a changed or appended CSV publishes
+# the next one (with its own fingerprint, so cached results are re-keyed) without a restart
+MODEL_DATA = SnapshotHolder("model-data", ["enhanced_features"], build_model_data)
+MODEL_DATA.reload()
 
 # ---------- Load Models ----------
-model_cpu = joblib.load(model_cpu_path)
-model_storage = joblib.load(model_storage_path)
-model_users = joblib.load(model_users_path)
+# Batches up to this many rows (e.g. a batched regional forecast step) use the compiled
+# predictor; larger ones (Monte Carlo paths) are faster through the model's own predict.
+COMPILED_MAX_ROWS = int(os.environ.get("COMPILED_MAX_ROWS", 128))
+
+
+def compile_for_serving(model):
+    """
+    Compile a tree ensemble into flat node arrays for forecasting.
+
+    The compiled predictor is only used if it reproduces `model.predict` on
+    the training features within tolerance; otherwise (or for unsupported
+    models) None is returned and the original model keeps serving.
+    """
+    data = MODEL_DATA.get()
+    # Any export failure (unsupported model, library version) leaves the native model serving
+    try:
+        compiled = compile_model(model, max_rows=COMPILED_MAX_ROWS)
+        max_diff, ok = validate(compiled, model, data.encoded_insights[get_feature_cols(data.encoded_insights.columns)])
+    except Exception as e:
+        print(f"Model not compiled: {str(e)}")
+        return None
+    if not ok:
+        print(f"Compiled {type(model).__name__} differs from predict by {max_diff}; keeping the original model")
+        return None
+    return compiled
+
+
+# Models are deserialized lazily on first use; set PRELOAD_MODELS=1 to load them at import
+# (e.g. in a gunicorn --preload master so forked workers share the pages).
+# Forecasts run on compiled tree ensembles unless COMPILE_MODELS=0.
+MODEL_REGISTRY = ModelRegistry(
+    mmap_mode="r",
+    compiler=compile_for_serving if os.environ.get("COMPILE_MODELS", "1") == "1" else None
+)
+MODEL_REGISTRY.register("usage_cpu", model_cpu_path)
+MODEL_REGISTRY.register("usage_storage", model_storage_path)
+MODEL_REGISTRY.register("users_active", model_users_path)
+
+if os.environ.get("PRELOAD_MODELS", "0") == "1":
+    MODEL_REGISTRY.preload()
 
 
 # ---------- Helper Function ----------
+
 def predict_for_march(model, target_col):
     """Generalized predictor for March data"""
-    encoded_insights["date"] = pd.to_datetime(encoded_insights["date"])
-    march_data = encoded_insights[encoded_insights["date"].dt.month == 3].copy()
-
-    if march_data.empty:
+    data = MODEL_DATA.get()
+    positions = data.feature_matrix.month(3)
+    if len(positions) == 0:
         return None
 
-    feature_cols = [
-        col
-        for col in march_data.columns
-        if col not in ["date", "usage_cpu", "usage_storage", "users_active", "unique_id"]
+    columns = data.feature_matrix.predict(model, target_col, positions)
+    return [
+        {"date": date, "actual": actual, "predicted": predicted}
+        for date, actual, predicted in zip(columns["date"], columns["actual"], columns["predicted"])
     ]
 
-    X = march_data[feature_cols]
-    y_actual = march_data[target_col].values
-    y_pred = model.predict(X)
+# ---------- Routes ----------
+@model_bp.route("/predict", methods=["GET"])
+def predict_range():
+    """
+    Model predictions against actuals for ?target=&from=&to=&region= (all optional but target).
+
+    Returns columnar lists (date, unique_id, region, actual, predicted) in
+    date order, memoized per model version and window.
+    """
+    data = MODEL_DATA.get()
+    target_col = request.args.get("target", type=str)
+    region = request.args.get("region", type=int)
+    targets = [config["target"] for config in SERVICE_MAP.values()]
+    if target_col not in targets:
+        return jsonify({"error": f"Invalid target '{target_col}'. Must be one of {targets}"}), 400
+
+    bounds = {}
+    for param in ["from", "to"]:
+        value = request.args.get(param)
+        bounds[param] = DateIndex.parse(value) if value is not None else None
+        if value is not None and bounds[param] is None:
+            return jsonify({"error": f"Invalid '{param}' date '{value}'. Use YYYY-MM-DD"}), 400
+    if bounds["from"] is not None and bounds["to"] is not None and bounds["from"] > bounds["to"]:
+        return jsonify({"error": "'from' must not be after 'to'"}), 400
+
+    key = (target_col, "predict", str(bounds["from"]), str(bounds["to"]), region,
+           MODEL_REGISTRY.version(target_col), data.fingerprint)
+
+    def compute():
+        positions = data.feature_matrix.window(bounds["from"], bounds["to"], region)
+        return len(positions), data.feature_matrix.predict(MODEL_REGISTRY.get(target_col), target_col, positions)
+
+    count, columns = PREDICTION_CACHE.get_or_compute(key, compute)
+    if count == 0:
+        return jsonify({"error": "No data available for the requested window"}), 404
 
-    results = []
-    for date, actual, pred in zip(march_data["date"], y_actual, y_pred):
-        results.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "actual": float(actual),
-            "predicted": float(pred)
-        })
+    return jsonify({
+        "target": target_col,
+        "from": columns["date"][0],
+        "to": columns["date"][-1],
+        "region": region,
+        "count": count,
+        "model_version": MODEL_REGISTRY.version(target_col),
+        "columns": columns
+    })
 
-    return results
 
-# ---------- Routes ----------
 @model_bp.route("/predict/march/cpu", methods=["GET"])
 def predict_cpu_march():
-    results = predict_for_march(model_cpu, "usage_cpu")
+    results = predict_for_march(MODEL_REGISTRY.get("usage_cpu"), "usage_cpu")
     if results is None:
         return jsonify({"error": "No data available for March"}), 404
     return jsonify(results)
 
 @model_bp.route("/predict/march/storage", methods=["GET"])
 def predict_storage_march():
-    results = predict_for_march(model_storage, "usage_storage")
+    results = predict_for_march(MODEL_REGISTRY.get("usage_storage"), "usage_storage")
     if results is None:
         return jsonify({"error": "No data available for March"}), 404
     return jsonify(results)
 
 @model_bp.route("/predict/march/users", methods=["GET"])
 def predict_users_march():
-    results = predict_for_march(model_users, "users_active")
+    results = predict_for_march(MODEL_REGISTRY.get("users_active"), "users_active")
     if results is None:
         return jsonify({"error": "No data available for March"}), 404
     return jsonify(results)
 
-def forecast_next_30_days(model, target_col, df, variability_factor=0.25, seed=42):
-
-
-    np.random.seed(seed)  
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"])
-    hist_df = df.copy()
-    last_date = hist_df["date"].max()
-    forecasts = []
-
-    z_score = 1.96  
-
-    for i in range(30):  
-        next_date = last_date + timedelta(days=i + 1)
-        new_row = hist_df.iloc[-1:].copy()
-        new_row["date"] = next_date
-        new_row["month"] = next_date.month
-        new_row["dayofweek"] = next_date.dayofweek
-        new_row["dayofmonth"] = next_date.day
-        new_row["quarter"] = (next_date.month - 1) // 3 + 1
-        new_row["is_weekend"] = 1 if next_date.weekday() >= 5 else 0
-
-        for lag in [1, 7, 14]:
-            if len(hist_df) >= lag:
-                prev_val = hist_df[target_col].iloc[-lag]
-                pct_change = np.random.normal(0, variability_factor)
-                new_row[f"{target_col}_lag_{lag}"] = prev_val * (1 + pct_change)
-            else:
-                new_row[f"{target_col}_lag_{lag}"] = hist_df[target_col].mean()
-
-        for win in [7, 14]:
-            if len(hist_df) >= win:
-                prev_window = hist_df[target_col].iloc[-win:]
-                pct_changes = np.random.normal(0, variability_factor, size=win)
-                adjusted_window = prev_window * (1 + pct_changes)
-                new_row[f"{target_col}_roll_mean_{win}"] = adjusted_window.mean()
-                new_row[f"{target_col}_roll_std_{win}"] = adjusted_window.std(ddof=0)
-            else:
-                new_row[f"{target_col}_roll_mean_{win}"] = hist_df[target_col].mean()
-                new_row[f"{target_col}_roll_std_{win}"] = hist_df[target_col].std(ddof=0)
+def forecast_next_30_days(model, target_col, df, variability_factor=0.25, seed=42, horizon=30):
+    """Seeded recursive forecast for the next `horizon` days (30 by default)."""
+    forecaster = RecursiveForecaster(model, target_col, df)
+    return forecaster.forecast(horizon=horizon, variability_factor=variability_factor, seed=seed)
 
-        feature_cols = [col for col in hist_df.columns if col not in ["date", "usage_cpu", "usage_storage", "users_active", "unique_id"]]
-        X_next = new_row[feature_cols]
 
-        pred = model.predict(X_next)[0]
+# ---------- Forecast cache ----------
+# Seeded forecasts are deterministic for a given model and dataset, so results are
+# cached per (target, region, horizon, variability, seed, model version, data fingerprint).
+FORECAST_CACHE = ForecastCache(maxsize=256, ttl_seconds=3600)
+MODEL_REGISTRY.on_swap(FORECAST_CACHE.invalidate)
+# /predict windows, keyed the same way (target first) so a model swap drops them too
+PREDICTION_CACHE = ForecastCache(maxsize=512, ttl_seconds=3600)
+MODEL_REGISTRY.on_swap(PREDICTION_CACHE.invalidate)
 
-        std_dev = new_row[[f"{target_col}_roll_std_7", f"{target_col}_roll_std_14"]].mean(axis=1).values[0]
 
+# Entries keyed by an older fingerprint can never be hit again
+MODEL_DATA.on_swap(lambda snapshot: (FORECAST_CACHE.invalidate(), PREDICTION_CACHE.invalidate()))
 
-        lower = pred - z_score * std_dev
-        upper = pred + z_score * std_dev
 
-        if target_col == "usage_cpu":
-            upper = min(upper, 100)
-        lower = max(lower, 0)
+def forecast_cache_key(target_col, region, horizon, variability_factor=0.25, seed=42, variant=None):
+    data = MODEL_DATA.get()
+    key = (target_col, region, horizon, variability_factor, seed, MODEL_REGISTRY.version(target_col), data.fingerprint)
+    return key if variant is None else key + (variant,)
 
-        forecasts.append({
-            "date": next_date.strftime("%Y-%m-%d"),
-            "predicted": float(pred),
-            "lower_95": float(lower),
-            "upper_95": float(upper)
-        })
 
-        new_row[target_col] = pred
-        hist_df = pd.concat([hist_df, new_row], ignore_index=True)
+def cached_forecast(target_col, df, region, horizon=30, variability_factor=0.25, seed=42):
+    """forecast_next_30_days with the registry's model, through FORECAST_CACHE; `df` must be the history for `region`."""
+    key = forecast_cache_key(target_col, region, horizon, variability_factor, seed)
+    return FORECAST_CACHE.get_or_compute(
+        key,
+        lambda: forecast_next_30_days(
+            MODEL_REGISTRY.predictor(target_col), target_col, df,
+            variability_factor=variability_factor, seed=seed, horizon=horizon
+        )
+    )
 
-    return forecasts
 
 @model_bp.route("/forecast/cpu", methods=["GET"])
 def forecast_cpu():
-    results = forecast_next_30_days(model_cpu, "usage_cpu", encoded_insights, variability_factor=0.25)
+    data = MODEL_DATA.get()
+    results = cached_forecast("usage_cpu", data.encoded_insights, None, variability_factor=0.25)
     return jsonify(results)
 
 @model_bp.route("/forecast/storage", methods=["GET"])
 def forecast_storage():
-    results = forecast_next_30_days(model_storage, "usage_storage", encoded_insights, variability_factor=0.25)
+    data = MODEL_DATA.get()
+    results = cached_forecast("usage_storage", data.encoded_insights, None, variability_factor=0.25)
     return jsonify(results)
 
 @model_bp.route("/forecast/users", methods=["GET"])
 def forecast_users():
-    results = forecast_next_30_days(model_users, "users_active", encoded_insights, variability_factor=0.25)
+    data = MODEL_DATA.get()
+    results = cached_forecast("users_active", data.encoded_insights, None, variability_factor=0.25)
     return jsonify(results)
 
+# Models are looked up in MODEL_REGISTRY by target so swaps are seen everywhere
 SERVICE_MAP = {
-    "compute": {"model": model_cpu, "target": "usage_cpu"},
-    "storage": {"model": model_storage, "target": "usage_storage"},
-    "users": {"model": model_users, "target": "users_active"}
+    "compute": {"target": "usage_cpu"},
+    "storage": {"target": "usage_storage"},
+    "users": {"target": "users_active"}
 }
 
+# ---------- Sequence models ----------
+# LSTM/GRU networks from Model/models are served with a NumPy forward pass (no TensorFlow);
+# /forecast?model=lstm|gru picks one for the services that have it.
+SEQUENCE_MODEL_DIR = os.path.join(BASE_DIR, "Model", "models")
+SEQUENCE_MODELS = ModelRegistry()
+for config in SERVICE_MAP.values():
+    config["models"] = ["tree"]
+    for kind in ["LSTM", "GRU"]:
+        sequence_model_path = os.path.join(SEQUENCE_MODEL_DIR, f"{kind}_GridSearch_{config['target']}.h5")
+        if os.path.exists(sequence_model_path):
+            SEQUENCE_MODELS.register(f"{config['target']}/{kind.lower()}", sequence_model_path, loader=load_keras_h5)
+            config["models"].append(kind.lower())
+
+# ---------- Direct multi-horizon models ----------
+# One horizon-conditioned model per target (/forecast?strategy=direct), trained from the serving
+# model's hyperparameters. Requests never train: bundles come from `python -m services.direct_forecast`
+# or from a DIRECT_JOBS job, submitted when a serving model is swapped or new data arrives.
+DIRECT_MODELS = ModelRegistry()
+for config in SERVICE_MAP.values():
+    DIRECT_MODELS.register(config["target"], bundle_path(config["target"]))
+DIRECT_MODELS.on_swap(FORECAST_CACHE.invalidate)
+
+
+def run_direct_job(job, progress):
+    """Train and save the direct model of every target from its serving model and the current data."""
+    data = MODEL_DATA.get()
+    for target in job["targets"]:
+        progress(target, status="running")
+        path = bundle_path(target)
+        base_stamp = model_file_stamp(MODEL_REGISTRY.stamp(target)[0])
+        try:
+            # Another worker may already have written a bundle for this model and data
+            if os.path.exists(path) and is_current(joblib.load(path), data.encoded_insights, base_stamp):
+                progress(target, status="completed", reason="Saved direct model is up to date")
+            else:
+                bundle = train_direct_model(MODEL_REGISTRY.get(target), target, data.encoded_insights)
+                bundle["base_model"] = base_stamp
+                save_bundle(bundle, path)
+                progress(target, status="completed", seconds=bundle["train_seconds"],
+                         metrics=bundle["holdout_metrics"], train_pairs=bundle["train_pairs"])
+            DIRECT_MODELS.reload_if_changed(target)
+        except Exception as e:
+            print(f"Error training direct model for {target}: {str(e)}")
+            progress(target, status="failed", error=str(e))
+
+
+DIRECT_JOBS = RetrainJobQueue(run_direct_job)
+
+
+# A switched model changes the hyperparameters; a new data version extends the training pairs.
+# Only bundles that were already trained are refreshed; the rest wait for /forecast/direct/train.
+def retrain_stale_direct_models(targets):
+    trained = [target for target in targets if os.path.exists(bundle_path(target))]
+    if trained:
+        DIRECT_JOBS.submit(trained)
+
+
+def retrain_direct_models_on_new_data(snapshot):
+    if snapshot.version > 1:
+        retrain_stale_direct_models(DIRECT_MODELS.targets())
+
+
+MODEL_REGISTRY.on_swap(lambda target: retrain_stale_direct_models([target]))
+MODEL_DATA.on_swap(retrain_direct_models_on_new_data)
+STRATEGIES = ["recursive", "direct"]
+
+# ---------- Conditional GET ----------
+# Responses depend on the pinned data snapshot, the served model files and the metrics CSV;
+# job status, retrain state and cache/registry stats live in memory and are always recomputed.
+conditional(
+    model_bp,
+    lambda: (
+        snapshot_sources(MODEL_DATA) + registry_sources(MODEL_REGISTRY) + registry_sources(SEQUENCE_MODELS)
+        + registry_sources(DIRECT_MODELS) + file_sources(os.path.join(BASE_DIR, "Model", "results", "top_models_summary.csv"))
+    ),
+    exclude=["forecast_cache_stats", "model_registry_stats", "list_retrain_jobs", "get_retrain_job",
+             "check_retrain_status", "compare_models", "get_backtest_job", "get_direct_job"],
+)
+
 LAST_TRAINING_DATES = {
     "usage_cpu": datetime(2023, 5, 30),     # Models were trained with data up to March 30
     "usage_storage": datetime(2023, 5, 30),  # Setting last training to May 30 as discussed  
     "users_active": datetime(2023, 5, 30)
 }
 
+# What each target's latest model has been fit on, for incremental retraining:
+# the last training date, the data date of the last full refit, the warm-start
+# updates since then, and the latest retrained model (None: the serving one).
+# The served models were fit on the training split of the data they shipped with,
+# so the split's last date of the data at startup is where they left off.
+TRAINING_STATE = {}
+for target in LAST_TRAINING_DATES:
+    trained = training_cutoff(MODEL_DATA.get().encoded_insights, target)
+    TRAINING_STATE[target] = {"trained_through": trained, "last_full_refit": trained, "incremental_updates": 0, "model": None}
+
 @model_bp.route("/forecast", methods=["GET"])
 def forecast():
+    data = MODEL_DATA.get()
 
     region = request.args.get("region", type=int)
     service = request.args.get("service", type=str)
     horizon = request.args.get("horizon", default=30, type=int)
+    model_name = request.args.get("model", default="tree", type=str)
+    strategy = request.args.get("strategy", default="recursive", type=str)
 
     if service not in SERVICE_MAP:
         return jsonify({"error": f"Invalid service '{service}'. Must be one of {list(SERVICE_MAP.keys())}"}), 400
@@ -188,23 +351,74 @@ def forecast():
     if horizon not in [7, 14, 30]:
         return jsonify({"error": f"Invalid horizon '{horizon}'. Must be 7, 14, or 30"}), 400
 
+    if model_name not in SERVICE_MAP[service]["models"]:
+        return jsonify({"error": f"Invalid model '{model_name}'. Must be one of {SERVICE_MAP[service]['models']}"}), 400
+
+    if strategy not in STRATEGIES:
+        return jsonify({"error": f"Invalid strategy '{strategy}'. Must be one of {STRATEGIES}"}), 400
+
+    if strategy == "direct" and model_name != "tree":
+        return jsonify({"error": "strategy=direct is only available for the tree models"}), 400
+
     if region is not None:
-        df_region = encoded_insights[encoded_insights["region_encoded"] == region].copy()
+        df_region = data.encoded_insights[data.encoded_insights["region_encoded"] == region].copy()
         if df_region.empty:
             return jsonify({"error": f"No data found for region '{region}'"}), 404
     else:
-        df_region = encoded_insights.copy()
+        df_region = data.encoded_insights.copy()
 
-    model = SERVICE_MAP[service]["model"]
     target_col = SERVICE_MAP[service]["target"]
 
-    results = forecast_next_30_days(model, target_col, df_region, variability_factor=0.25)
-    results = results[:horizon]
-
+    if strategy == "direct":
+        if not os.path.exists(bundle_path(target_col)):
+            return direct_model_missing(target_col)
+        DIRECT_MODELS.reload_if_changed(target_col)
+        key = forecast_cache_key(target_col, region, horizon,
+                                 variant=("strategy", strategy, DIRECT_MODELS.version(target_col)))
+        results = FORECAST_CACHE.get_or_compute(
+            key,
+            lambda: DirectForecaster(DIRECT_MODELS.get(target_col), target_col, df_region).forecast(horizon=horizon)
+        )
+    elif model_name == "tree":
+        results = cached_forecast(target_col, df_region, region, horizon=horizon, variability_factor=0.25)
+    else:
+        key = forecast_cache_key(target_col, region, horizon, variant=("model", model_name))
+        try:
+            results = FORECAST_CACHE.get_or_compute(
+                key,
+                lambda: SequenceForecaster(
+                    SEQUENCE_MODELS.get(f"{target_col}/{model_name}"), target_col, df_region
+                ).forecast(horizon=horizon)
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    payload = summarize_forecast(results, df_region, region, service, target_col, horizon)
+    payload["model"] = model_name
+    payload["strategy"] = strategy
+    return jsonify(payload)
+
+
+def direct_model_missing(target_col):
+    """503 for strategy=direct before the target's bundle exists, pointing at its training job if any."""
+    response = {
+        "error": f"Direct model for '{target_col}' is not trained yet",
+        "train": "POST /api/models/forecast/direct/train or python -m services.direct_forecast",
+    }
+    job_id = DIRECT_JOBS.active().get(target_col)
+    if job_id is not None:
+        response["job_id"] = job_id
+        response["status_url"] = f"/api/models/forecast/direct/jobs/{job_id}"
+    return jsonify(response), 503
+
+
+def summarize_forecast(results, df_region, region, service, target_col, horizon):
+    """Forecast payload with totals compared against the previous `horizon` days."""
     pred_values = [item["predicted"] for item in results]
 
     df_region_sorted = df_region.sort_values("date")
-    df_daily = df_region_sorted.groupby("date")[target_col].mean().reset_index()
+    with timed("groupby"):
+        df_daily = df_region_sorted.groupby("date")[target_col].mean().reset_index()
 
     prev_values = df_daily[target_col].iloc[-horizon:] if len(df_daily) >= horizon else df_daily[target_col]
     
@@ -217,7 +431,7 @@ def forecast():
     recommended_adjustment = forecast_sum - prev_sum
     adjustment_percent = (recommended_adjustment / prev_sum * 100) if prev_sum > 0 else 0.0
 
-    return jsonify({
+    return {
         "region": region,
         "service": service,
         "horizon": horizon,
@@ -228,12 +442,175 @@ def forecast():
         "previous_sum": round(prev_sum,2),
         "recommended_adjustment": round(recommended_adjustment,2),
         "adjustment_percent": round(adjustment_percent, 2)
+    }
+
+
+@model_bp.route("/forecast/batch", methods=["GET"])
+def forecast_batch():
+    """
+    Forecast several services for several regions in one pass.
+    Example: /api/models/forecast/batch?service=compute,storage,users&region=all&horizon=30
+    Every region of a service is advanced together, one `predict` call on N rows per step.
+    """
+    data = MODEL_DATA.get()
+    services = [s.strip() for s in request.args.get("service", default="compute,storage,users", type=str).split(",") if s.strip()]
+    region_arg = request.args.get("region", default="all", type=str)
+    horizon = request.args.get("horizon", default=30, type=int)
+
+    invalid = [s for s in services if s not in SERVICE_MAP]
+    if not services or invalid:
+        return jsonify({"error": f"Invalid service '{','.join(invalid)}'. Must be one of {list(SERVICE_MAP.keys())}"}), 400
+
+    if horizon not in [7, 14, 30]:
+        return jsonify({"error": f"Invalid horizon '{horizon}'. Must be 7, 14, or 30"}), 400
+
+    if region_arg == "all":
+        regions = sorted(int(r) for r in data.encoded_insights["region_encoded"].unique())
+    else:
+        try:
+            regions = [int(r) for r in region_arg.split(",") if r.strip()]
+        except ValueError:
+            return jsonify({"error": f"Invalid region '{region_arg}'. Must be 'all' or comma-separated region ids"}), 400
+
+    with timed("groupby"):
+        region_frames = dict(tuple(data.encoded_insights.groupby("region_encoded", sort=False)))
+    missing = [r for r in regions if r not in region_frames]
+    if missing or not regions:
+        return jsonify({"error": f"No data found for region '{','.join(map(str, missing))}'"}), 404
+
+    dfs = [region_frames[r] for r in regions]
+    results = {}
+    for service in services:
+        target_col = SERVICE_MAP[service]["target"]
+
+        keys = [forecast_cache_key(target_col, region, horizon) for region in regions]
+        region_forecasts = [FORECAST_CACHE.get(key) for key in keys]
+
+        # Only the regions missing from the cache are advanced through the batch forecaster
+        pending = [i for i, cached in enumerate(region_forecasts) if cached is None]
+        if pending:
+            forecaster = BatchRecursiveForecaster(MODEL_REGISTRY.predictor(target_col), target_col, [dfs[i] for i in pending])
+            for i, forecasts in zip(pending, forecaster.forecast(horizon=horizon, variability_factor=0.25)):
+                FORECAST_CACHE.set(keys[i], forecasts)
+                region_forecasts[i] = forecasts
+
+        results[service] = [
+            summarize_forecast(forecasts, df_region, region, service, target_col, horizon)
+            for region, df_region, forecasts in zip(regions, dfs, region_forecasts)
+        ]
+
+    return jsonify({
+        "horizon": horizon,
+        "services": services,
+        "regions": regions,
+        "results": results
+    })
+
+
+
+MAX_PATHS = 10000
+
+
+@model_bp.route("/forecast/probabilistic", methods=["GET"])
+def forecast_probabilistic():
+    """
+    Monte Carlo forecast with empirical prediction intervals.
+    Example: /api/models/forecast/probabilistic?service=compute&region=0&horizon=30&paths=1000&quantiles=5,50,95
+    All `paths` noise paths are simulated together, one batched `predict` per day.
+    """
+    data = MODEL_DATA.get()
+    region = request.args.get("region", type=int)
+    service = request.args.get("service", type=str)
+    horizon = request.args.get("horizon", default=30, type=int)
+    paths = request.args.get("paths", default=1000, type=int)
+    seed = request.args.get("seed", default=42, type=int)
+
+    if service not in SERVICE_MAP:
+        return jsonify({"error": f"Invalid service '{service}'. Must be one of {list(SERVICE_MAP.keys())}"}), 400
+
+    if horizon not in [7, 14, 30]:
+        return jsonify({"error": f"Invalid horizon '{horizon}'. Must be 7, 14, or 30"}), 400
+
+    if paths is None or not 1 <= paths <= MAX_PATHS:
+        return jsonify({"error": f"Invalid paths. Must be between 1 and {MAX_PATHS}"}), 400
+
+    try:
+        quantiles = tuple(float(q) for q in request.args.get("quantiles", "5,50,95").split(","))
+    except ValueError:
+        quantiles = ()
+    if not quantiles or any(not 0 <= q <= 100 for q in quantiles):
+        return jsonify({"error": "Invalid quantiles. Must be comma-separated percentiles between 0 and 100"}), 400
+
+    if region is not None:
+        df_region = data.encoded_insights[data.encoded_insights["region_encoded"] == region]
+        if df_region.empty:
+            return jsonify({"error": f"No data found for region '{region}'"}), 404
+    else:
+        df_region = data.encoded_insights
+
+    target_col = SERVICE_MAP[service]["target"]
+    key = forecast_cache_key(target_col, region, horizon, 0.25, seed, variant=("paths", paths, quantiles))
+    results = FORECAST_CACHE.get_or_compute(
+        key,
+        lambda: RecursiveForecaster(MODEL_REGISTRY.predictor(target_col), target_col, df_region).simulate(
+            paths=paths, horizon=horizon, variability_factor=0.25, seed=seed, quantiles=quantiles
+        )
+    )
+
+    return jsonify({
+        "region": region,
+        "service": service,
+        "horizon": horizon,
+        "paths": paths,
+        "quantiles": [f"p{q:g}" for q in quantiles],
+        "forecasts": results
     })
 
 
+@model_bp.route("/forecast/cache", methods=["GET"])
+def forecast_cache_stats():
+    """Hit/miss counters and size of the forecast result cache."""
+    return jsonify(FORECAST_CACHE.stats())
+
+
+@model_bp.route("/registry", methods=["GET"])
+def model_registry_stats():
+    """Load state, version, load time and memory of every registered model."""
+    return jsonify(MODEL_REGISTRY.stats())
+
+
+def direct_job_response(job):
+    view = DIRECT_JOBS.describe(job)
+    view["status_url"] = f"/api/models/forecast/direct/jobs/{job['id']}"
+    return view
+
+
+@model_bp.route("/forecast/direct/train", methods=["POST"])
+def train_direct_models():
+    """Queue training of the direct models (?service=compute,storage by default all) from the serving models."""
+    services = request.args.get("service", ",".join(SERVICE_MAP)).split(",")
+    invalid = [s for s in services if s not in SERVICE_MAP]
+    if invalid:
+        return jsonify({"error": f"Invalid service '{','.join(invalid)}'. Must be one of {list(SERVICE_MAP.keys())}"}), 400
+
+    job, deduplicated = DIRECT_JOBS.submit([SERVICE_MAP[s]["target"] for s in services])
+    job_id = job["id"] if job else next(iter(deduplicated.values()))
+    response = direct_job_response(DIRECT_JOBS.get(job_id))
+    response["deduplicated"] = deduplicated
+    return jsonify(response), 202
+
+
+@model_bp.route("/forecast/direct/jobs/<job_id>", methods=["GET"])
+def get_direct_job(job_id):
+    job = DIRECT_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown direct model job '{job_id}'"}), 404
+    return jsonify(direct_job_response(job))
+
 
 @model_bp.route("/forecast/download", methods=["GET"])
 def download_forecast_csv():
+    data = MODEL_DATA.get()
     region = request.args.get("region", type=int)
     service = request.args.get("service", type=str)
     horizon = request.args.get("horizon", default=30, type=int)
@@ -245,20 +622,21 @@ def download_forecast_csv():
         return jsonify({"error": f"Invalid horizon '{horizon}'. Must be 7, 14, or 30"}), 400
 
     if region is not None:
-        df_region = encoded_insights[encoded_insights["region_encoded"] == region].copy()
+        df_region = data.encoded_insights[data.encoded_insights["region_encoded"] == region].copy()
         if df_region.empty:
             return jsonify({"error": f"No data found for region '{region}'"}), 404
     else:
-        df_region = encoded_insights.copy()
+        df_region = data.encoded_insights.copy()
 
-    model = SERVICE_MAP[service]["model"]
     target_col = SERVICE_MAP[service]["target"]
 
-    forecasts = forecast_next_30_days(model, target_col, df_region, variability_factor=0.25)
-    forecasts = forecasts[:horizon]
+    forecasts = cached_forecast(target_col, df_region, region, horizon=horizon, variability_factor=0.25)
 
     df_region_sorted = df_region.sort_values("date")[["date", target_col]].copy()
-    df_region_sorted = df_region_sorted.groupby("date").mean().reset_index().round(2)
+    # The store parses dates; the CSV keeps plain YYYY-MM-DD like the forecast rows
+    df_region_sorted["date"] = df_region_sorted["date"].dt.strftime("%Y-%m-%d")
+    with timed("groupby"):
+        df_region_sorted = df_region_sorted.groupby("date").mean().reset_index().round(2)
 
     forecast_df = pd.DataFrame({
         "date": [f["date"] for f in forecasts],
@@ -313,7 +691,8 @@ def monitoring():
         metrics_csv_path = os.path.join(BASE_DIR, "Model", "results", "top_models_summary.csv")
 
         if os.path.exists(metrics_csv_path):
-            df_metrics = pd.read_csv(metrics_csv_path)
+            with timed("read_csv"):
+                df_metrics = pd.read_csv(metrics_csv_path)
 
         df_metrics = df_metrics.dropna(subset=["Target", "Best_Model"], how="any")
         df_metrics = df_metrics[df_metrics["Target"].notnull() & (df_metrics["Target"] != "")]
@@ -381,11 +760,6 @@ def monitoring():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def mean_absolute_percentage_error(y_true, y_pred):
-    """Helper function for MAPE calculation"""
-    y_true, y_pred = np.array(y_true), np.array(y_pred)
-    return np.mean(np.abs((y_true - y_pred) / np.maximum(y_true, 1e-8))) * 100
-
 retrained_model_path = os.path.join(BASE_DIR, "backend", "models", "retrained_models")
 retrained_results_path = os.path.join(BASE_DIR, "Model", "retrained_results")
 retrained_csv_path = os.path.join(BASE_DIR, "Model", "retrained_results", "csv")
@@ -416,158 +790,283 @@ def save_retrain_results_csv(retrain_results, timestamp):
     df.to_csv(csv_path, index=False)
     return csv_path
 
-def retrain_model(model, target_col, df, test_size=0.2):
-    try:
-        df = df.copy()
-        df["date"] = pd.to_datetime(df["date"])
-        
-        df = df.sort_values("date")
-        split_idx = int(len(df) * (1 - test_size))
-        train_df = df.iloc[:split_idx]
-        test_df = df.iloc[split_idx:]
-        
-        feature_cols = [col for col in df.columns if col not in ["date", "usage_cpu", "usage_storage", "users_active", "unique_id"]]
-        
-        X_train = train_df[feature_cols].fillna(0)
-        y_train = train_df[target_col].fillna(train_df[target_col].mean())
-        
-        X_test = test_df[feature_cols].fillna(0)
-        y_test = test_df[target_col].fillna(test_df[target_col].mean())
-        
-        new_model = clone(model)
-        new_model.fit(X_train, y_train)
-        
-        test_pred = new_model.predict(X_test)
-        
-        metrics = {
-            "MAE": mean_absolute_error(y_test, test_pred),
-            "RMSE": np.sqrt(mean_squared_error(y_test, test_pred)),
-            "MAPE": mean_absolute_percentage_error(y_test, test_pred),
-            "Bias": np.mean(test_pred - y_test)
+def retrain_due(target, last_data_date):
+    last_trained = LAST_TRAINING_DATES.get(target)
+    if not last_trained:
+        return True
+    days_since_data = (last_data_date - last_trained).days
+    return days_since_data > 30 and last_data_date > last_trained
+
+
+def save_retrain_results(retrain_results, timestamp):
+    """Write retrain results as pickle (read back by compare/switch after a restart) and CSV."""
+    results_path = os.path.join(retrained_results_path, "retrain_results.pkl")
+    tmp_path = results_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(retrain_results, f)
+    os.replace(tmp_path, results_path)
+
+    csv_path = save_retrain_results_csv(retrain_results, timestamp)
+    return {"pickle": results_path, "csv": csv_path}
+
+
+def retrain_plan(target, df, mode):
+    """(model to continue from, plan_retrain plan): the latest retrained model, else the serving one."""
+    state = TRAINING_STATE[target]
+    model = state["model"] if state["model"] is not None else MODEL_REGISTRY.get(target)
+    plan = plan_retrain(model, target, df, state["trained_through"],
+                        incremental_updates=state["incremental_updates"],
+                        last_full_refit=state["last_full_refit"], mode=mode)
+    return model, plan
+
+
+def run_retrain_job(job, progress):
+    """Fit every target of a background job, saving each model as soon as it is fit."""
+    data = MODEL_DATA.get()
+    current_date = datetime.now()
+    timestamp = current_date.strftime("%Y%m%d_%H%M%S")
+    services = {config["target"]: service for service, config in SERVICE_MAP.items()}
+    retrain_results = {}
+
+    def persist(outcome):
+        target = outcome["target"]
+        seconds = round(outcome["seconds"], 3)
+        if "error" in outcome:
+            progress(target, status="failed", error=outcome["error"], seconds=seconds)
+            return
+
+        model_filename = f"{target}_retrained_model.pkl"
+        model_path = os.path.join(retrained_model_path, model_filename)
+        joblib.dump(outcome["model"], model_path)
+        LAST_TRAINING_DATES[target] = current_date
+
+        state = TRAINING_STATE[target]
+        state["model"] = outcome["model"]
+        state["trained_through"] = outcome["trained_through"]
+        if outcome["mode"] == "full":
+            state["last_full_refit"] = outcome["trained_through"]
+            state["incremental_updates"] = 0
+        else:
+            state["incremental_updates"] += 1
+
+        metrics = {name: float(value) for name, value in outcome["metrics"].items()}
+        retrain_results[target] = {
+            "service": services[target],
+            "metrics": metrics,
+            "model_path": model_path,
+            "retrain_date": timestamp,
+            "mode": outcome["mode"]
         }
-        
-        return new_model, metrics
-    except Exception as e:
-        print(f"Error in retrain_model: {str(e)}")
-        raise
+        progress(target, status="completed", metrics=metrics, model_file=model_filename, seconds=seconds,
+                 train_rows=outcome["train_rows"])
+
+    jobs = []
+    mode = job["options"].get("mode", "auto")
+    for target in job["targets"]:
+        model, plan = retrain_plan(target, data.encoded_insights, mode)
+        if mode == "incremental" and plan["mode"] != "incremental":
+            # An explicit incremental request is never turned into a full refit
+            progress(target, status="failed", mode=plan["mode"], reason=plan["reason"],
+                     error=f"Incremental retraining not possible: {plan['reason']}")
+            continue
+        progress(target, status="running", mode=plan["mode"], reason=plan["reason"],
+                 new_rows=plan["new_rows"], drift=plan["drift"])
+        jobs.append((target, model, plan["since"]))
+
+    retrain_targets(jobs, data.encoded_insights,
+                    max_workers=job["options"]["workers"],
+                    n_threads=job["options"]["threads"],
+                    on_result=persist)
+
+    if not retrain_results:
+        return None
+    # Targets trained by earlier jobs keep their latest results
+    merged, _ = latest_retrain_results()
+    merged = dict(merged or {})
+    merged.update(retrain_results)
+    save_retrain_results(merged, timestamp)
+    return merged
+
+
+RETRAIN_JOBS = RetrainJobQueue(run_retrain_job)
+
+
+def latest_retrain_results():
+    """Results of the newest finished retrain job, else the last saved pickle: (results, file)."""
+    results_path = os.path.join(retrained_results_path, "retrain_results.pkl")
+    results = RETRAIN_JOBS.latest_result()
+    if results:
+        return results, results_path
+    if not os.path.exists(results_path):
+        return None, None
+    with open(results_path, 'rb') as f:
+        return pickle.load(f), results_path
+
+
+def retrain_job_response(job):
+    view = RETRAIN_JOBS.describe(job)
+    services = {config["target"]: service for service, config in SERVICE_MAP.items()}
+    models_status = []
+    for target, state in view["targets"].items():
+        entry = {"service": services[target], "target": target, "status": state["status"]}
+        if state.get("mode"):
+            entry["retrain_mode"] = state["mode"]
+            entry["retrain_reason"] = state["reason"]
+        if state["status"] == "completed":
+            entry.update({
+                "message": "Model retrained successfully",
+                "metrics": state["metrics"],
+                "model_file": state.get("model_file"),
+                "retrain_seconds": state["seconds"],
+                "train_rows": state.get("train_rows"),
+                "needs_retrain": False
+            })
+        elif state["status"] == "failed":
+            entry.update({"error": state["error"], "needs_retrain": True})
+        models_status.append(entry)
+    view["models_status"] = models_status
+    view["status_url"] = f"/api/models/retrain/jobs/{job['id']}"
+    return view
+
 
 @model_bp.route("/retrain", methods=["POST"])
 def retrain_models():
+    """
+    Queue a background retrain of every target that needs it and return 202 with the job id.
+
+    Poll /retrain/jobs/<id> for progress; ?wait=true blocks until the job is done.
+    ?mode=auto (default) continues boosting on new rows where possible and falls
+    back to a full refit on schedule or drift; mode=full|incremental forces one.
+    """
+    data = MODEL_DATA.get()
     try:
-        # cleanup_retrain_folders()
-        
-        current_date = datetime.now()
-        last_data_date = pd.to_datetime(encoded_insights["date"]).max()
+        last_data_date = pd.to_datetime(data.encoded_insights["date"]).max()
         force = request.args.get('force', 'false').lower() == 'true'
-        
+        wait = request.args.get('wait', 'false').lower() == 'true'
+        mode = request.args.get('mode', 'auto').lower()
+        if mode not in ["auto", "full", "incremental"]:
+            return jsonify({"error": f"Invalid mode '{mode}'. Must be one of ['auto', 'full', 'incremental']"}), 400
+
         response = {
             "last_data_date": last_data_date.strftime("%Y-%m-%d"),
             "models_status": []
         }
-        
-        retrain_results = {}
-        
+
+        statuses = {}
+        pending = []
         for service, config in SERVICE_MAP.items():
             target = config["target"]
-            last_trained = LAST_TRAINING_DATES.get(target)
-            
-            if last_trained:
-                days_since_data = (last_data_date - last_trained).days
-                model_needs_retrain = days_since_data > 30 and last_data_date > last_trained
-            else:
-                model_needs_retrain = True
-                
-            if not force and not model_needs_retrain:
-                response["models_status"].append({
+            if not force and not retrain_due(target, last_data_date):
+                last_trained = LAST_TRAINING_DATES[target]
+                statuses[service] = {
                     "service": service,
                     "target": target,
                     "message": f"Model is current (last trained: {last_trained.strftime('%Y-%m-%d')}, last data: {last_data_date.strftime('%Y-%m-%d')})",
                     "needs_retrain": False
-                })
+                }
                 continue
-
-            try:
-                model = config["model"]
-                new_model, metrics = retrain_model(model, target, encoded_insights)
-                
-                timestamp = current_date.strftime("%Y%m%d_%H%M%S")
-                model_filename = f"{target}_retrained_model.pkl"
-                model_path = os.path.join(retrained_model_path, model_filename)
-                joblib.dump(new_model, model_path)
-                
-                LAST_TRAINING_DATES[target] = current_date
-                
-                retrain_results[target] = {
-                    "service": service,
-                    "metrics": metrics,
-                    "model_path": model_path,
-                    "retrain_date": timestamp
+            pending.append(target)
+
+        if not pending:
+            response["models_status"] = [statuses[service] for service in SERVICE_MAP if service in statuses]
+            return jsonify(response)
+
+        if mode == "incremental":
+            refused = {}
+            for target in pending:
+                _, plan = retrain_plan(target, data.encoded_insights, mode)
+                if plan["mode"] != "incremental":
+                    refused[target] = plan["reason"]
+            if refused:
+                return jsonify({
+                    "error": "Incremental retraining is not possible; use mode=auto or mode=full",
+                    "targets": refused
+                }), 400
+
+        # Every target in the job is fit concurrently, one process per target
+        workers = request.args.get("workers", type=int) or default_workers(len(pending))
+        threads = request.args.get("threads", type=int) or default_threads(workers)
+        job, deduplicated = RETRAIN_JOBS.submit(pending, {"workers": workers, "threads": threads, "mode": mode})
+
+        job_ids = [job["id"]] if job else []
+        job_ids += [job_id for job_id in dict.fromkeys(deduplicated.values()) if job_id not in job_ids]
+        if wait:
+            for job_id in job_ids:
+                RETRAIN_JOBS.wait(job_id)
+
+        for job_id in job_ids:
+            for entry in retrain_job_response(RETRAIN_JOBS.get(job_id))["models_status"]:
+                if entry["target"] in pending:
+                    entry["job_id"] = job_id
+                    statuses[entry["service"]] = entry
+
+        response["models_status"] = [statuses[service] for service in SERVICE_MAP if service in statuses]
+        response["job_id"] = job["id"] if job else job_ids[0]
+        response["jobs"] = job_ids
+        response["deduplicated"] = deduplicated
+        response["status_url"] = f"/api/models/retrain/jobs/{response['job_id']}"
+        response["retrain_workers"] = workers
+        response["retrain_threads_per_model"] = threads
+
+        if wait:
+            response["status"] = RETRAIN_JOBS.get(response["job_id"])["status"]
+            _, results_file = latest_retrain_results()
+            if results_file:
+                response["results_saved"] = {
+                    "pickle": results_file,
+                    "csv": os.path.join(retrained_csv_path, "retrain_results.csv")
                 }
-                
-                response["models_status"].append({
-                    "service": service,
-                    "target": target,
-                    "message": "Model retrained successfully",
-                    "metrics": metrics,
-                    "model_file": model_filename,
-                    "needs_retrain": False
-                })
-            except Exception as e:
-                response["models_status"].append({
-                    "service": service,
-                    "target": target,
-                    "error": str(e),
-                    "needs_retrain": True
-                })
-        
-        if retrain_results:
-            timestamp = current_date.strftime("%Y%m%d_%H%M%S")
-            results_filename = f"retrain_results.pkl"
-            results_path = os.path.join(retrained_results_path, results_filename)
-            with open(results_path, 'wb') as f:
-                pickle.dump(retrain_results, f)
-            
-            csv_path = save_retrain_results_csv(retrain_results, timestamp)
-            
-            response["results_saved"] = {
-                "pickle": results_path,
-                "csv": csv_path
-            }
+            return jsonify(response)
+
+        response["status"] = job["status"] if job else "deduplicated"
+        return jsonify(response), 202
 
-        return jsonify(response)
-    
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@model_bp.route("/retrain/jobs", methods=["GET"])
+def list_retrain_jobs():
+    return jsonify({
+        "active": RETRAIN_JOBS.active(),
+        "jobs": [retrain_job_response(job) for job in reversed(RETRAIN_JOBS.jobs())]
+    })
+
+@model_bp.route("/retrain/jobs/<job_id>", methods=["GET"])
+def get_retrain_job(job_id):
+    job = RETRAIN_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown retrain job '{job_id}'"}), 404
+    return jsonify(retrain_job_response(job))
+
 @model_bp.route("/retrain/status", methods=["GET"])
 def check_retrain_status():
+    data = MODEL_DATA.get()
     try:
-        current_date = datetime.now()
-        last_data_date = pd.to_datetime(encoded_insights["date"]).max()
+        last_data_date = pd.to_datetime(data.encoded_insights["date"]).max()
+        active = RETRAIN_JOBS.active()
         
         status = []
         for service, config in SERVICE_MAP.items():
             target = config["target"]
             last_trained = LAST_TRAINING_DATES.get(target)
+            # Compare with last data date instead of current date
+            needs_retrain = retrain_due(target, last_data_date)
             
-            if last_trained:
-                # Compare with last data date instead of current date
-                days_since_data = (last_data_date - last_trained).days
-                needs_retrain = days_since_data > 30 and last_data_date > last_trained
-            else:
-                needs_retrain = True
-            
-            status.append({
+            entry = {
                 "service": service,
                 "target": target,
                 "last_trained_date": last_trained.strftime("%Y-%m-%d") if last_trained else None,
                 "last_data_date": last_data_date.strftime("%Y-%m-%d"),
-                "days_since_new_data": days_since_data if last_trained else None,
+                "days_since_new_data": (last_data_date - last_trained).days if last_trained else None,
                 "needs_retrain": needs_retrain,
                 "retrain_reason": "Up to date with current data" if not needs_retrain else 
-                                "New data available" if last_data_date > last_trained else
+                                "New data available" if last_trained and last_data_date > last_trained else
                                 "Never trained"
-            })
+            }
+            if target in active:
+                job = RETRAIN_JOBS.get(active[target])
+                entry["retrain_job"] = {"id": job["id"], "status": job["targets"][target]["status"]}
+            status.append(entry)
         
         return jsonify({
             "last_data_date": last_data_date.strftime("%Y-%m-%d"),
@@ -580,19 +1079,16 @@ def check_retrain_status():
 @model_bp.route("/retrain/compare", methods=["GET"])
 def compare_models():
     try:
-        retrain_files = sorted(os.listdir(retrained_results_path))
-        if not retrain_files:
+        retrain_results, latest_retrain_file = latest_retrain_results()
+        if not retrain_results:
             return jsonify({"error": "No retrained models found"}), 404
             
-        latest_retrain_file = os.path.join(retrained_results_path, retrain_files[-1])
-        with open(latest_retrain_file, 'rb') as f:
-            retrain_results = pickle.load(f)
-            
         metrics_csv_path = os.path.join(BASE_DIR, "Model", "results", "top_models_summary.csv")
         if not os.path.exists(metrics_csv_path):
             return jsonify({"error": "Original model metrics not found"}), 404
             
-        df_metrics = pd.read_csv(metrics_csv_path)
+        with timed("read_csv"):
+            df_metrics = pd.read_csv(metrics_csv_path)
         
         comparison = []
         for target, results in retrain_results.items():
@@ -650,19 +1146,16 @@ def switch_models():
         force = request.args.get('force', 'false').lower() == 'true'
         
         try:
-            retrain_files = sorted(os.listdir(retrained_results_path))
-            if not retrain_files:
+            retrain_results, _ = latest_retrain_results()
+            if not retrain_results:
                 return jsonify({"error": "No retrained models found"}), 404
 
-            latest_retrain_file = os.path.join(retrained_results_path, retrain_files[-1])
-            with open(latest_retrain_file, 'rb') as f:
-                retrain_results = pickle.load(f)
-
             metrics_csv_path = os.path.join(BASE_DIR, "Model", "results", "top_models_summary.csv")
             if not os.path.exists(metrics_csv_path):
                 return jsonify({"error": "Original model metrics not found"}), 404
 
-            df_metrics = pd.read_csv(metrics_csv_path)
+            with timed("read_csv"):
+                df_metrics = pd.read_csv(metrics_csv_path)
             switched_models = []
 
             for target, results in retrain_results.items():
@@ -698,13 +1191,11 @@ def switch_models():
                         retrained_path = results["model_path"]
                         if os.path.exists(retrained_path):
                             shutil.copy2(retrained_path, original_model_path)
+                            # copy2 keeps the retrained file's mtime; stamp the switch so validators change
+                            os.utime(original_model_path)
 
-                            # Update SERVICE_MAP model
-                            new_model = joblib.load(original_model_path)
-                            for svc, config in SERVICE_MAP.items():
-                                if config["target"] == target:
-                                    config["model"] = new_model
-                                    break
+                            # Reload through the registry; this also drops cached forecasts for the target
+                            MODEL_REGISTRY.swap(target, original_model_path)
 
                             switched_models.append({
                                 "target": target,
@@ -758,3 +1249,88 @@ def cleanup_retrain_folders():
                     
         except Exception as e:
             print(f'Error handling folder {folder}: {e}')
+
+
+# ---------- Backtesting ----------
+backtest_results_path = os.path.join(BASE_DIR, "Model", "results", "backtests")
+os.makedirs(backtest_results_path, exist_ok=True)
+
+
+def run_backtest_job(job, progress):
+    """Walk-forward backtest of every target's serving model; steps run across worker processes."""
+    data = MODEL_DATA.get()
+    options = dict(job["options"])
+    results = {}
+    for target in job["targets"]:
+        progress(target, status="running")
+        try:
+            metrics_df, summary = backtest(MODEL_REGISTRY.get(target), target, data.encoded_insights, **options)
+        except Exception as e:
+            print(f"Error in backtest for {target}: {str(e)}")
+            progress(target, status="failed", error=str(e))
+            continue
+
+        csv_path = os.path.join(backtest_results_path, f"{target}_backtest_metrics.csv")
+        metrics_df.to_csv(csv_path, index=False)
+        results[target] = {"summary": summary, "csv": csv_path, "daily": metrics_df.to_dict(orient="records")}
+        progress(target, status="completed", seconds=summary["seconds"], summary=summary, csv=csv_path)
+    return results
+
+
+BACKTEST_JOBS = RetrainJobQueue(run_backtest_job)
+
+
+def backtest_job_response(job, details=False):
+    view = BACKTEST_JOBS.describe(job)
+    view["status_url"] = f"/api/models/backtest/jobs/{job['id']}"
+    if details and job["result"]:
+        view["daily_metrics"] = {target: result["daily"] for target, result in job["result"].items()}
+    return view
+
+
+@model_bp.route("/backtest", methods=["POST"])
+def run_backtest():
+    """
+    Queue a walk-forward backtest and return 202 with the job id.
+
+    ?service=compute,storage,users (default all), window=expanding|sliding,
+    initial_window=30, step=1, horizon=1, refit_every=1, workers, threads;
+    ?wait=true blocks until the job is done.
+    """
+    services = request.args.get("service", ",".join(SERVICE_MAP)).split(",")
+    invalid = [s for s in services if s not in SERVICE_MAP]
+    if invalid:
+        return jsonify({"error": f"Invalid service '{','.join(invalid)}'. Must be one of {list(SERVICE_MAP.keys())}"}), 400
+
+    window = request.args.get("window", "expanding")
+    if window not in WINDOWS:
+        return jsonify({"error": f"Invalid window '{window}'. Must be one of {WINDOWS}"}), 400
+
+    options = {"window": window}
+    for name, default in [("initial_window", 30), ("step", 1), ("horizon", 1), ("refit_every", 1)]:
+        value = request.args.get(name, default=default, type=int)
+        if value is None or value < 1:
+            return jsonify({"error": f"'{name}' must be a positive integer"}), 400
+        options[name] = value
+    options["max_workers"] = request.args.get("workers", type=int)
+    options["n_threads"] = request.args.get("threads", type=int)
+
+    targets = [SERVICE_MAP[s]["target"] for s in services]
+    job, deduplicated = BACKTEST_JOBS.submit(targets, options)
+    job_id = job["id"] if job else next(iter(deduplicated.values()))
+
+    if request.args.get("wait", "false").lower() == "true":
+        BACKTEST_JOBS.wait(job_id)
+        return jsonify(backtest_job_response(BACKTEST_JOBS.get(job_id)))
+
+    response = backtest_job_response(BACKTEST_JOBS.get(job_id))
+    response["deduplicated"] = deduplicated
+    return jsonify(response), 202
+
+@model_bp.route("/backtest/jobs/<job_id>", methods=["GET"])
+def get_backtest_job(job_id):
+    job = BACKTEST_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown backtest job '{job_id}'"}), 404
+    details = request.args.get("details", "false").lower() == "true"
+    return jsonify(backtest_job_response(job, details=details))
@@ -1,6 +1,8 @@
 import os
 import pandas as pd
 from flask import Blueprint, jsonify
+from services.json_response import frame_response
+from services.conditional import conditional, file_sources
 
 model_scores_bp = Blueprint("models_scores", __name__)
 
@@ -12,6 +14,9 @@ file_comp = os.path.join(BASE_DIR, "Model", "results", "model_comparison.csv")
 
 df_top = pd.read_csv(file_top)
 df_comp = pd.read_csv(file_comp)
+# Both files are read once at import, so their stamps at that point version every response
+SCORE_SOURCES = file_sources(file_top, file_comp)
+conditional(model_scores_bp, lambda: SCORE_SOURCES)
 
 
 # ---------- Routes ----------
@@ -19,11 +24,11 @@ df_comp = pd.read_csv(file_comp)
 # 1. Entire CSVs as JSON
 @model_scores_bp.route("/all/top", methods=["GET"])
 def get_all_top():
-    return jsonify(df_top.to_dict(orient="records"))
+    return frame_response(df_top)
 
 @model_scores_bp.route("/all/comparison", methods=["GET"])
 def get_all_comparison():
-    return jsonify(df_comp.to_dict(orient="records"))
+    return frame_response(df_comp)
 
 
 # 2. Best model info per target (from top_model_summary.csv)
@@ -54,7 +59,7 @@ def get_all_models_by_target(target):
     if rows.empty:
         return jsonify({"error": f"No models found for target '{target}'"}), 404
 
-    return jsonify(rows.to_dict(orient="records"))
+    return frame_response(rows)
 
 
 # 4. Top 3 models by Test_MAE (from model_comparision.csv)
@@ -67,4 +72,4 @@ def get_top3_models_by_target(target):
 
     top3 = rows.sort_values("Val_MAE").head(3)
 
-    return jsonify(top3.to_dict(orient="records"))
+    return frame_response(top3)
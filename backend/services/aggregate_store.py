@@ -0,0 +1,44 @@
+from services.metrics import timed
+from services.snapshots import SnapshotHolder
+
+
+class AggregateStore:
+    """
+    Materialized aggregates over a data-store dataset.
+
+    Builders are registered with `@store.aggregate(name)`; every version of
+    the source is loaded once and runs every builder, keeping the
+    ready-to-serialize results in one snapshot. `get(name)` is a dictionary
+    lookup on the request's pinned snapshot; a changed source is rebuilt in
+    the background while the previous results keep serving.
+    """
+
+    def __init__(self, source, loader, check_interval=2.0):
+        self.source = source
+        self.loader = loader
+        self._builders = {}
+        self.snapshots = SnapshotHolder(f"aggregates-{source}", [source], self._build, check_interval)
+
+    def aggregate(self, name):
+        """Decorator registering `fn(df)` as the builder for aggregate `name`."""
+        def register(fn):
+            self._builders[name] = fn
+            return fn
+        return register
+
+    def _build(self, frames):
+        df = self.loader(frames[self.source])
+        with timed("groupby"):
+            results = {name: build(df) for name, build in self._builders.items()}
+        return {"columns": list(df.columns), "results": results}
+
+    def refresh(self):
+        """Rebuild every aggregate from the current source and publish them at once."""
+        self.snapshots.reload()
+
+    @property
+    def columns(self):
+        return self.snapshots.get().columns
+
+    def get(self, name):
+        return self.snapshots.get().results[name]
@@ -0,0 +1,167 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from services.forecast_engine import get_feature_cols
+from services.retraining import default_workers, default_threads, limit_threads
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # optional: only caps BLAS/OpenMP pools inside workers
+    threadpool_limits = None
+
+WINDOWS = ["expanding", "sliding"]
+
+
+def walk_forward_steps(n_rows, initial_window=30, step=1):
+    """First test row of every walk-forward step: initial_window, +step, ... while a row is left."""
+    return np.arange(initial_window, n_rows, step)
+
+
+def fit_blocks(starts, refit_every=1):
+    """Group steps into (first_step, end_step) blocks that share one fitted model."""
+    bounds = list(range(0, len(starts), refit_every)) + [len(starts)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _fit_predict(model, X, y, train_lo, train_hi, test_lo, test_hi, n_threads):
+    fitted = clone(model)
+    limit_threads(fitted, n_threads)
+    fitted.fit(X[train_lo:train_hi], y[train_lo:train_hi])
+    return fitted.predict(X[test_lo:test_hi])
+
+
+# ---------- Worker processes ----------
+_worker_state = None
+
+
+def _init_worker(model, X, y, n_threads):
+    """Runs once per pool process: keep the arrays and the estimator, cap OpenMP/BLAS threads."""
+    global _worker_state
+    _worker_state = (model, X, y, n_threads)
+    if n_threads is not None:
+        os.environ["OMP_NUM_THREADS"] = str(n_threads)
+        if threadpool_limits is not None:
+            threadpool_limits(n_threads)
+
+
+def _worker_fit_predict(block, train_lo, train_hi, test_lo, test_hi):
+    model, X, y, n_threads = _worker_state
+    return block, _fit_predict(model, X, y, train_lo, train_hi, test_lo, test_hi, n_threads)
+
+
+def step_metrics(predictions, actuals):
+    """
+    Per-step MAE, RMSE, MAPE (as a fraction) and bias over a steps x horizon matrix.
+
+    NaN cells (horizons that run past the data) are ignored.
+    """
+    errors = predictions - actuals
+    abs_errors = np.abs(errors)
+    return {
+        "mae": np.nanmean(abs_errors, axis=1),
+        "rmse": np.sqrt(np.nanmean(errors * errors, axis=1)),
+        "mape": np.nanmean(abs_errors / np.maximum(actuals, 1e-8), axis=1),
+        "bias": np.nanmean(errors, axis=1),
+    }
+
+
+def backtest(model, target_col, df, initial_window=30, window="expanding", step=1,
+             horizon=1, refit_every=1, max_workers=None, n_threads=None):
+    """
+    Walk-forward backtest of `model` on `df` (one row per step, ordered by date).
+
+    At every step the model is trained on the rows before the step's first
+    test row (all of them for an expanding window, the last `initial_window`
+    for a sliding one) and predicts the next `horizon` rows. A fresh clone is
+    fit only every `refit_every` steps and reused for the steps in between,
+    so one fit and one batched predict cover a whole block. Blocks are fanned
+    out across `max_workers` processes; the predictions land in a
+    steps x horizon matrix and the metrics are computed on it in one pass.
+
+    Returns (metrics DataFrame with date/mae/rmse/mape/bias per step, summary dict).
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"window must be one of {WINDOWS}")
+    if initial_window < 1 or step < 1 or horizon < 1 or refit_every < 1:
+        raise ValueError("initial_window, step, horizon and refit_every must be positive")
+
+    start_time = time.perf_counter()
+    df = df.sort_values("date", kind="stable")
+    feature_cols = get_feature_cols(df.columns)
+    X = df[feature_cols].to_numpy(dtype=np.float64)
+    y = df[target_col].to_numpy(dtype=np.float64)
+    dates = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d").to_numpy()
+    n_rows = len(df)
+
+    model = clone(model)
+    # Early stopping needs a validation set the walk-forward fits don't have
+    if "early_stopping_rounds" in model.get_params():
+        model.set_params(early_stopping_rounds=None)
+
+    starts = walk_forward_steps(n_rows, initial_window, step)
+    blocks = fit_blocks(starts, refit_every)
+    tasks = []
+    for first, end in blocks:
+        test_lo = starts[first]
+        train_lo = 0 if window == "expanding" else max(0, test_lo - initial_window)
+        test_hi = min(n_rows, starts[end - 1] + horizon)
+        tasks.append((train_lo, test_lo, test_lo, test_hi))
+
+    max_workers = max_workers or default_workers(len(tasks))
+    n_threads = n_threads or default_threads(max_workers)
+    block_predictions = [None] * len(tasks)
+
+    if max_workers == 1 or len(tasks) <= 1:
+        for i, task in enumerate(tasks):
+            block_predictions[i] = _fit_predict(model, X, y, *task, n_threads)
+    else:
+        # spawn, not fork: forking a process whose OpenMP runtime is initialised can deadlock
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(tasks)),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model, X, y, n_threads),
+        ) as pool:
+            futures = [pool.submit(_worker_fit_predict, i, *task) for i, task in enumerate(tasks)]
+            for future in as_completed(futures):
+                i, predictions = future.result()
+                block_predictions[i] = predictions
+
+    # Scatter each block's batched predictions into the steps x horizon matrix
+    rows = starts[:, None] + np.arange(horizon)[None, :]
+    in_range = rows < n_rows
+    predictions = np.full(rows.shape, np.nan)
+    for (first, end), (_, _, test_lo, _), block in zip(blocks, tasks, block_predictions):
+        offsets = rows[first:end] - test_lo
+        valid = in_range[first:end]
+        predictions[first:end][valid] = block[offsets[valid]]
+
+    actuals = np.where(in_range, y[np.minimum(rows, n_rows - 1)], np.nan)
+    metrics = step_metrics(predictions, actuals)
+    metrics_df = pd.DataFrame({"date": dates[starts], **metrics})
+
+    summary = {
+        "target": target_col,
+        "steps": len(starts),
+        "fits": len(tasks),
+        "window": window,
+        "initial_window": initial_window,
+        "step": step,
+        "horizon": horizon,
+        "refit_every": refit_every,
+        "workers": max_workers,
+        "threads_per_fit": n_threads,
+        "MAE": float(np.nanmean(metrics["mae"])) if len(starts) else None,
+        "RMSE": float(np.sqrt(np.nanmean(metrics["rmse"] ** 2))) if len(starts) else None,
+        "MAPE": float(np.nanmean(metrics["mape"])) if len(starts) else None,
+        "Bias": float(np.nanmean(metrics["bias"])) if len(starts) else None,
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
+    return metrics_df, summary
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from flask import current_app, g, request
+
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+GZIP_SUFFIX = "-gzip"
+
+
+# ---------- Version sources ----------
+# A source is (token, mtime): the token goes into the ETag, the newest mtime becomes Last-Modified.
+def snapshot_sources(*holders):
+    """The request's pinned snapshots, identified by their CSVs' mtime/size."""
+    sources = []
+    for holder in holders:
+        for stamp in holder.get().stamps:
+            sources.append(((stamp["mtime"], stamp["size"]), stamp["mtime"]))
+    return sources
+
+
+def registry_sources(registry):
+    """Every target of a ModelRegistry, identified by its model file's path/mtime/size."""
+    stamps = [registry.stamp(target) for target in registry.targets()]
+    # Not the in-process swap count, so every worker derives the same ETag
+    return [(stamp[:3], stamp[1]) for stamp in stamps]
+
+
+def file_sources(*paths):
+    sources = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            sources.append(((path, stat.st_mtime, stat.st_size), stat.st_mtime))
+        except OSError:
+            sources.append(((path, None, None), None))
+    return sources
+
+
+# ---------- Conditional GET ----------
+def _validators(sources):
+    """Strong ETag over the route, the sorted query string and the source tokens, plus Last-Modified."""
+    key = (request.path, sorted(request.args.items(multi=True)), [token for token, _ in sources])
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()[:24]
+    mtimes = [mtime for _, mtime in sources if mtime is not None]
+    last_modified = datetime.fromtimestamp(int(max(mtimes)), timezone.utc) if mtimes else None
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    """The ETag variant the client already holds, or None when the view has to run."""
+    if request.if_none_match:
+        for candidate in [etag, etag + GZIP_SUFFIX]:
+            if request.if_none_match.contains_weak(candidate):
+                return candidate
+        return None
+    if last_modified is not None and request.if_modified_since is not None:
+        if last_modified <= request.if_modified_since:
+            return etag
+    return None
+
+
+def _tag(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # Caches may keep the body but must revalidate it on every poll
+    response.cache_control.no_cache = True
+
+
+def conditional(bp, sources, exclude=()):
+    """
+    ETag / Last-Modified validation for every GET route of blueprint `bp`.
+
+    `sources()` lists the versions the responses are computed from (see
+    *_sources above). Before the view runs, the request's ETag is derived
+    from them and the query parameters and checked against If-None-Match
+    (else Last-Modified against If-Modified-Since); a match is answered
+    with 304 and no computation. Successful responses carry both
+    validators. Views in `exclude` (job status, in-process counters) are
+    not validated.
+    """
+    exclude = {f"{bp.name}.{view}" for view in exclude}
+
+    @bp.before_request
+    def _check_validators():
+        if request.method not in ("GET", "HEAD") or request.endpoint in exclude:
+            return None
+        etag, last_modified = _validators(sources())
+        g.validators = (etag, last_modified)
+        matched = _not_modified(etag, last_modified)
+        if matched is None:
+            return None
+        response = current_app.response_class(status=304)
+        _tag(response, matched, last_modified)
+        return response
+
+    @bp.after_request
+    def _set_validators(response):
+        validators = g.pop("validators", None)
+        if validators is not None and response.status_code == 200:
+            _tag(response, *validators)
+        return response
+
+
+# ---------- Compression ----------
+def _compress(response):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or not (response.mimetype or "").startswith(COMPRESSIBLE)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    if "gzip" not in request.accept_encodings:
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+    response.headers["Content-Encoding"] = "gzip"
+    # The compressed bytes are a different representation, so they get their own strong ETag
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag + GZIP_SUFFIX)
+    return response
+
+
+def init_app(app):
+    """Gzip JSON/CSV/text responses of at least GZIP_MIN_BYTES for clients that accept it."""
+    app.after_request(_compress)
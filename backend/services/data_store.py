@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from services.metrics import timed
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+COLUMNAR_DIR = os.path.join(BASE_DIR, "Data", "columnar")
+
+# Explicit dtypes per dataset; every other column keeps the numeric dtype inferred from the CSV.
+DATASETS = {
+    "insights": {
+        "path": os.path.join(BASE_DIR, "Data", "Processed", "insights.csv"),
+        "dates": ["date"],
+        "categories": ["region", "resource_type"],
+    },
+    "feature_engineered": {
+        "path": os.path.join(BASE_DIR, "Data", "Processed", "feature_engineered.csv"),
+        "dates": ["date"],
+        "categories": ["active_regions", "resources_per_region"],
+    },
+    "enhanced_features": {
+        "path": os.path.join(BASE_DIR, "Data", "models", "enhanced_features.csv"),
+        "dates": ["date"],
+        "categories": ["unique_id"],
+        # Appended rows land at the end of the CSV; rows are served grouped per series
+        "order": ["region_encoded", "resource_type_encoded", "date"],
+    },
+}
+
+MANIFEST = "manifest.json"
+
+
+# ---------- CSV -> columnar ----------
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def read_source(name):
+    """Parse a dataset's CSV with its explicit dtypes."""
+    spec = DATASETS[name]
+    with timed("read_csv"):
+        df = pd.read_csv(spec["path"], dtype={col: "category" for col in spec["categories"]})
+    for col in spec["dates"]:
+        df[col] = pd.to_datetime(df[col])
+    if "order" in spec:
+        df = df.sort_values(spec["order"], kind="stable").reset_index(drop=True)
+    return df
+
+
+def _narrow(values):
+    """Smallest on-disk dtype that round-trips exactly (float32 / int32), else the original."""
+    if values.dtype == np.float64:
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return narrowed
+    elif values.dtype == np.int64 and values.size:
+        info = np.iinfo(np.int32)
+        if values.min() >= info.min and values.max() <= info.max:
+            return values.astype(np.int32)
+    return values
+
+
+def convert(name, target_dir=None):
+    """
+    Write dataset `name` as one .npy file per column plus a manifest.
+
+    Dates are stored as datetime64[ns], categoricals as integer codes with a
+    separate categories array, other text as fixed-width unicode and numbers
+    in the narrowest dtype that round-trips exactly. Every file can be opened
+    with np.load(mmap_mode="r").
+    """
+    spec = DATASETS[name]
+    target_dir = target_dir or os.path.join(COLUMNAR_DIR, name)
+    os.makedirs(target_dir, exist_ok=True)
+
+    stamp = _source_stamp(spec["path"])
+    df = read_source(name)
+    columns = []
+
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {"name": col, "file": f"{i:03d}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories_file"] = f"{i:03d}_categories.npy"
+            np.save(os.path.join(target_dir, entry["file"]), series.cat.codes.to_numpy())
+            np.save(os.path.join(target_dir, entry["categories_file"]), series.cat.categories.to_numpy(dtype=str))
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            entry["kind"] = "datetime"
+            np.save(os.path.join(target_dir, entry["file"]), series.to_numpy(dtype="datetime64[ns]"))
+        elif pd.api.types.is_numeric_dtype(series):
+            entry["kind"] = "numeric"
+            entry["dtype"] = str(series.dtype)
+            np.save(os.path.join(target_dir, entry["file"]), _narrow(series.to_numpy()))
+        else:
+            entry["kind"] = "string"
+            np.save(os.path.join(target_dir, entry["file"]), series.astype(str).to_numpy(dtype=str))
+        columns.append(entry)
+
+    manifest = {"name": name, "rows": len(df), "source": stamp, "columns": columns}
+    tmp_path = os.path.join(target_dir, MANIFEST + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(target_dir, MANIFEST))
+    return manifest
+
+
+def _read_manifest(target_dir):
+    try:
+        with open(os.path.join(target_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_columnar(target_dir, manifest):
+    """Rebuild the DataFrame from a converted dataset, memory-mapping each column file."""
+    data = {}
+    for entry in manifest["columns"]:
+        values = np.load(os.path.join(target_dir, entry["file"]), mmap_mode="r")
+        if entry["kind"] == "category":
+            categories = np.load(os.path.join(target_dir, entry["categories_file"])).astype(object)
+            data[entry["name"]] = pd.Categorical.from_codes(np.asarray(values), categories=categories)
+        elif entry["kind"] == "numeric":
+            # Narrowed columns are widened back so aggregates keep float64/int64 semantics
+            data[entry["name"]] = np.asarray(values).astype(entry["dtype"], copy=False)
+        elif entry["kind"] == "string":
+            data[entry["name"]] = np.asarray(values).astype(object)
+        else:
+            data[entry["name"]] = np.asarray(values)
+    return pd.DataFrame(data)
+
+
+# ---------- Shared frames ----------
+_frames = {}
+_stamps = {}
+_listeners = {}
+# Re-entrant: listeners run inside `updating()` and may load other datasets
+_lock = threading.RLock()
+
+
+def load_dataset(name):
+    """
+    The shared DataFrame for dataset `name`.
+
+    Loaded at most once per process (per source version): from the columnar
+    copy when it matches the CSV's mtime/size, otherwise the CSV is converted
+    first. Callers must treat the frame as read-only and copy before mutating.
+    """
+    spec = DATASETS[name]
+    stamp = _source_stamp(spec["path"])
+    with _lock:
+        if _stamps.get(name) == stamp:
+            return _frames[name]
+
+        target_dir = os.path.join(COLUMNAR_DIR, name)
+        manifest = _read_manifest(target_dir)
+        if manifest is None or manifest.get("source") != stamp:
+            try:
+                manifest = convert(name, target_dir)
+            except OSError as e:
+                # Read-only data folder: fall back to parsing the CSV every start
+                print(f"Could not write columnar copy of {name}: {e}")
+                df = read_source(name)
+                _frames[name], _stamps[name] = df, stamp
+                return df
+
+        df = read_columnar(target_dir, manifest)
+        _frames[name], _stamps[name] = df, stamp
+        return df
+
+
+def dataset_path(name):
+    return DATASETS[name]["path"]
+
+
+def dataset_stamp(name):
+    """mtime/size of dataset `name`'s CSV, compared to detect a new version."""
+    return _source_stamp(DATASETS[name]["path"])
+
+
+@contextmanager
+def updating():
+    """Hold off loads while CSVs are being appended to and their shared frames extended."""
+    with _lock:
+        yield
+
+
+def on_append(name, callback):
+    """Call `callback(frame, rows)` after rows are appended to dataset `name`."""
+    _listeners.setdefault(name, []).append(callback)
+
+
+def _extend(frame, rows):
+    """`frame` with `rows` appended, keeping its dtypes (categoricals keep their existing codes)."""
+    rows = rows[list(frame.columns)].copy()
+    for col in frame.columns:
+        dtype = frame[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            values = rows[col].astype(str)
+            new = pd.unique(values[~values.isin(dtype.categories)])
+            categories = dtype.categories.append(pd.Index(new, dtype=dtype.categories.dtype))
+            rows[col] = pd.Categorical(values, categories=categories)
+            frame = frame.assign(**{col: frame[col].cat.set_categories(categories)})
+        else:
+            rows[col] = rows[col].astype(dtype)
+    return pd.concat([frame, rows], ignore_index=True)
+
+
+def append_rows(name, rows):
+    """
+    Extend the shared frame of `name` with rows just appended to its CSV.
+
+    The new frame replaces the old one in a single assignment, so readers
+    see either version; the columnar copy is rebuilt on the next cold start
+    since the CSV stamp no longer matches it. Listeners are told about the
+    swap afterwards.
+    """
+    spec = DATASETS[name]
+    with _lock:
+        frame = _frames.get(name)
+        if frame is None:
+            frame = read_source(name)
+        else:
+            frame = _extend(frame, rows)
+            if "order" in spec:
+                frame = frame.sort_values(spec["order"], kind="stable").reset_index(drop=True)
+        _frames[name], _stamps[name] = frame, _source_stamp(spec["path"])
+    for callback in _listeners.get(name, []):
+        callback(frame, rows)
+    return frame
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """
+    Binary-search index over a date column.
+
+    `dates` must be sorted ascending (duplicates allowed, e.g. one row per
+    series per day). Point lookups and inclusive ranges resolve to row
+    positions with `searchsorted`, and range completeness is checked against
+    the precomputed distinct days, so nothing scans the whole column.
+    """
+
+    def __init__(self, dates):
+        self.values = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+        if len(self.values) and (np.diff(self.values) < np.timedelta64(0, "ns")).any():
+            raise ValueError("DateIndex requires dates sorted in ascending order")
+        self.days = np.unique(self.values.astype("datetime64[D]"))
+        self.present_dates = set(self.days.tolist())
+
+    @staticmethod
+    def parse(value):
+        """Parse a date string into datetime64[D], or None if it isn't a calendar day."""
+        if isinstance(value, str) and len(value) == 10:
+            # Fast path for ISO days (YYYY-MM-DD), the format every route uses
+            try:
+                return np.datetime64(value, "D")
+            except ValueError:
+                pass
+        try:
+            ts = pd.to_datetime(value)
+        except (ValueError, TypeError, OverflowError):
+            return None
+        if pd.isnull(ts) or ts != ts.normalize():
+            return None
+        return np.datetime64(ts.date(), "D")
+
+    def __contains__(self, day):
+        return day is not None and day.astype(object) in self.present_dates
+
+    def bounds(self, start, end):
+        """Row positions [lo, hi) for the inclusive day range [start, end]."""
+        lo = np.searchsorted(self.values, start.astype("datetime64[ns]"), side="left")
+        hi = np.searchsorted(self.values, (end + 1).astype("datetime64[ns]"), side="left")
+        return int(lo), int(hi)
+
+    def locate(self, day):
+        """Row positions [lo, hi) for a single day."""
+        return self.bounds(day, day)
+
+    def count_days(self, start, end):
+        """Number of distinct days present in the inclusive range [start, end]."""
+        lo = np.searchsorted(self.days, start, side="left")
+        hi = np.searchsorted(self.days, end, side="right")
+        return int(hi - lo)
+
+    def is_complete(self, start, end):
+        """True when every day from start to end (inclusive) has data."""
+        expected = int((end - start).astype(int)) + 1
+        return expected > 0 and self.count_days(start, end) == expected
@@ -0,0 +1,245 @@
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from services.forecast_engine import get_feature_cols, Z_SCORE
+from services.metrics import timed
+from services.retraining import _evaluate, limit_threads
+
+# Each training pair needs its target `horizon` days after the origin row, so the longest
+# horizon is bounded by the history length (90 days per series in enhanced_features.csv).
+MAX_HORIZON = int(os.environ.get("DIRECT_MAX_HORIZON", 30))
+HOLDOUT_SHARE = 0.2
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+DIRECT_MODEL_DIR = os.path.join(BASE_DIR, "backend", "models", "direct_models")
+BEST_MODEL_DIR = os.path.join(BASE_DIR, "backend", "models", "backtested_models")
+TARGETS = ["usage_cpu", "usage_storage", "users_active"]
+
+
+def target_calendar(dates):
+    """Calendar features of the forecast target dates, as laid out in enhanced_features.csv."""
+    dates = pd.DatetimeIndex(dates)
+    dayofweek = dates.dayofweek.to_numpy(dtype=np.float64)
+    calendar = {
+        "dayofweek": dayofweek,
+        "month": dates.month.to_numpy(dtype=np.float64),
+        "weekofyear": dates.isocalendar().week.to_numpy(dtype=np.float64),
+        "dayofmonth": dates.day.to_numpy(dtype=np.float64),
+        "quarter": dates.quarter.to_numpy(dtype=np.float64),
+        "is_weekend": (dayofweek >= 5).astype(np.float64),
+    }
+    for k in [1, 2, 3]:
+        calendar[f"sin_week_{k}"] = np.sin(2 * np.pi * k * dayofweek / 7)
+        calendar[f"cos_week_{k}"] = np.cos(2 * np.pi * k * dayofweek / 7)
+    return calendar
+
+
+def direct_feature_cols(columns, target_col):
+    """Origin-row features plus the horizon and the origin's own target value."""
+    return get_feature_cols(columns) + ["horizon", f"{target_col}_current"]
+
+
+def direct_rows(origin, origin_dates, target_col, horizons, feature_cols):
+    """
+    One feature row per (origin, horizon) pair.
+
+    `origin` holds the origin rows' columns as arrays (one entry per pair);
+    calendar columns are replaced by those of origin date + horizon.
+    """
+    rows = {col: origin[col] for col in get_feature_cols(origin.keys())}
+    rows[f"{target_col}_current"] = origin[target_col]
+    rows["horizon"] = horizons.astype(np.float64)
+    target_dates = pd.DatetimeIndex(origin_dates) + pd.to_timedelta(horizons, unit="D")
+    for col, values in target_calendar(target_dates).items():
+        if col in rows:
+            rows[col] = values
+    return pd.DataFrame({col: rows[col] for col in feature_cols}), target_dates
+
+
+def training_pairs(df, target_col, max_horizon=MAX_HORIZON):
+    """
+    Stack every (origin row, horizon) pair with a known target, per unique_id series.
+
+    Returns (X, y, target dates, horizons).
+    """
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values(["unique_id", "date"], kind="stable").reset_index(drop=True)
+    feature_cols = direct_feature_cols(df.columns, target_col)
+
+    values = df[target_col].to_numpy(dtype=np.float64)
+    series = df["unique_id"].to_numpy()
+    dates = df["date"].to_numpy()
+    n = len(df)
+
+    origins, horizons = [], []
+    for h in range(1, max_horizon + 1):
+        idx = np.arange(n - h)
+        # Both ends of the pair must belong to the same series
+        valid = idx[series[idx] == series[idx + h]]
+        origins.append(valid)
+        horizons.append(np.full(len(valid), h))
+    origins = np.concatenate(origins)
+    horizons = np.concatenate(horizons)
+
+    origin = {col: df[col].to_numpy()[origins] for col in df.columns if col != "date"}
+    X, target_dates = direct_rows(origin, dates[origins], target_col, horizons, feature_cols)
+    y = pd.Series(values[origins + horizons])
+    return X.fillna(0), y, target_dates, horizons
+
+
+def train_direct_model(base_model, target_col, df, max_horizon=MAX_HORIZON, n_threads=None):
+    """
+    Fit one horizon-conditioned model for horizons 1..max_horizon.
+
+    `base_model`'s hyperparameters are reused. The model is first scored on
+    the pairs whose target falls in the last HOLDOUT_SHARE of dates (giving
+    per-horizon residual spread for the intervals), then refit on every pair.
+    Returns a bundle dict to be pickled.
+    """
+    start = time.perf_counter()
+    X, y, target_dates, horizons = training_pairs(df, target_col, max_horizon)
+    cutoff = target_dates.sort_values()[int(len(target_dates) * (1 - HOLDOUT_SHARE))]
+    holdout = np.asarray(target_dates >= cutoff)
+
+    model = clone(base_model)
+    # Early stopping needs a validation set these fits don't have
+    if "early_stopping_rounds" in model.get_params():
+        model.set_params(early_stopping_rounds=None)
+    limit_threads(model, n_threads)
+
+    model.fit(X[~holdout], y[~holdout])
+    metrics = _evaluate(model, X[holdout], y[holdout])
+    errors = model.predict(X[holdout]) - y[holdout].to_numpy()
+    residual_std = np.array([
+        np.std(errors[horizons[holdout] == h]) if np.any(horizons[holdout] == h) else np.nan
+        for h in range(1, max_horizon + 1)
+    ])
+    # Horizons without holdout pairs reuse the nearest shorter horizon's spread
+    residual_std = pd.Series(residual_std).ffill().fillna(float(np.std(errors))).to_numpy()
+
+    model = clone(model)
+    model.fit(X, y)
+    return {
+        "model": model,
+        "target": target_col,
+        "feature_cols": list(X.columns),
+        "max_horizon": max_horizon,
+        "residual_std": residual_std,
+        "holdout_metrics": {k: float(v) for k, v in metrics.items()},
+        "trained_through": pd.to_datetime(df["date"]).max(),
+        "train_pairs": len(X),
+        "train_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+# ---------- Saved bundles ----------
+def bundle_path(target_col, model_dir=DIRECT_MODEL_DIR):
+    return os.path.join(model_dir, f"{target_col}_direct_model.pkl")
+
+
+def save_bundle(bundle, path):
+    """
+    Write `bundle` to `path` atomically.
+
+    Every writer dumps to its own temp file in the same folder, so
+    concurrent writers never replace `path` with a partly written file.
+    """
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(bundle, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def model_file_stamp(path):
+    """(mtime, size) of the base model file a bundle was trained from; the same in every worker."""
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def is_current(bundle, df, base_stamp):
+    """Whether `bundle` was trained from the base model stamped `base_stamp` through the last date of `df`."""
+    return bundle.get("base_model") == base_stamp and bundle["trained_through"] >= pd.to_datetime(df["date"]).max()
+
+
+class DirectForecaster:
+    """
+    Direct multi-horizon forecaster: every day of the horizon is predicted
+    from the last history row in one batched `predict`, with no feedback
+    of earlier predictions. Output records match RecursiveForecaster.
+    """
+
+    def __init__(self, bundle, target_col, df):
+        if df.empty:
+            raise ValueError("Cannot forecast from an empty history")
+        self.bundle = bundle
+        self.target_col = target_col
+        last = df.iloc[-1]
+        self.origin = {col: last[col] for col in df.columns if col != "date"}
+        self.last_date = pd.to_datetime(df["date"]).max()
+
+    def forecast(self, horizon=30):
+        if horizon > self.bundle["max_horizon"]:
+            raise ValueError(f"Direct model covers horizons up to {self.bundle['max_horizon']} days")
+        horizons = np.arange(1, horizon + 1)
+        origin = {col: np.repeat(value, horizon) for col, value in self.origin.items()}
+        X, dates = direct_rows(origin, np.repeat(self.last_date, horizon), self.target_col,
+                               horizons, self.bundle["feature_cols"])
+        with timed("predict"):
+            preds = np.asarray(self.bundle["model"].predict(X.fillna(0)), dtype=np.float64)
+        spread = Z_SCORE * self.bundle["residual_std"][:horizon]
+
+        upper = preds + spread
+        if self.target_col == "usage_cpu":
+            upper = np.minimum(upper, 100)
+        lower = np.maximum(preds - spread, 0)
+
+        return [
+            {
+                "date": date.strftime("%Y-%m-%d"),
+                "predicted": float(pred),
+                "lower_95": float(lo),
+                "upper_95": float(hi)
+            }
+            for date, pred, lo, hi in zip(dates, preds, lower, upper)
+        ]
+
+
+def main():
+    """Train and save the direct models offline from the best models and enhanced_features."""
+    from services.data_store import load_dataset
+
+    parser = argparse.ArgumentParser(description="Train the direct multi-horizon models")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma-separated target columns")
+    parser.add_argument("--models", default=BEST_MODEL_DIR, help="folder with <target>_best_model.pkl")
+    parser.add_argument("--out", default=DIRECT_MODEL_DIR)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    df = load_dataset("enhanced_features")
+    for target in args.targets.split(","):
+        model_path = os.path.join(args.models, f"{target}_best_model.pkl")
+        bundle = train_direct_model(joblib.load(model_path), target, df, n_threads=args.threads)
+        bundle["base_model"] = model_file_stamp(model_path)
+        path = bundle_path(target, args.out)
+        save_bundle(bundle, path)
+        print(f"{target}: {bundle['train_pairs']} pairs in {bundle['train_seconds']} s, "
+              f"holdout MAE {bundle['holdout_metrics']['MAE']:.2f} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
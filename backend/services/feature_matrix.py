@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from services.date_index import DateIndex
+from services.forecast_engine import get_feature_cols
+from services.metrics import timed
+
+TARGET_COLS = ["usage_cpu", "usage_storage", "users_active"]
+
+
+class FeatureMatrix:
+    """
+    Model inputs of enhanced_features.csv decoded once for batched prediction.
+
+    Features are kept as one float32 matrix in the file's row order (models
+    cast to float32 internally, so predictions match the DataFrame path).
+    A stable date-sorted permutation backs a DateIndex, so a date window
+    resolves to row positions with two binary searches instead of a scan.
+    """
+
+    def __init__(self, df):
+        self.feature_cols = get_feature_cols(df.columns)
+        self.X = df[self.feature_cols].to_numpy(dtype=np.float32)
+        self.targets = {col: df[col].to_numpy(dtype=np.float64) for col in TARGET_COLS if col in df.columns}
+        dates = pd.to_datetime(df["date"])
+        self.dates = dates.dt.strftime("%Y-%m-%d").to_numpy()
+        self.months = dates.dt.month.to_numpy()
+        self.regions = df["region_encoded"].to_numpy()
+        self.unique_ids = df["unique_id"].to_numpy()
+
+        self.by_date = np.argsort(dates.to_numpy(), kind="stable")
+        self.index = DateIndex(dates.to_numpy()[self.by_date])
+
+    def __len__(self):
+        return len(self.X)
+
+    def window(self, start=None, end=None, region=None):
+        """Row positions (date order) with start <= date <= end, optionally for one region."""
+        lo = 0 if start is None else self.index.bounds(start, start)[0]
+        hi = len(self) if end is None else self.index.bounds(end, end)[1]
+        positions = self.by_date[lo:hi]
+        if region is not None:
+            positions = positions[self.regions[positions] == region]
+        return positions
+
+    def month(self, month):
+        """Row positions (file order) in calendar month `month` of any year."""
+        return np.flatnonzero(self.months == month)
+
+    def predict(self, model, target_col, positions):
+        """
+        One batched `predict` over the selected rows, in columnar form:
+        {"date", "unique_id", "region", "actual", "predicted"} lists.
+        """
+        with timed("predict"):
+            predicted = model.predict(self.X[positions]) if len(positions) else np.empty(0)
+        return {
+            "date": self.dates[positions].tolist(),
+            "unique_id": self.unique_ids[positions].tolist(),
+            "region": self.regions[positions].tolist(),
+            "actual": self.targets[target_col][positions].tolist(),
+            "predicted": np.asarray(predicted, dtype=np.float64).tolist(),
+        }
@@ -0,0 +1,511 @@
+"""
+Feature pipeline: Data/Raw -> cleaned_merged.csv, insights.csv,
+feature_engineered.csv and enhanced_features.csv without the notebooks.
+
+Raw usage is read in chunks that always hold whole days, so the cleaning,
+merge and per-day aggregates of a chunk never depend on another chunk and
+chunks are fanned out to a process pool; only a bounded number of chunks
+is in flight at once. Aggregates are grouped NumPy reductions over the
+day-sorted chunk; the only Python loops are the per-day string formatting
+of the dict/list columns. Run from the backend folder:
+    python -m services.feature_pipeline --out ../Data/rebuilt
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+RAW_DIR = os.path.join(BASE_DIR, "Data", "Raw")
+
+CHUNK_ROWS = int(os.environ.get("FEATURE_CHUNK_ROWS", 250_000))
+
+USAGE_COLS = ["date", "region", "resource_type", "usage_cpu", "usage_storage", "users_active"]
+FACTOR_COLS = ["date", "economic_index", "cloud_market_demand", "holiday"]
+# Series that get lag / rolling columns in enhanced_features.csv (data_prep notebook)
+FEATURE_TARGETS = ["usage_cpu", "usage_storage", "users_active", "storage_efficiency"]
+LAGS = [1, 7, 14]
+WINDOWS = [7, 14]
+FOURIER_K = 3
+DAILY_STATS = {"cpu": "usage_cpu", "storage": "usage_storage", "users": "users_active"}
+FIRST_COLS = ["economic_index", "cloud_market_demand", "holiday"]
+
+
+# ---------- Cleaning (Data_Cleaning notebook) ----------
+def clean_usage(df):
+    df = df[USAGE_COLS].copy()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["region"] = df["region"].astype(str).str.strip().str.lower()
+    df["resource_type"] = df["resource_type"].astype(str).str.strip().str.lower()
+    return df.drop_duplicates()
+
+
+def clean_factors(df):
+    df = df[FACTOR_COLS].copy()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df.drop_duplicates()
+
+
+def clean_merge(usage, factors, period=None):
+    """
+    cleaned_merged.csv rows for raw usage rows; `factors` must already be cleaned.
+    With `period`, sub-daily usage joins the factors of its (floored) day.
+    """
+    usage = clean_usage(usage)
+    if period is None:
+        return pd.merge(usage, factors, on="date", how="inner")
+    keyed = usage.assign(_period=usage["date"].dt.floor(period))
+    merged = pd.merge(keyed, factors.rename(columns={"date": "_period"}), on="_period", how="inner")
+    return merged.drop(columns="_period")
+
+
+def date_chunks(chunks, period=None):
+    """
+    Re-cut a stream of date-ordered frames so every frame holds whole days
+    (or whole `period`s): the rows of a chunk's last day are carried over to
+    the next one. Raises ValueError if a day reappears after it was emitted.
+    """
+    carry = None
+    emitted_through = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        days = _period_keys(pd.to_datetime(chunk["date"], errors="coerce"), period)
+        last = days.max()
+        if emitted_through is not None and days.min() <= emitted_through:
+            raise ValueError("Input rows must be ordered by date")
+        done = (days < last).to_numpy() | days.isna().to_numpy()
+        if done.any():
+            yield chunk[done].reset_index(drop=True)
+            emitted_through = days[done].max()
+        carry = chunk[~done]
+    if carry is not None and len(carry):
+        yield carry.reset_index(drop=True)
+
+
+def _period_keys(dates, period):
+    return dates if period is None else dates.dt.floor(period)
+
+
+# ---------- Daily aggregates (time_based notebook) ----------
+def _group_layout(keys):
+    """Sorted unique keys plus the stable permutation and run boundaries that group rows by key."""
+    codes, uniques = pd.factorize(keys, sort=True)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) else np.empty(0, int)
+    counts = np.diff(np.r_[starts, len(order)])
+    return uniques, order, starts, counts
+
+
+def _mean_std(values, starts, counts):
+    """Per-group NaN-skipping mean and sample std (ddof=1), two-pass like pandas."""
+    valid = ~np.isnan(values)
+    n = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.add.reduceat(np.where(valid, values, 0.0), starts) / n
+        dev = np.where(valid, values - np.repeat(mean, counts), 0.0)
+        std = np.sqrt(np.add.reduceat(dev * dev, starts) / (n - 1))
+    std[n < 2] = np.nan
+    return mean, std
+
+
+def _first_valid(values, starts, counts, valid):
+    """Per-group first non-null value (pandas' "first" aggregation)."""
+    positions = np.where(valid, np.arange(len(values)), len(values))
+    first = np.minimum.reduceat(positions, starts)
+    found = first < np.r_[starts[1:], len(values)]
+    out = np.full(len(starts), np.nan)
+    out[found] = values[first[found]]
+    return out
+
+
+def _extreme_positions(values, starts, counts, side):
+    """Per-group position of the first minimum / maximum (idxmin / idxmax keep the first of a tie)."""
+    reduce = np.fmin if side == "min" else np.fmax
+    best = reduce.reduceat(values, starts)
+    hit = values == np.repeat(best, counts)
+    return np.minimum.reduceat(np.where(hit, np.arange(len(values)), len(values)), starts)
+
+
+def _first_occurrences(group_codes, *codes):
+    """Positions of the first row of every distinct (group, codes...) combination, ordered by group then appearance."""
+    keys = np.stack((group_codes,) + codes, axis=1)
+    _, first = np.unique(keys, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def daily_aggregates(merged, period=None):
+    """
+    feature_engineered.csv rows for the days in `merged`: per-day mean / total /
+    std of cpu, storage and users, the day's external factors, region and
+    record counts, min/max extremes and the active regions and resources.
+    `period` (e.g. "D") floors timestamps first, for sub-daily telemetry.
+    """
+    merged = merged.reset_index(drop=True)
+    days, order, starts, counts = _group_layout(_period_keys(pd.to_datetime(merged["date"]), period))
+    n_days = len(days)
+    out = {"date": days}
+    if n_days == 0:
+        return pd.DataFrame(out)
+
+    for name, col in DAILY_STATS.items():
+        raw = merged[col].to_numpy()[order]
+        values = raw.astype(np.float64)
+        mean, std = _mean_std(values, starts, counts)
+        out[f"{name}_mean"] = np.round(mean, 2)
+        out[f"{name}_tot"] = np.add.reduceat(raw, starts) if raw.dtype.kind in "iu" else \
+            np.round(np.add.reduceat(np.nan_to_num(values), starts), 2)
+        out[f"{name}_std"] = np.round(std, 2)
+    for col in FIRST_COLS:
+        raw = merged[col].to_numpy()[order]
+        values = _first_valid(raw.astype(np.float64), starts, counts, ~pd.isna(raw))
+        out[col] = values.astype(raw.dtype) if raw.dtype.kind in "iu" else np.round(values, 2)
+
+    group = np.repeat(np.arange(n_days), counts)
+    regions = merged["region"].to_numpy(dtype=object)[order]
+    resources = merged["resource_type"].to_numpy(dtype=object)[order]
+    region_codes, region_names = pd.factorize(regions, sort=True)
+    resource_codes, resource_names = pd.factorize(resources, sort=True)
+
+    pairs = _first_occurrences(group, region_codes)
+    pairs = pairs[region_codes[pairs] >= 0]
+    out["unique_regions"] = np.bincount(group[pairs], minlength=n_days)
+    out["total_records"] = np.add.reduceat((resource_codes >= 0).astype(np.int64), starts)
+
+    extremes = {}
+    for name, col in DAILY_STATS.items():
+        values = merged[col].to_numpy(dtype=np.float64)[order]
+        sides = {side: _extreme_positions(values, starts, counts, side) for side in ("min", "max")}
+        extremes[name] = [
+            str({
+                side: {"value": round(float(values[pos[d]]), 2), "region": regions[pos[d]], "resource": resources[pos[d]]}
+                for side, pos in sides.items()
+            })
+            for d in range(n_days)
+        ]
+    out.update(extremes)
+
+    # Active regions in order of first appearance within the day, printed as a NumPy array
+    day_bounds = np.searchsorted(group[pairs], np.arange(n_days + 1))
+    out["active_regions"] = [
+        str(np.array(list(regions[pairs[day_bounds[d]:day_bounds[d + 1]]]), dtype=object)) for d in range(n_days)
+    ]
+
+    # Resources per region: regions in name order, resources in order of first appearance
+    triples = _first_occurrences(group, region_codes, resource_codes)
+    triples = triples[(region_codes[triples] >= 0) & (resource_codes[triples] >= 0)]
+    triples = triples[np.lexsort((triples, region_codes[triples], group[triples]))]
+    triple_bounds = np.searchsorted(group[triples], np.arange(n_days + 1))
+    per_region = []
+    for d in range(n_days):
+        mapping = {}
+        for pos in triples[triple_bounds[d]:triple_bounds[d + 1]]:
+            mapping.setdefault(regions[pos], []).append(resources[pos])
+        per_region.append(str(mapping))
+    out["resources_per_region"] = per_region
+    return pd.DataFrame(out)
+
+
+# ---------- Insights (time_based notebook) ----------
+def storage_columns(df, allocated):
+    """Add storage_allocated (the series' maximum usage_storage) and storage_efficiency."""
+    keys = pd.MultiIndex.from_arrays([df["region"], df["resource_type"]])
+    allocation = pd.Series(allocated).reindex(keys).to_numpy()
+    df = df.copy()
+    df["storage_allocated"] = allocation.astype(df["usage_storage"].dtype)
+    df["storage_efficiency"] = (df["usage_storage"] / df["storage_allocated"] * 100).round(2)
+    return df
+
+
+def storage_maxima(df):
+    """{(region, resource_type): max usage_storage} of a frame, to be combined across chunks."""
+    return df.groupby(["region", "resource_type"], sort=False)["usage_storage"].max().to_dict()
+
+
+# ---------- Model features (data_prep notebook) ----------
+def _series_first_row(ids):
+    """For rows grouped by series, the position of each row's series' first row."""
+    n = len(ids)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    return np.repeat(starts, np.diff(np.r_[starts, n]))
+
+
+def _lag(values, first_row, lag):
+    out = np.full(len(values), np.nan)
+    positions = np.arange(len(values))
+    ok = positions - lag >= first_row
+    out[ok] = values[positions[ok] - lag]
+    return out
+
+
+def _series_means(values, missing, bounds):
+    """
+    NaN-skipping mean of each series slice bounds[i]:bounds[i + 1], summed the
+    way Series.mean does (pairwise over the zero-filled slice) so filled values
+    match the notebook to the last bit.
+    """
+    filled = np.where(missing, 0.0, values)
+    counts = np.add.reduceat((~missing).astype(np.int64), bounds[:-1])
+    sums = np.array([filled[lo:hi].sum() for lo, hi in zip(bounds[:-1], bounds[1:])])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def series_features(frame, targets=FEATURE_TARGETS, lags=LAGS, windows=WINDOWS, legacy_positions=None):
+    """
+    Lag and shifted rolling mean/std columns for rows grouped by unique_id and
+    ordered by date within each series.
+
+    Lags never cross series. Rolling windows are per series unless
+    `legacy_positions` is given: the notebook rolled over the whole sorted
+    frame and assigned the result by index label, so row q received the
+    window ending at sorted position legacy_positions[q] (its row label in
+    insights.csv). That reproduces the stored enhanced_features.csv.
+    """
+    ids = frame["unique_id"].to_numpy()
+    first_row = _series_first_row(ids)
+    columns = {}
+    for col in targets:
+        values = frame[col].to_numpy(dtype=np.float64)
+        for lag in lags:
+            columns[f"{col}_lag_{lag}"] = _lag(values, first_row, lag)
+        shifted = pd.Series(_lag(values, first_row, 1))
+        for window in windows:
+            if legacy_positions is None:
+                rolling = shifted.groupby(ids, sort=False).rolling(window=window, min_periods=1)
+            else:
+                rolling = shifted.rolling(window=window, min_periods=1)
+            mean = rolling.mean().to_numpy()
+            std = rolling.std().to_numpy()
+            if legacy_positions is not None:
+                mean, std = mean[legacy_positions], std[legacy_positions]
+            columns[f"{col}_roll_mean_{window}"] = mean
+            columns[f"{col}_roll_std_{window}"] = std
+    return columns
+
+
+def model_features(insights, regions=None, resources=None, legacy_rolling=True,
+                   targets=FEATURE_TARGETS, lags=LAGS, windows=WINDOWS, fourier_k=FOURIER_K):
+    """
+    enhanced_features.csv rows for an insights frame (data_prep's create_features).
+
+    `regions` / `resources` fix the category encodings when the frame is
+    only part of the table (default: the values present, in name order).
+    With legacy_rolling, rolling windows are assigned the way the notebook
+    did (see series_features), which needs the whole table in file order.
+    """
+    df = insights.reset_index(drop=True)
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.sort_values(["region", "resource_type", "date"])
+
+    df["region_encoded"] = pd.Categorical(df["region"], categories=regions).codes
+    df["resource_type_encoded"] = pd.Categorical(df["resource_type"], categories=resources).codes
+    df["unique_id"] = df["region_encoded"].astype(str) + "_" + df["resource_type_encoded"].astype(str)
+
+    df["dayofweek"] = df["date"].dt.dayofweek
+    df["month"] = df["date"].dt.month
+    df["weekofyear"] = df["date"].dt.isocalendar().week.astype(int)
+    df["dayofmonth"] = df["date"].dt.day
+    df["quarter"] = df["date"].dt.quarter
+    df["is_weekend"] = (df["dayofweek"] >= 5).astype(int)
+
+    legacy_positions = df.index.to_numpy() if legacy_rolling else None
+    features = series_features(df, targets, lags, windows, legacy_positions)
+    fourier = {}
+    for k in range(1, fourier_k + 1):
+        fourier[f"sin_week_{k}"] = np.sin(2 * np.pi * k * df["dayofweek"] / 7)
+        fourier[f"cos_week_{k}"] = np.cos(2 * np.pi * k * df["dayofweek"] / 7)
+    df = pd.concat([df, pd.DataFrame(features, index=df.index), pd.DataFrame(fourier, index=df.index)], axis=1)
+
+    # Gaps (first rows of each series) take the column's mean over the series
+    bounds = np.flatnonzero(np.r_[True, df["unique_id"].to_numpy()[1:] != df["unique_id"].to_numpy()[:-1], True])
+    for col in df.select_dtypes(include=[np.number]).columns:
+        values = df[col].to_numpy()
+        missing = np.isnan(values) if values.dtype.kind == "f" else None
+        if missing is not None and missing.any():
+            df[col] = np.where(missing, np.repeat(_series_means(values, missing, bounds), np.diff(bounds)), values)
+
+    return df.drop(columns=["region", "resource_type"])
+
+
+# ---------- Pipeline ----------
+# Workers return CSV text: float formatting is most of the cost of writing
+# these tables, so it is done in parallel and the parent only appends bytes.
+_factors = None
+
+
+def _init_worker(factors):
+    global _factors
+    _factors = factors
+
+
+def _csv(df, header):
+    return df.to_csv(index=False, header=header)
+
+
+def _merge_chunk(usage, period, header):
+    merged = clean_merge(usage, _factors, period)
+    return (
+        _csv(merged, header),
+        _csv(daily_aggregates(merged, period), header),
+        storage_maxima(merged),
+        merged["region"].value_counts().to_dict(),
+    )
+
+
+def _insights_chunk(cleaned, allocated, header):
+    return _csv(storage_columns(cleaned, allocated), header)
+
+
+def _features_bucket(path, regions, resources, header):
+    return _csv(model_features(pd.read_csv(path), regions, resources, legacy_rolling=False), header)
+
+
+def _ordered_map(pool, fn, tasks, max_in_flight):
+    """Like pool.map, but at most `max_in_flight` tasks are submitted ahead of the one being consumed."""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, *task))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _InlinePool:
+    """Runs tasks in the calling process when one worker is requested."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _pool(workers, factors):
+    if workers <= 1:
+        _init_worker(factors)
+        return _InlinePool()
+    # spawn, not fork: forking a process whose OpenMP runtime is initialised can deadlock
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(factors,),
+    )
+
+
+def _region_buckets(region_rows, chunk_rows):
+    """Consecutive regions (in encoding order) grouped into buckets of about chunk_rows rows."""
+    buckets, size = [[]], 0
+    for region in sorted(region_rows):
+        if size and size + region_rows[region] > chunk_rows:
+            buckets.append([])
+            size = 0
+        buckets[-1].append(region)
+        size += region_rows[region]
+    return buckets
+
+
+def build_tables(out_dir, raw_dir=RAW_DIR, chunk_rows=CHUNK_ROWS, workers=None, period=None, legacy_rolling=True):
+    """
+    Rebuild cleaned_merged.csv, insights.csv, feature_engineered.csv and
+    enhanced_features.csv in `out_dir` from the raw files.
+
+    1. Raw usage is read in whole-day chunks; workers clean them, merge the
+       external factors and aggregate per day, and the results are appended
+       in order while per-series storage maxima accumulate.
+    2. cleaned_merged.csv is streamed again to add the storage columns.
+    3. Model features are computed per series. With legacy_rolling (default,
+       reproduces today's file) this holds the insights table in memory;
+       otherwise rows are bucketed by region into temporary files of about
+       `chunk_rows` rows and the buckets are featurized by the workers.
+
+    At most workers + 1 chunks are in flight, so peak memory follows
+    chunk_rows rather than the input size, except for the legacy
+    model-feature step. Returns {table name: output path}.
+    """
+    workers = workers or max(1, os.cpu_count() or 1)
+    in_flight = workers + 1
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, f"{name}.csv")
+             for name in ["cleaned_merged", "insights", "feature_engineered", "enhanced_features"]}
+    factors = clean_factors(pd.read_csv(os.path.join(raw_dir, "external_factors.csv")))
+
+    maxima, region_rows = {}, {}
+    with _pool(workers, factors) as pool:
+        reader = pd.read_csv(os.path.join(raw_dir, "azure_usage.csv"), chunksize=chunk_rows)
+        tasks = ((chunk, period, i == 0) for i, chunk in enumerate(date_chunks(reader, period)))
+        with open(paths["cleaned_merged"], "w", newline="") as cleaned_out, \
+                open(paths["feature_engineered"], "w", newline="") as daily_out:
+            for cleaned, daily, chunk_maxima, chunk_regions in _ordered_map(pool, _merge_chunk, tasks, in_flight):
+                cleaned_out.write(cleaned)
+                daily_out.write(daily)
+                for key, value in chunk_maxima.items():
+                    maxima[key] = max(maxima.get(key, value), value)
+                for region, count in chunk_regions.items():
+                    region_rows[region] = region_rows.get(region, 0) + int(count)
+
+        reader = pd.read_csv(paths["cleaned_merged"], chunksize=chunk_rows)
+        tasks = ((chunk, maxima, i == 0) for i, chunk in enumerate(reader))
+        with open(paths["insights"], "w", newline="") as insights_out:
+            for text in _ordered_map(pool, _insights_chunk, tasks, in_flight):
+                insights_out.write(text)
+
+        regions = sorted(region_rows)
+        resources = sorted({resource for _, resource in maxima})
+        if legacy_rolling:
+            features = model_features(pd.read_csv(paths["insights"]), regions, resources)
+            features.to_csv(paths["enhanced_features"], index=False)
+            return paths
+
+        buckets = _region_buckets(region_rows, chunk_rows)
+        bucket_of = {region: i for i, bucket in enumerate(buckets) for region in bucket}
+        tmp_dir = tempfile.mkdtemp(dir=out_dir)
+        try:
+            bucket_paths = [os.path.join(tmp_dir, f"{i}.csv") for i in range(len(buckets))]
+            for i, chunk in enumerate(pd.read_csv(paths["insights"], chunksize=chunk_rows)):
+                for b, rows in chunk.groupby(chunk["region"].map(bucket_of), sort=True):
+                    rows.to_csv(bucket_paths[b], mode="a", header=not os.path.exists(bucket_paths[b]), index=False)
+            tasks = ((path, regions, resources, i == 0) for i, path in enumerate(bucket_paths))
+            with open(paths["enhanced_features"], "w", newline="") as features_out:
+                for text in _ordered_map(pool, _features_bucket, tasks, in_flight):
+                    features_out.write(text)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the processed feature tables from Data/Raw")
+    parser.add_argument("--out", required=True, help="output folder")
+    parser.add_argument("--raw", default=RAW_DIR, help="folder with azure_usage.csv and external_factors.csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--period", default=None, help='floor timestamps to this period for the daily aggregates, e.g. "D"')
+    parser.add_argument("--per-series-rolling", action="store_true",
+                        help="roll windows within each series (bounded memory) instead of the notebook's layout")
+    args = parser.parse_args()
+    paths = build_tables(args.out, args.raw, args.chunk_rows, args.workers, args.period,
+                         legacy_rolling=not args.per_series_rolling)
+    for name, path in paths.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import ast
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def parse_json_field(value):
+    """Parse JSON, numpy-style arrays, or leave as-is."""
+    if isinstance(value, str):
+        value = value.strip()
+
+        # Case 1: Looks like JSON object or list
+        if value.startswith("{") or value.startswith("["):
+            try:
+                return json.loads(value.replace("'", '"'))
+            except Exception:
+                try:
+                    return ast.literal_eval(value)
+                except Exception:
+                    pass
+
+        # Case 2: NumPy-like array: ['east us' 'west us']
+        if value.startswith("[") and "'" in value and " " in value:
+            try:
+                items = re.findall(r"'([^']+)'", value)
+                return items
+            except Exception:
+                pass
+
+    return value
+
+
+def _as_extreme(entry):
+    """(value, region, resource) for a well-formed {'value', 'region', 'resource'} dict, else None."""
+    if not isinstance(entry, dict) or set(entry) != {"value", "region", "resource"}:
+        return None
+    value = entry["value"]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value), entry["region"], entry["resource"]
+
+
+class ExtremesColumn:
+    """
+    A `{'min': {...}, 'max': {...}}` column decoded once into typed arrays.
+
+    Each side is stored as float64 values plus categorical codes for region
+    and resource (-1 where the side is missing). Cells that don't follow that
+    shape keep their parsed value so point lookups still return it verbatim.
+    """
+
+    SIDES = ("min", "max")
+
+    def __init__(self, raw_values):
+        n = len(raw_values)
+        self.values = {side: np.full(n, np.nan) for side in self.SIDES}
+        regions = {side: [None] * n for side in self.SIDES}
+        resources = {side: [None] * n for side in self.SIDES}
+        self.irregular = {}
+
+        for pos, raw in enumerate(raw_values):
+            parsed = parse_json_field(raw)
+            if not isinstance(parsed, dict) or not set(parsed) <= set(self.SIDES):
+                self.irregular[pos] = parsed
+                continue
+            for side in self.SIDES:
+                if side not in parsed:
+                    continue
+                extreme = _as_extreme(parsed[side])
+                if extreme is None:
+                    self.irregular[pos] = parsed
+                    break
+                self.values[side][pos], regions[side][pos], resources[side][pos] = extreme
+
+        labels = pd.unique(pd.Series([r for side in self.SIDES for r in regions[side] if r is not None], dtype=object))
+        self.region_categories = np.asarray(labels, dtype=object)
+        labels = pd.unique(pd.Series([r for side in self.SIDES for r in resources[side] if r is not None], dtype=object))
+        self.resource_categories = np.asarray(labels, dtype=object)
+
+        self.region_codes = {side: self._encode(regions[side], self.region_categories) for side in self.SIDES}
+        self.resource_codes = {side: self._encode(resources[side], self.resource_categories) for side in self.SIDES}
+
+        # Irregular rows never take part in vectorized min/max
+        for pos in self.irregular:
+            for side in self.SIDES:
+                self.values[side][pos] = np.nan
+
+    @staticmethod
+    def _encode(labels, categories):
+        lookup = {label: code for code, label in enumerate(categories)}
+        return np.array([lookup.get(label, -1) if label is not None else -1 for label in labels], dtype=np.int32)
+
+    def _record(self, side, pos):
+        if np.isnan(self.values[side][pos]):
+            return None
+        return {
+            "value": float(self.values[side][pos]),
+            "region": self.region_categories[self.region_codes[side][pos]],
+            "resource": self.resource_categories[self.resource_codes[side][pos]]
+        }
+
+    def point(self, pos):
+        """Decoded cell at row `pos`: a {'min', 'max'} dict, or the parsed value if irregular."""
+        if pos in self.irregular:
+            return self.irregular[pos]
+        return {side: self._record(side, pos) for side in self.SIDES if not np.isnan(self.values[side][pos])}
+
+    def range_extremes(self, lo, hi):
+        """Lowest 'min' and highest 'max' record over rows [lo, hi); first occurrence wins ties."""
+        result = {}
+        for side, pick in (("min", np.nanargmin), ("max", np.nanargmax)):
+            window = self.values[side][lo:hi]
+            if window.size == 0 or np.isnan(window).all():
+                result[side] = None
+            else:
+                result[side] = self._record(side, lo + int(pick(window)))
+        return result["min"], result["max"]
+
+
+class FeatureStore:
+    """Decoded views of the dict/list columns of feature_engineered.csv, built once at load."""
+
+    EXTREMES_COLUMNS = ["cpu", "storage", "users"]
+
+    def __init__(self, df):
+        self.extremes = {col: ExtremesColumn(df[col].tolist()) for col in self.EXTREMES_COLUMNS}
+        self.resources_per_region = [parse_json_field(v) for v in df["resources_per_region"].tolist()]
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def dataset_fingerprint(df):
+    """Short content hash of a DataFrame, used to tie cached results to the data they came from."""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+
+class ForecastCache:
+    """
+    Bounded LRU cache with a per-entry TTL for deterministic forecast results.
+
+    Keys are tuples whose first element is the target column, so every entry
+    computed with a target's model can be dropped when that model is swapped.
+    """
+
+    def __init__(self, maxsize=256, ttl_seconds=3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value or None, counting a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, target=None):
+        """Drop every entry for `target`, or the whole cache when no target is given."""
+        with self._lock:
+            if target is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key in self._entries if key[0] == target]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self.invalidations += removed
+            return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds
+            }
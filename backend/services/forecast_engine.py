@@ -0,0 +1,264 @@
+import numpy as np
+import pandas as pd
+
+from services.metrics import timed
+from services.tree_compiler import CompiledEnsemble
+
+# ---------- Feature layout ----------
+NON_FEATURE_COLS = ["date", "usage_cpu", "usage_storage", "users_active", "unique_id"]
+LAGS = [1, 7, 14]
+WINDOWS = [7, 14]
+CALENDAR_COLS = ["month", "dayofweek", "dayofmonth", "quarter", "is_weekend"]
+Z_SCORE = 1.96
+
+
+def get_feature_cols(columns):
+    """Model feature columns in training order."""
+    return [col for col in columns if col not in NON_FEATURE_COLS]
+
+
+def calendar_features(last_date, horizon):
+    """Future dates and their calendar features for the whole horizon."""
+    dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=horizon, freq="D")
+    return dates, {
+        "month": dates.month.to_numpy(dtype=np.float64),
+        "dayofweek": dates.dayofweek.to_numpy(dtype=np.float64),
+        "dayofmonth": dates.day.to_numpy(dtype=np.float64),
+        "quarter": dates.quarter.to_numpy(dtype=np.float64),
+        "is_weekend": (dates.dayofweek >= 5).astype(np.float64),
+    }
+
+
+MAX_LOOKBACK = max(LAGS + WINDOWS)
+# Slot of each noise draw within a step: lags first, then every window in order
+LAG_SLOTS = list(range(len(LAGS)))
+WINDOW_SLOTS = []
+for _win, _start in zip(WINDOWS, np.cumsum([len(LAGS)] + WINDOWS[:-1])):
+    WINDOW_SLOTS.append(slice(int(_start), int(_start) + _win))
+N_SLOTS = len(LAGS) + sum(WINDOWS)
+
+
+def _step_noise(n_hist, horizon, variability_factor, seed):
+    """
+    Noise for one series laid out as (horizon, N_SLOTS).
+
+    Draws come from a fresh RandomState(seed) in the order the legacy loop
+    consumed np.random.normal, so seeded forecasts stay reproducible.
+    """
+    rng = np.random.RandomState(seed)
+    if n_hist >= MAX_LOOKBACK:
+        return rng.normal(0, variability_factor, size=(horizon, N_SLOTS))
+
+    noise = np.full((horizon, N_SLOTS), np.nan)
+    for i in range(horizon):
+        n = n_hist + i
+        for lag, slot in zip(LAGS, LAG_SLOTS):
+            if n >= lag:
+                noise[i, slot] = rng.normal(0, variability_factor)
+        for win, slots in zip(WINDOWS, WINDOW_SLOTS):
+            if n >= win:
+                noise[i, slots] = rng.normal(0, variability_factor, size=win)
+    return noise
+
+
+# ---------- Forecaster ----------
+class BatchRecursiveForecaster:
+    """
+    Recursive day-ahead forecaster advancing N series together.
+
+    Each series keeps its target history in a row of a preallocated buffer
+    (the last MAX_LOOKBACK values plus room for the horizon), calendar
+    features are computed for the whole horizon up front and every step
+    writes into a fixed (N x features) matrix, so a step is one `predict`
+    call on N rows and a forecast costs O(horizon) instead of
+    O(horizon x history).
+    """
+
+    def __init__(self, model, target_col, dfs):
+        if not dfs or any(df.empty for df in dfs):
+            raise ValueError("Cannot forecast from an empty history")
+
+        self.model = model
+        self.target_col = target_col
+        self.feature_cols = get_feature_cols(dfs[0].columns)
+        self.col_index = {col: i for i, col in enumerate(self.feature_cols)}
+
+        self.last_dates = [pd.to_datetime(df["date"]).max() for df in dfs]
+
+        # Unchanged features are carried over from the last history row
+        self.base_rows = np.vstack([df[self.feature_cols].iloc[-1].to_numpy(dtype=np.float64) for df in dfs])
+
+        # History tails are right-aligned so every series shares the same write position
+        self.n_hist = np.array([len(df) for df in dfs])
+        self.tails = np.full((len(dfs), MAX_LOOKBACK), np.nan)
+        for s, df in enumerate(dfs):
+            values = df[target_col].to_numpy(dtype=np.float64)[-MAX_LOOKBACK:]
+            self.tails[s, MAX_LOOKBACK - len(values):] = values
+
+        self.lag_idx = [self.col_index[f"{target_col}_lag_{lag}"] for lag in LAGS]
+        self.mean_idx = [self.col_index[f"{target_col}_roll_mean_{win}"] for win in WINDOWS]
+        self.std_idx = [self.col_index[f"{target_col}_roll_std_{win}"] for win in WINDOWS]
+        self.calendar_idx = {col: self.col_index[col] for col in CALENDAR_COLS if col in self.col_index}
+
+    def _predict_rows(self, rows):
+        model = self.model
+        if isinstance(model, CompiledEnsemble):
+            # Compiled ensembles take the feature matrix as is; large batches go back to the native predict
+            if model.fallback is None or model.max_rows is None or len(rows) <= model.max_rows:
+                with timed("predict"):
+                    return model.predict(rows)
+            model = model.fallback
+        X = pd.DataFrame(rows, columns=self.feature_cols)
+        with timed("predict"):
+            return model.predict(X)
+
+    def _advance(self, tails, n_hist, base_rows, noise, calendar, horizon):
+        """
+        Yield (step, feature rows, predictions) for every horizon step.
+
+        One row per simulated series; each prediction is written back into
+        the series' history buffer before the next step builds its lags.
+        """
+        buf = np.empty((len(n_hist), MAX_LOOKBACK + horizon), dtype=np.float64)
+        buf[:, :MAX_LOOKBACK] = tails
+        end = MAX_LOOKBACK
+
+        rows = base_rows.copy()
+        short = n_hist < MAX_LOOKBACK
+
+        for i in range(horizon):
+            n = n_hist + i
+            step_noise = noise[:, i]
+
+            for col, idx in self.calendar_idx.items():
+                rows[:, idx] = calendar[col][:, i]
+
+            for lag, slot, idx in zip(LAGS, LAG_SLOTS, self.lag_idx):
+                rows[:, idx] = buf[:, end - lag] * (1 + step_noise[:, slot])
+
+            for win, slots, m_idx, s_idx in zip(WINDOWS, WINDOW_SLOTS, self.mean_idx, self.std_idx):
+                adjusted = buf[:, end - win:end] * (1 + step_noise[:, slots])
+                avg = adjusted.sum(axis=1) / win
+                rows[:, m_idx] = avg
+                rows[:, s_idx] = np.sqrt(((avg[:, None] - adjusted) ** 2).sum(axis=1) / win)
+
+            if short.any():
+                self._fill_short_history(rows, buf, end, n_hist, n)
+
+            pred = self._predict_rows(rows)
+            yield i, rows, pred
+
+            buf[:, end] = pred
+            end += 1
+
+    def _calendars(self, horizon):
+        calendars = [calendar_features(last_date, horizon) for last_date in self.last_dates]
+        date_strs = [dates.strftime("%Y-%m-%d").tolist() for dates, _ in calendars]
+        calendar = {
+            col: np.vstack([cal[col] for _, cal in calendars]) for col in self.calendar_idx
+        }
+        return date_strs, calendar
+
+    def forecast(self, horizon=30, variability_factor=0.25, seed=42):
+        """Forecast `horizon` days ahead for every series; one list of records per series."""
+        n_series = len(self.n_hist)
+        noise = np.stack([_step_noise(n, horizon, variability_factor, seed) for n in self.n_hist])
+        date_strs, calendar = self._calendars(horizon)
+
+        preds = np.empty((n_series, horizon), dtype=np.float64)
+        lower = np.empty((n_series, horizon), dtype=np.float64)
+        upper = np.empty((n_series, horizon), dtype=np.float64)
+
+        for i, rows, pred in self._advance(self.tails, self.n_hist, self.base_rows, noise, calendar, horizon):
+            std_dev = (rows[:, self.std_idx[0]] + rows[:, self.std_idx[1]]) / 2
+            step_lower = pred - Z_SCORE * std_dev
+            step_upper = pred + Z_SCORE * std_dev
+
+            if self.target_col == "usage_cpu":
+                step_upper = np.minimum(step_upper, 100)
+            step_lower = np.maximum(step_lower, 0)
+
+            preds[:, i] = pred
+            lower[:, i] = step_lower
+            upper[:, i] = step_upper
+
+        return [
+            [
+                {
+                    "date": date_strs[s][i],
+                    "predicted": float(preds[s, i]),
+                    "lower_95": float(lower[s, i]),
+                    "upper_95": float(upper[s, i])
+                }
+                for i in range(horizon)
+            ]
+            for s in range(n_series)
+        ]
+
+    def simulate(self, paths=1000, horizon=30, variability_factor=0.25, seed=42, quantiles=(5, 50, 95)):
+        """
+        Monte Carlo forecast from `paths` independent noise paths per series.
+
+        All paths of all series advance together as one (series x paths)
+        state matrix, so each horizon step is a single batched `predict` on
+        series x paths rows. Returns, per series, daily records with the
+        path mean and empirical percentiles ("p5", "p50", ...).
+        """
+        n_series = len(self.n_hist)
+        rng = np.random.RandomState(seed)
+        noise = rng.normal(0, variability_factor, size=(n_series * paths, horizon, N_SLOTS))
+        date_strs, calendar = self._calendars(horizon)
+        calendar = {col: np.repeat(values, paths, axis=0) for col, values in calendar.items()}
+
+        samples = np.empty((n_series * paths, horizon), dtype=np.float64)
+        steps = self._advance(
+            np.repeat(self.tails, paths, axis=0),
+            np.repeat(self.n_hist, paths),
+            np.repeat(self.base_rows, paths, axis=0),
+            noise, calendar, horizon
+        )
+        for i, _, pred in steps:
+            samples[:, i] = pred
+
+        samples = samples.reshape(n_series, paths, horizon)
+        percentiles = np.percentile(samples, quantiles, axis=1)
+        means = samples.mean(axis=1)
+
+        return [
+            [
+                {
+                    "date": date_strs[s][i],
+                    "mean": float(means[s, i]),
+                    **{f"p{q:g}": float(percentiles[k, s, i]) for k, q in enumerate(quantiles)}
+                }
+                for i in range(horizon)
+            ]
+            for s in range(n_series)
+        ]
+
+    def _fill_short_history(self, rows, buf, end, n_hist, n):
+        """Lags/windows longer than a series' history fall back to its whole-history mean/std."""
+        for s in np.flatnonzero(n < MAX_LOOKBACK):
+            history = buf[s, MAX_LOOKBACK - n_hist[s]:end]
+            hist_mean = np.nanmean(history)
+            hist_std = np.nanstd(history)
+            for lag, idx in zip(LAGS, self.lag_idx):
+                if n[s] < lag:
+                    rows[s, idx] = hist_mean
+            for win, m_idx, s_idx in zip(WINDOWS, self.mean_idx, self.std_idx):
+                if n[s] < win:
+                    rows[s, m_idx] = hist_mean
+                    rows[s, s_idx] = hist_std
+
+
+class RecursiveForecaster(BatchRecursiveForecaster):
+    """Single-series recursive forecaster; matches the legacy seeded simulation."""
+
+    def __init__(self, model, target_col, df):
+        super().__init__(model, target_col, [df])
+
+    def forecast(self, horizon=30, variability_factor=0.25, seed=42):
+        return super().forecast(horizon, variability_factor, seed)[0]
+
+    def simulate(self, paths=1000, horizon=30, variability_factor=0.25, seed=42, quantiles=(5, 50, 95)):
+        return super().simulate(paths, horizon, variability_factor, seed, quantiles)[0]
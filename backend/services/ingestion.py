@@ -0,0 +1,236 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.data_store import BASE_DIR, dataset_path, dataset_stamp, load_dataset, append_rows, updating
+from services.feature_pipeline import (
+    RAW_DIR, USAGE_COLS, FACTOR_COLS, FEATURE_TARGETS, clean_usage, clean_factors, daily_aggregates, series_features
+)
+from services.forecast_engine import MAX_LOOKBACK
+from services.metrics import timed
+
+RAW_USAGE_PATH = os.path.join(RAW_DIR, "azure_usage.csv")
+RAW_FACTORS_PATH = os.path.join(RAW_DIR, "external_factors.csv")
+CLEANED_PATH = os.path.join(BASE_DIR, "Data", "Processed", "cleaned_merged.csv")
+
+
+# ---------- Per-table deltas ----------
+class IngestState:
+    """
+    What an incremental update needs from the stored tables: the last
+    ingested day, the region / resource encodings, each series' current
+    storage allocation and the last MAX_LOOKBACK values of every feature
+    target per unique_id. Built once from the loaded frames, then advanced
+    by each ingest, so later ingests never re-read the history.
+    """
+
+    def __init__(self, insights, enhanced):
+        self.last_date = pd.to_datetime(insights["date"]).max()
+        self.regions = sorted(str(r) for r in pd.unique(insights["region"]))
+        self.resources = sorted(str(r) for r in pd.unique(insights["resource_type"]))
+        allocated = insights.groupby(
+            [insights["region"].astype(str), insights["resource_type"].astype(str)]
+        )["storage_allocated"].max()
+        self.allocated = {key: int(value) for key, value in allocated.items()}
+        self.enhanced_columns = list(enhanced.columns)
+
+        tails = pd.DataFrame({
+            "date": pd.to_datetime(enhanced["date"]),
+            "unique_id": enhanced["unique_id"].astype(str),
+            **{col: enhanced[col].to_numpy(dtype=np.float64) for col in FEATURE_TARGETS},
+        })
+        self.tails = self._last_rows(tails)
+
+    @staticmethod
+    def _last_rows(frame):
+        frame = frame.sort_values(["unique_id", "date"], kind="stable")
+        return frame.groupby("unique_id", sort=False).tail(MAX_LOOKBACK).reset_index(drop=True)
+
+    def advance(self, insights_delta, enhanced_delta):
+        self.last_date = max(self.last_date, insights_delta["date"].max())
+        for key, value in insights_delta.groupby(["region", "resource_type"])["storage_allocated"].max().items():
+            self.allocated[key] = int(value)
+        new_rows = enhanced_delta[["date", "unique_id"] + FEATURE_TARGETS]
+        self.tails = self._last_rows(pd.concat([self.tails, new_rows], ignore_index=True))
+
+
+def insights_rows(merged, allocated):
+    """
+    insights.csv rows for the delta.
+
+    The notebook sets storage_allocated to each series' maximum over the whole
+    table. Appending keeps the stored history as it is, so a delta row is
+    allocated the larger of the series' current allocation and its maximum
+    within the delta (a full notebook rerun would restate older rows).
+    """
+    df = merged.copy()
+    keys = list(zip(df["region"], df["resource_type"]))
+    delta_max = df.groupby(["region", "resource_type"])["usage_storage"].transform("max").to_numpy()
+    current = np.array([allocated.get(key, 0) for key in keys], dtype=np.int64)
+    df["storage_allocated"] = np.maximum(current, delta_max).astype(np.int64)
+    df["storage_efficiency"] = (df["usage_storage"] / df["storage_allocated"] * 100).round(2)
+    return df
+
+
+def enhanced_rows(insights_delta, state):
+    """
+    enhanced_features.csv rows for the delta, computed from each affected
+    series' stored tail plus its new days only.
+
+    Lags and shifted rolling windows are taken within each unique_id series,
+    the definition the forecasters use when they extend a series. A series
+    with less history than a lag gets the column's mean over the series
+    instead, as the notebook's NaN fill does.
+    """
+    df = insights_delta.copy()
+    region_codes = {region: i for i, region in enumerate(state.regions)}
+    resource_codes = {resource: i for i, resource in enumerate(state.resources)}
+    df["region_encoded"] = df["region"].map(region_codes).astype(np.int64)
+    df["resource_type_encoded"] = df["resource_type"].map(resource_codes).astype(np.int64)
+    df["unique_id"] = df["region_encoded"].astype(str) + "_" + df["resource_type_encoded"].astype(str)
+
+    df["dayofweek"] = df["date"].dt.dayofweek
+    df["month"] = df["date"].dt.month
+    df["weekofyear"] = df["date"].dt.isocalendar().week.astype(int)
+    df["dayofmonth"] = df["date"].dt.day
+    df["quarter"] = df["date"].dt.quarter
+    df["is_weekend"] = (df["dayofweek"] >= 5).astype(int)
+
+    # Only the affected series' tails take part, so the cost follows the delta size
+    tails = state.tails[state.tails["unique_id"].isin(df["unique_id"].unique())]
+    tails = tails.assign(_new=False)
+    combined = pd.concat([tails, df.assign(_new=True)], ignore_index=True)
+    combined = combined.sort_values(["unique_id", "date"], kind="stable").reset_index(drop=True)
+
+    with timed("groupby"):
+        features = pd.DataFrame(series_features(combined), index=combined.index)
+        groups = features.groupby(combined["unique_id"], sort=False)
+        for col in features.columns:
+            combined[col] = features[col].fillna(groups[col].transform("mean"))
+
+    for k in range(1, 4):
+        combined[f"sin_week_{k}"] = np.sin(2 * np.pi * k * combined["dayofweek"] / 7)
+        combined[f"cos_week_{k}"] = np.cos(2 * np.pi * k * combined["dayofweek"] / 7)
+
+    rows = combined[combined["_new"].astype(bool)]
+    return rows[state.enhanced_columns].reset_index(drop=True)
+
+
+# ---------- Ingestion ----------
+def _append_csv(df, path):
+    """Append rows to a stored CSV without re-reading it; dates are written as YYYY-MM-DD."""
+    df.assign(date=df["date"].dt.strftime("%Y-%m-%d")).to_csv(path, mode="a", header=False, index=False)
+
+
+class Ingestor:
+    """
+    Incremental Data/Raw -> processed tables pipeline.
+
+    `ingest` cleans and merges only the days after the last ingested one,
+    derives their insights, daily-aggregate and model-feature rows from the
+    per-series state, appends them to the stored CSVs and extends the
+    shared frames in the data store (whose listeners publish new snapshots
+    of the blueprints' derived structures). Cleaning, feature computation
+    and the CSV appends scale with the delta; the history is read once,
+    when the state is first built.
+
+    Publishing is still a full rebuild: `append_rows` re-sorts the whole
+    frame, and each new snapshot recomputes its fingerprint, feature
+    matrix, parsed feature store and every aggregate over all rows.
+    """
+
+    def __init__(self):
+        self.state = None
+        self._stamps = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _table_stamps():
+        return dataset_stamp("insights"), dataset_stamp("enhanced_features")
+
+    def _ensure_state(self):
+        # Tables replaced on disk (e.g. a full feature_pipeline rebuild) invalidate the state
+        if self.state is None or self._stamps != self._table_stamps():
+            self.state = IngestState(load_dataset("insights"), load_dataset("enhanced_features"))
+            self._stamps = self._table_stamps()
+        return self.state
+
+    def ingest(self, usage=None, factors=None):
+        """
+        Ingest new usage / external-factor rows (lists of records).
+
+        Posted rows for new days are first appended to the Data/Raw files;
+        with no rows, the raw files are scanned for days that have not been
+        ingested yet. Days up to the last ingested one are skipped, and usage
+        without factors for its day is dropped by the inner merge, as in the
+        cleaning notebook. Returns a summary dict and {dataset name: new rows}.
+        """
+        with self._lock:
+            state = self._ensure_state()
+            posted = usage is not None
+            if posted:
+                usage = pd.DataFrame(usage)
+                factors = pd.DataFrame(factors or [], columns=None if factors else FACTOR_COLS)
+                missing = [col for col in USAGE_COLS if col not in usage.columns]
+                missing += [col for col in FACTOR_COLS if col not in factors.columns]
+                if missing:
+                    raise ValueError(f"Missing columns {missing}")
+            else:
+                usage = pd.read_csv(RAW_USAGE_PATH)
+                factors = pd.read_csv(RAW_FACTORS_PATH)
+
+            usage_clean = clean_usage(usage)
+            factors_clean = clean_factors(factors)
+            if usage_clean["date"].isna().any() or factors_clean["date"].isna().any():
+                raise ValueError("Unparseable dates in the ingested rows")
+            unknown = sorted(
+                (set(usage_clean["region"]) - set(state.regions))
+                | (set(usage_clean["resource_type"]) - set(state.resources))
+            )
+            if unknown:
+                # New categories would shift every stored encoding (and the models' inputs)
+                raise ValueError(f"Unknown regions / resource types {unknown}")
+
+            new_usage = usage_clean[usage_clean["date"] > state.last_date]
+            new_factors = factors_clean[factors_clean["date"] > state.last_date]
+            merged = pd.merge(new_usage, new_factors, on="date", how="inner")
+            merged = merged.sort_values("date", kind="stable").reset_index(drop=True)
+            summary = {
+                "received_rows": int(len(usage)),
+                "skipped_rows": int(len(usage_clean) - len(new_usage)),
+                "unmatched_rows": int(len(new_usage) - len(merged)),
+                "ingested_rows": int(len(merged)),
+                "days": merged["date"].dt.strftime("%Y-%m-%d").unique().tolist(),
+            }
+
+            if posted:
+                # The raw files keep the rows as received
+                for raw, path, cols in [(usage, RAW_USAGE_PATH, USAGE_COLS), (factors, RAW_FACTORS_PATH, FACTOR_COLS)]:
+                    raw = raw[cols].assign(date=pd.to_datetime(raw["date"]))
+                    _append_csv(raw[raw["date"] > state.last_date], path)
+            if merged.empty:
+                return summary, {}
+
+            insights_delta = insights_rows(merged, state.allocated)
+            with timed("groupby"):
+                daily = daily_aggregates(merged)
+            deltas = {
+                "insights": insights_delta,
+                "feature_engineered": daily,
+                "enhanced_features": enhanced_rows(insights_delta, state),
+            }
+
+            # Background reloads wait until every table is written and its frame extended
+            with updating():
+                _append_csv(merged, CLEANED_PATH)
+                for name, delta in deltas.items():
+                    _append_csv(delta, dataset_path(name))
+                state.advance(insights_delta, deltas["enhanced_features"])
+                self._stamps = self._table_stamps()
+
+                # Every table is on disk before any shared frame is swapped
+                for name, delta in deltas.items():
+                    append_rows(name, delta)
+            return summary, deltas
@@ -0,0 +1,196 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+from services.metrics import timed
+
+try:
+    import orjson
+except ImportError:  # optional: responses fall back to the stdlib encoder
+    orjson = None
+
+# Records are encoded this many rows at a time, so only one chunk of row dicts exists at once
+RECORDS_CHUNK_ROWS = 10000
+ORIENTS = ["records", "columns"]
+
+
+# ---------- Columns -> JSON values ----------
+def column_values(series, native=False):
+    """
+    JSON-ready values of one column.
+
+    Dates become YYYY-MM-DD strings (ISO seconds when a time part is
+    present), periods their string form ("2023-01"), categoricals their
+    labels, and NaN / NaT / NA become None. With `native`, float, integer
+    and bool columns stay NumPy arrays, which orjson writes directly (NaN
+    as null); otherwise every column is a list of Python values.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        series = series.astype(dtype.categories.dtype)
+        dtype = series.dtype
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        values = series.dt.tz_localize(None) if getattr(dtype, "tz", None) else series
+        values = values.to_numpy(dtype="datetime64[ns]")
+        missing = np.isnat(values)
+        has_time = bool(np.any(values[~missing] != values[~missing].astype("datetime64[D]")))
+        text = np.datetime_as_string(values, unit="s" if has_time else "D").astype(object)
+        text[missing] = None
+        return text.tolist()
+
+    if isinstance(dtype, pd.PeriodDtype):
+        text = series.astype(str).to_numpy(dtype=object)
+        text[series.isna().to_numpy()] = None
+        return text.tolist()
+
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        values = series.to_numpy()
+        if native and orjson is not None:
+            return np.ascontiguousarray(values)
+        if dtype.kind == "f":
+            missing = np.isnan(values)
+            if missing.any():
+                out = values.astype(object)
+                out[missing] = None
+                return out.tolist()
+        return values.tolist()
+
+    # Strings, mixed objects and nullable extension dtypes
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _flat_columns(frame):
+    if isinstance(frame.columns, pd.MultiIndex):
+        return ["_".join(str(c) for c in col if c) for col in frame.columns]
+    return [str(col) for col in frame.columns]
+
+
+def frame_records(frame):
+    """Rows of `frame` as dicts, built column-wise (no per-cell pandas access)."""
+    columns = _flat_columns(frame)
+    values = [column_values(frame.iloc[:, i]) for i in range(frame.shape[1])]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def frame_columns(frame):
+    """The columnar layout: {"columns": [names], "data": {name: values}}."""
+    columns = _flat_columns(frame)
+    return {
+        "columns": columns,
+        "data": {name: column_values(frame.iloc[:, i], native=True) for i, name in enumerate(columns)},
+    }
+
+
+def request_orient(default="records"):
+    """?orient=records|columns for the current request, or None if invalid."""
+    orient = request.args.get("orient", default).lower()
+    return orient if orient in ORIENTS else None
+
+
+def frame_response(frame, orient=None):
+    """
+    Serialize a DataFrame as the JSON response, as records or (opt-in, via
+    `orient` or ?orient=columns) in the columnar layout.
+    """
+    orient = orient or request_orient()
+    provider = current_app.json
+    if orient is None:
+        return provider.response({"error": f"Invalid orient. Must be one of {ORIENTS}"}), 400
+    if orient == "columns":
+        return provider.response(frame_columns(frame))
+    if not isinstance(provider, FastJSONProvider) or orjson is None:
+        return provider.response(frame_records(frame))
+    with timed("json"):
+        return provider.records_response(frame)
+
+
+# ---------- Flask provider ----------
+def _default(o):
+    """Values orjson / json do not handle themselves."""
+    if isinstance(o, pd.DataFrame):
+        return frame_records(o)
+    if isinstance(o, (pd.Series, pd.Index)):
+        return column_values(pd.Series(o))
+    if o is pd.NaT or o is pd.NA:
+        return None
+    if isinstance(o, datetime.datetime):
+        if (o.hour, o.minute, o.second, o.microsecond) == (0, 0, 0, 0):
+            return o.strftime("%Y-%m-%d")
+        return o.isoformat(timespec="seconds")
+    if isinstance(o, datetime.date):
+        return o.isoformat()
+    if isinstance(o, pd.Period):
+        return str(o)
+    if isinstance(o, np.datetime64):
+        return None if np.isnat(o) else _default(pd.Timestamp(o))
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return column_values(pd.Series(o))
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider writing NumPy / pandas values directly.
+
+    With orjson installed, responses are encoded by orjson with native
+    NumPy arrays and scalars; DataFrames, Series, Timestamps, Periods and
+    NaT go through one `default` hook, so every route renders dates as
+    YYYY-MM-DD strings and missing values as null. Without orjson the
+    stdlib encoder is used with the same hook.
+    """
+
+    default = staticmethod(_default)
+
+    def _options(self, **extra):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if extra.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(**kwargs))
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.dumps_bytes(obj, indent=self._indent())
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+    def records_response(self, frame, chunk_rows=RECORDS_CHUNK_ROWS):
+        """A records array encoded chunk by chunk and joined, without all row dicts in memory at once."""
+        option = self._options()
+        parts = [b"["]
+        for lo in range(0, len(frame), chunk_rows):
+            if lo:
+                parts.append(b",")
+            # Each chunk's "[...]" brackets are dropped with a view, not a copy
+            chunk = orjson.dumps(frame_records(frame.iloc[lo:lo + chunk_rows]), default=self.default, option=option)
+            parts.append(memoryview(chunk)[1:-1])
+        parts.append(b"]\n")
+        # One join, so the body is copied once
+        return self._app.response_class(b"".join(parts), mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Serialize every JSON response of `app` through FastJSONProvider."""
+    # Flask >= 2.2 serializes every JSON response through app.json
+    if hasattr(app, "json_provider_class"):
+        app.json_provider_class = FastJSONProvider
+        app.json = FastJSONProvider(app)
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+
+# Upper bounds (seconds) of the latency buckets; +Inf is implicit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        # Per-bucket (non-cumulative) counts; cumulated only when rendering
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels, amount=1):
+        self.inc(labels, -amount)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process request and section metrics rendered in the Prometheus text format.
+
+    Recording is a bisect plus a locked increment; nothing is formatted until
+    `/metrics` is scraped. With `enabled=False` no hooks are installed and
+    `timed()` hands out a shared no-op context manager.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.metrics = []
+        self.started_at = time.time()
+
+    def histogram(self, name, help_text, labelnames, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labelnames):
+        metric = Gauge(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = [
+            "# HELP process_uptime_seconds Seconds since the metrics registry was created",
+            "# TYPE process_uptime_seconds gauge",
+            f"process_uptime_seconds {time.time() - self.started_at:.3f}",
+        ]
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---------- Registry ----------
+METRICS = MetricsRegistry(enabled=os.environ.get("METRICS_ENABLED", "1") == "1")
+
+REQUEST_LATENCY = METRICS.histogram(
+    "http_request_duration_seconds", "Request latency by route template, method and status code",
+    ("method", "route", "status")
+)
+IN_FLIGHT = METRICS.gauge("http_requests_in_flight", "Requests currently being handled", ("method", "route"))
+SECTION_LATENCY = METRICS.histogram(
+    "app_section_duration_seconds",
+    "Time spent in hot internals (predict, read_csv, groupby, json) by route",
+    ("section", "route")
+)
+
+
+def _current_route():
+    if has_request_context():
+        return getattr(g, "metrics_route", "<unmatched>")
+    # Startup loading and background jobs
+    return "<background>"
+
+
+class _Timer:
+    __slots__ = ("section", "start")
+
+    def __init__(self, section):
+        self.section = section
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        SECTION_LATENCY.observe((self.section, _current_route()), time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(section):
+    """Context manager adding the block's wall time to `section` (e.g. "predict") for the current route."""
+    return _Timer(section) if METRICS.enabled else _NOOP
+
+
+# ---------- Flask wiring ----------
+def _timed_json_provider(provider_class):
+    class TimedJSONProvider(provider_class):
+        def response(self, *args, **kwargs):
+            with timed("json"):
+                return super().response(*args, **kwargs)
+
+    return TimedJSONProvider
+
+
+def init_app(app, path="/metrics"):
+    """Time every request by route template and serve the registry at `path`."""
+    if not METRICS.enabled:
+        return
+
+    # Flask >= 2.2 serializes every JSON response through app.json
+    if hasattr(app, "json_provider_class"):
+        json_provider = _timed_json_provider(type(app.json))
+        app.json_provider_class = json_provider
+        app.json = json_provider(app)
+
+    @app.before_request
+    def _start_request():
+        g.metrics_route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        g.metrics_labels = (request.method, g.metrics_route)
+        g.metrics_start = time.perf_counter()
+        IN_FLIGHT.inc(g.metrics_labels)
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        labels = g.pop("metrics_labels", None)
+        if labels is None:
+            return
+        IN_FLIGHT.dec(labels)
+        status = g.pop("metrics_status", 500 if exc is not None else 200)
+        REQUEST_LATENCY.observe(labels + (str(status),), time.perf_counter() - g.metrics_start)
+
+    @app.route(path)
+    def metrics():
+        return Response(METRICS.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+
+import joblib
+
+
+def _rss_bytes():
+    """Current resident set size in bytes, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Lazily loaded, versioned models keyed by target column.
+
+    A model is deserialized on first `get()`, optionally with
+    `joblib.load(mmap_mode="r")` so the numpy arrays of array-heavy
+    estimators (e.g. random forests) are memory-mapped and shared through
+    the page cache by every worker. `swap()` replaces a model and bumps its
+    version; listeners registered with `on_swap()` are told which target
+    changed so derived caches can be dropped.
+
+    When a `compiler` is given, `predictor()` serves the result of
+    `compiler(model)` (e.g. a compiled tree ensemble) instead of the model
+    itself; it is built once per loaded model, and a compiler returning None
+    keeps the original model.
+    """
+
+    def __init__(self, mmap_mode="r", compiler=None):
+        self.mmap_mode = mmap_mode
+        self.compiler = compiler
+        self._entries = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def register(self, target, path, mmap_mode=None, loader=None):
+        """Register `target`; `loader(path)` replaces joblib.load for non-pickle models (e.g. Keras .h5)."""
+        self._entries[target] = {
+            "path": path,
+            "loader": loader,
+            "mmap_mode": mmap_mode if mmap_mode is not None else self.mmap_mode,
+            "model": None,
+            "predictor": None,
+            "compile_seconds": None,
+            "version": 0,
+            "load_seconds": None,
+            "rss_delta_bytes": None,
+            "loaded_at": None,
+        }
+
+    def targets(self):
+        return list(self._entries)
+
+    def _load(self, entry):
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        if entry["loader"] is not None:
+            model = entry["loader"](entry["path"])
+        else:
+            model = joblib.load(entry["path"], mmap_mode=entry["mmap_mode"])
+        entry["load_seconds"] = time.perf_counter() - start
+        rss_after = _rss_bytes()
+        entry["rss_delta_bytes"] = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        entry["loaded_at"] = time.time()
+        entry["model"] = model
+        entry["predictor"] = None
+        return model
+
+    def get(self, target):
+        """The model for `target`, loading it on first use."""
+        entry = self._entries[target]
+        model = entry["model"]
+        if model is not None:
+            return model
+        with self._lock:
+            if entry["model"] is None:
+                self._load(entry)
+            return entry["model"]
+
+    def predictor(self, target):
+        """What to call `predict` on for `target`: the compiled model when available, else the model."""
+        entry = self._entries[target]
+        predictor = entry["predictor"]
+        if predictor is not None:
+            return predictor
+        model = self.get(target)
+        if self.compiler is None:
+            return model
+        with self._lock:
+            if entry["predictor"] is None:
+                # Compile whatever is loaded now, in case a swap happened since get()
+                model = entry["model"]
+                start = time.perf_counter()
+                compiled = self.compiler(model)
+                entry["compile_seconds"] = time.perf_counter() - start
+                entry["predictor"] = compiled if compiled is not None else model
+            return entry["predictor"]
+
+    def version(self, target):
+        return self._entries[target]["version"]
+
+    def stamp(self, target):
+        """What `target` serves, as (path, mtime, size, version); the same in every worker until a swap."""
+        entry = self._entries[target]
+        try:
+            stat = os.stat(entry["path"])
+        except OSError:
+            return entry["path"], None, None, entry["version"]
+        return entry["path"], stat.st_mtime, stat.st_size, entry["version"]
+
+    def reload_if_changed(self, target):
+        """Swap in `target`'s file if it was replaced after it was loaded (e.g. by another worker)."""
+        entry = self._entries[target]
+        if entry["model"] is None:
+            return False
+        try:
+            replaced = os.stat(entry["path"]).st_mtime > entry["loaded_at"]
+        except OSError:
+            return False
+        if replaced:
+            self.swap(target)
+        return replaced
+
+    def preload(self):
+        """Load every registered model now, e.g. in a gunicorn master before workers fork."""
+        for target in self._entries:
+            self.predictor(target)
+
+    def swap(self, target, path=None):
+        """Reload `target` from `path` (default: its registered path) and notify listeners."""
+        with self._lock:
+            entry = self._entries[target]
+            if path is not None:
+                entry["path"] = path
+            self._load(entry)
+            entry["version"] += 1
+        for listener in self._listeners:
+            listener(target)
+        return entry["model"]
+
+    def on_swap(self, listener):
+        self._listeners.append(listener)
+
+    def stats(self):
+        models = {}
+        for target, entry in self._entries.items():
+            model = entry["model"]
+            models[target] = {
+                "path": entry["path"],
+                "loaded": model is not None,
+                "model_type": type(model).__name__ if model is not None else None,
+                "version": entry["version"],
+                "mmap_mode": entry["mmap_mode"],
+                "file_size_bytes": os.path.getsize(entry["path"]) if os.path.exists(entry["path"]) else None,
+                "load_ms": round(entry["load_seconds"] * 1000, 2) if entry["load_seconds"] is not None else None,
+                "rss_delta_bytes": entry["rss_delta_bytes"],
+                "compiled": entry["predictor"] is not None and entry["predictor"] is not model,
+                "compile_ms": round(entry["compile_seconds"] * 1000, 2) if entry["compile_seconds"] is not None else None,
+            }
+        return models
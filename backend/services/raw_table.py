@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from services.date_index import DateIndex
+from services.json_response import frame_records
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class RawTable:
+    """
+    Read-only view over a raw CSV-backed frame for export endpoints.
+
+    Supports column projection, inclusive date filters and offset/limit
+    slicing without copying the frame; records are only materialised for
+    the rows actually returned, either one page at a time or as a stream of
+    fixed-size chunks so memory stays bounded regardless of table size.
+    """
+
+    def __init__(self, df, date_col="date"):
+        self.df = df
+        self.date_col = date_col if date_col in df.columns else None
+        self.date_index = None
+        if self.date_col is not None:
+            dates = pd.to_datetime(df[self.date_col], errors="coerce")
+            if dates.notna().all() and dates.is_monotonic_increasing:
+                self.date_index = DateIndex(dates)
+            else:
+                self._dates = dates
+
+    def unknown_columns(self, columns):
+        return [col for col in columns if col not in self.df.columns]
+
+    def select(self, columns=None, start=None, end=None):
+        """Rows with start <= date <= end (datetime64[D] or None), projected onto `columns`."""
+        frame = self.df
+        if (start is not None or end is not None) and self.date_col is not None:
+            if self.date_index is not None:
+                lo = self.date_index.bounds(start, start)[0] if start is not None else 0
+                hi = self.date_index.bounds(end, end)[1] if end is not None else len(frame)
+                frame = frame.iloc[lo:max(lo, hi)]
+            else:
+                days = self._dates.to_numpy(dtype="datetime64[D]")
+                mask = np.ones(len(frame), dtype=bool)
+                if start is not None:
+                    mask &= days >= start
+                if end is not None:
+                    mask &= days <= end
+                frame = frame[mask]
+        if columns:
+            frame = frame[columns]
+        return frame
+
+    @staticmethod
+    def records(frame):
+        """JSON-ready records; dates become YYYY-MM-DD strings and NaN becomes None."""
+        return frame_records(frame)
+
+    def iter_ndjson(self, frame, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield newline-delimited JSON, one chunk of rows at a time."""
+        for lo in range(0, len(frame), chunk_size):
+            chunk = self.records(frame.iloc[lo:lo + chunk_size])
+            yield "".join(json.dumps(record, default=str) + "\n" for record in chunk)
+
+    @staticmethod
+    def iter_csv(frame, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield CSV text (header first), one chunk of rows at a time."""
+        yield frame.iloc[:0].to_csv(index=False)
+        for lo in range(0, len(frame), chunk_size):
+            yield frame.iloc[lo:lo + chunk_size].to_csv(index=False, header=False)
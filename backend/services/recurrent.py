@@ -0,0 +1,265 @@
+import json
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from services.metrics import timed
+
+Z_SCORE = 1.96
+SEQUENCE_LENGTH = 7
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    # Keras 2 definition, the default recurrent activation of older saved models
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    None: lambda x: x,
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "relu": lambda x: np.maximum(x, 0),
+}
+
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'")
+    return ACTIVATIONS[name]
+
+
+# ---------- Layers ----------
+class LSTMLayer:
+    """Keras LSTM forward pass; gates are packed i, f, c, o along the last kernel axis."""
+
+    def __init__(self, config, weights):
+        self.units = config["units"]
+        self.return_sequences = config.get("return_sequences", False)
+        self.go_backwards = config.get("go_backwards", False)
+        self.activation = _activation(config.get("activation", "tanh"))
+        self.recurrent_activation = _activation(config.get("recurrent_activation", "sigmoid"))
+        self.kernel = weights["kernel"]
+        self.recurrent_kernel = weights["recurrent_kernel"]
+        self.bias = weights.get("bias", np.zeros(4 * self.units, dtype=np.float32))
+
+    def __call__(self, x):
+        batch, steps, _ = x.shape
+        u = self.units
+        if self.go_backwards:
+            x = x[:, ::-1]
+        # Input projections for every step at once; only the recurrent part is sequential
+        projected = x @ self.kernel + self.bias
+        h = np.zeros((batch, u), dtype=x.dtype)
+        c = np.zeros((batch, u), dtype=x.dtype)
+        outputs = []
+        for t in range(steps):
+            z = projected[:, t] + h @ self.recurrent_kernel
+            i = self.recurrent_activation(z[:, :u])
+            f = self.recurrent_activation(z[:, u:2 * u])
+            c = f * c + i * self.activation(z[:, 2 * u:3 * u])
+            o = self.recurrent_activation(z[:, 3 * u:])
+            h = o * self.activation(c)
+            outputs.append(h)
+        return np.stack(outputs, axis=1) if self.return_sequences else h
+
+
+class GRULayer:
+    """Keras GRU forward pass; gates are packed z, r, h. Supports both reset_after variants."""
+
+    def __init__(self, config, weights):
+        self.units = config["units"]
+        self.return_sequences = config.get("return_sequences", False)
+        self.go_backwards = config.get("go_backwards", False)
+        self.reset_after = config.get("reset_after", True)
+        self.activation = _activation(config.get("activation", "tanh"))
+        self.recurrent_activation = _activation(config.get("recurrent_activation", "sigmoid"))
+        self.kernel = weights["kernel"]
+        self.recurrent_kernel = weights["recurrent_kernel"]
+        bias = weights.get("bias")
+        if bias is None:
+            bias = np.zeros((2, 3 * self.units) if self.reset_after else 3 * self.units, dtype=np.float32)
+        # reset_after models keep separate input and recurrent biases
+        self.input_bias, self.recurrent_bias = (bias[0], bias[1]) if self.reset_after else (bias, None)
+
+    def __call__(self, x):
+        batch, steps, _ = x.shape
+        u = self.units
+        if self.go_backwards:
+            x = x[:, ::-1]
+        projected = x @ self.kernel + self.input_bias
+        h = np.zeros((batch, u), dtype=x.dtype)
+        outputs = []
+        for t in range(steps):
+            x_t = projected[:, t]
+            if self.reset_after:
+                inner = h @ self.recurrent_kernel + self.recurrent_bias
+                z = self.recurrent_activation(x_t[:, :u] + inner[:, :u])
+                r = self.recurrent_activation(x_t[:, u:2 * u] + inner[:, u:2 * u])
+                hh = self.activation(x_t[:, 2 * u:] + r * inner[:, 2 * u:])
+            else:
+                inner = h @ self.recurrent_kernel[:, :2 * u]
+                z = self.recurrent_activation(x_t[:, :u] + inner[:, :u])
+                r = self.recurrent_activation(x_t[:, u:2 * u] + inner[:, u:])
+                hh = self.activation(x_t[:, 2 * u:] + (r * h) @ self.recurrent_kernel[:, 2 * u:])
+            h = z * h + (1 - z) * hh
+            outputs.append(h)
+        return np.stack(outputs, axis=1) if self.return_sequences else h
+
+
+class DenseLayer:
+    def __init__(self, config, weights):
+        self.activation = _activation(config.get("activation", "linear"))
+        self.kernel = weights["kernel"]
+        self.bias = weights.get("bias")
+
+    def __call__(self, x):
+        out = x @ self.kernel
+        if self.bias is not None:
+            out = out + self.bias
+        return self.activation(out)
+
+
+LAYERS = {"LSTM": LSTMLayer, "GRU": GRULayer, "Dense": DenseLayer}
+# Layers that are the identity at inference time
+PASSTHROUGH = ["InputLayer", "Dropout", "SpatialDropout1D", "GaussianNoise", "GaussianDropout"]
+
+
+class RecurrentNetwork:
+    """
+    A Keras Sequential LSTM/GRU/Dense model evaluated with NumPy.
+
+    `predict` takes a (batch, timesteps, features) array and runs the whole
+    batch through each layer in float32, like Keras does; only the
+    recurrence over timesteps is a Python loop.
+    """
+
+    def __init__(self, layers, input_shape=None, name=None, keras_version=None):
+        self.layers = layers
+        self.input_shape = input_shape
+        self.name = name
+        self.keras_version = keras_version
+
+    @property
+    def kind(self):
+        recurrent = [type(layer).__name__ for layer in self.layers if not isinstance(layer, DenseLayer)]
+        return recurrent[0].replace("Layer", "").lower() if recurrent else "dense"
+
+    def predict(self, X):
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[:, :, None]
+        with timed("predict"):
+            for layer in self.layers:
+                x = layer(x)
+        return x
+
+
+def _read_weights(group):
+    """Layer weights keyed by their base name (kernel, recurrent_kernel, bias) from a Keras HDF5 layer group."""
+    weights = {}
+    for weight_name in group.attrs.get("weight_names", []):
+        weight_name = weight_name.decode() if isinstance(weight_name, bytes) else weight_name
+        base = weight_name.split("/")[-1].split(":")[0]
+        weights[base] = np.asarray(group[weight_name], dtype=np.float32)
+    return weights
+
+
+def load_keras_h5(path):
+    """Build a RecurrentNetwork from a Keras Sequential model saved with `model.save("*.h5")`."""
+    with h5py.File(path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        keras_version = f.attrs.get("keras_version")
+        if config["class_name"] != "Sequential":
+            raise ValueError(f"Only Sequential models are supported, got '{config['class_name']}'")
+
+        weights_root = f["model_weights"]
+        layers = []
+        input_shape = config["config"].get("build_input_shape")
+        for layer in config["config"]["layers"]:
+            class_name = layer["class_name"]
+            layer_config = layer["config"]
+            if class_name in PASSTHROUGH:
+                continue
+            if class_name not in LAYERS:
+                raise ValueError(f"Unsupported layer '{class_name}'")
+            if layer_config.get("stateful") or layer_config.get("return_state"):
+                raise ValueError(f"Stateful layer '{layer_config['name']}' is not supported")
+            layers.append(LAYERS[class_name](layer_config, _read_weights(weights_root[layer_config["name"]])))
+
+    return RecurrentNetwork(layers, input_shape=input_shape, name=config["config"].get("name"), keras_version=keras_version)
+
+
+# ---------- Forecasting ----------
+def daily_series(df, target_col):
+    """Daily mean of `target_col`, ordered by date (the notebook's prepare_lstm_data aggregation)."""
+    with timed("groupby"):
+        daily = df.groupby("date")[target_col].mean().reset_index().sort_values("date")
+    return pd.to_datetime(daily["date"]), daily[target_col].to_numpy(dtype=np.float64)
+
+
+def sequence_windows(values, sequence_length=SEQUENCE_LENGTH):
+    """Every (sequence_length x 1) input window and the value following it."""
+    windows = np.lib.stride_tricks.sliding_window_view(values[:-1], sequence_length)
+    return windows[:, :, None], values[sequence_length:]
+
+
+class SequenceForecaster:
+    """
+    Recursive forecaster for a RecurrentNetwork trained on min-max scaled daily means.
+
+    The scaler is not stored with the .h5 models, so it is refit on the
+    history being forecast, as the notebook did for each split. Intervals
+    are +-1.96 std of the one-step-ahead residuals over the history, which
+    is scored in one batched forward pass.
+    """
+
+    def __init__(self, network, target_col, df, sequence_length=SEQUENCE_LENGTH):
+        self.network = network
+        self.target_col = target_col
+        self.sequence_length = sequence_length
+        self.dates, self.values = daily_series(df, target_col)
+        if len(self.values) <= sequence_length:
+            raise ValueError(f"Need more than {sequence_length} days of history")
+        self.low = self.values.min()
+        self.span = self.values.max() - self.low or 1.0
+
+    def _scale(self, values):
+        return (values - self.low) / self.span
+
+    def _unscale(self, values):
+        return values * self.span + self.low
+
+    def residual_std(self):
+        windows, actual = sequence_windows(self._scale(self.values), self.sequence_length)
+        predicted = self._unscale(self.network.predict(windows)[:, 0].astype(np.float64))
+        return float(np.std(self._unscale(actual) - predicted))
+
+    def forecast(self, horizon=30):
+        window = list(self._scale(self.values[-self.sequence_length:]))
+        preds = []
+        for _ in range(horizon):
+            scaled = float(self.network.predict(np.array(window[-self.sequence_length:])[None, :, None])[0, 0])
+            window.append(scaled)
+            preds.append(self._unscale(scaled))
+
+        std_dev = self.residual_std()
+        dates = pd.date_range(start=self.dates.iloc[-1] + pd.Timedelta(days=1), periods=horizon, freq="D")
+        results = []
+        for date, pred in zip(dates, preds):
+            upper = pred + Z_SCORE * std_dev
+            if self.target_col == "usage_cpu":
+                upper = min(upper, 100)
+            results.append({
+                "date": date.strftime("%Y-%m-%d"),
+                "predicted": float(pred),
+                "lower_95": float(max(pred - Z_SCORE * std_dev, 0)),
+                "upper_95": float(upper)
+            })
+        return results
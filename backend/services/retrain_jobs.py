@@ -0,0 +1,140 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class RetrainJobQueue:
+    """
+    Background jobs over a set of targets (retrains, backtests) with per-target progress.
+
+    `submit()` returns immediately with a job id; the job is run later by
+    `runner(job, progress)` on a single background thread, so jobs are
+    queued rather than competing for cores. A target that is already queued
+    or running in another job is not trained again: the new submission
+    points at that job instead. Finished jobs are kept (up to `max_history`)
+    so their results can be polled and compared.
+    """
+
+    def __init__(self, runner, max_history=50):
+        self.runner = runner
+        self.max_history = max_history
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain")
+
+    def submit(self, targets, options=None):
+        """
+        Queue a job for `targets`.
+
+        Returns (job, deduplicated) where `deduplicated` maps each target
+        already being trained to the id of the job that owns it. `job` is
+        None when every target was deduplicated.
+        """
+        with self._lock:
+            deduplicated = {t: self._active[t] for t in targets if t in self._active}
+            fresh = [t for t in targets if t not in self._active]
+            if not fresh:
+                return None, deduplicated
+
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "status": "queued",
+                "submitted_at": datetime.now().isoformat(timespec="seconds"),
+                "started_at": None,
+                "finished_at": None,
+                "seconds": None,
+                "options": dict(options or {}),
+                "targets": {t: {"status": "queued", "seconds": None, "metrics": None, "error": None} for t in fresh},
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job["id"]] = job
+            for target in fresh:
+                self._active[target] = job["id"]
+            self._trim()
+
+        self._executor.submit(self._run, job)
+        return job, deduplicated
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("completed", "failed")]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _progress(self, job, target, **fields):
+        with self._lock:
+            job["targets"][target].update(fields)
+
+    def _run(self, job):
+        start = time.perf_counter()
+        with self._lock:
+            job["status"] = "running"
+            job["started_at"] = datetime.now().isoformat(timespec="seconds")
+        try:
+            result = self.runner(job, lambda target, **fields: self._progress(job, target, **fields))
+            failed = [t for t, state in job["targets"].items() if state["status"] == "failed"]
+            status = "failed" if len(failed) == len(job["targets"]) else "completed"
+            error = None
+        except Exception as e:
+            print(f"Error in retrain job {job['id']}: {str(e)}")
+            result, status, error = None, "failed", str(e)
+
+        with self._lock:
+            job["result"] = result
+            job["error"] = error
+            job["status"] = status
+            job["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            job["seconds"] = round(time.perf_counter() - start, 3)
+            for target in job["targets"]:
+                if self._active.get(target) == job["id"]:
+                    del self._active[target]
+
+    def _copy(self, job):
+        """A copy of `job` that later progress updates do not touch; the result is shared, it is set once."""
+        return {**job, "options": dict(job["options"]), "targets": copy.deepcopy(job["targets"])}
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copy(job) if job is not None else None
+
+    def jobs(self):
+        with self._lock:
+            return [self._copy(job) for job in self._jobs.values()]
+
+    def active(self):
+        """target -> id of the queued/running job that owns it."""
+        with self._lock:
+            return dict(self._active)
+
+    def latest_result(self):
+        """The result of the most recently finished job that produced one, or None."""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job["status"] == "completed" and job["result"]:
+                    return job["result"]
+        return None
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or `timeout` seconds pass); returns a copy of the job."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("completed", "failed"):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.1)
+
+    def describe(self, job):
+        """JSON-safe view of a job (without the fitted models), copied under the lock."""
+        with self._lock:
+            view = {key: value for key, value in job.items() if key not in ("result", "targets")}
+            view["options"] = dict(job["options"])
+            view["targets"] = copy.deepcopy(job["targets"])
+        return view
@@ -0,0 +1,319 @@
+import copy
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+from services.forecast_engine import get_feature_cols
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # optional: only caps BLAS/OpenMP pools inside workers
+    threadpool_limits = None
+
+# Estimator params that control native thread pools (sklearn/LightGBM/XGBoost, older XGBoost)
+THREAD_PARAMS = ["n_jobs", "nthread"]
+
+
+def mean_absolute_percentage_error(y_true, y_pred):
+    """Helper function for MAPE calculation"""
+    y_true, y_pred = np.array(y_true), np.array(y_pred)
+    return np.mean(np.abs((y_true - y_pred) / np.maximum(y_true, 1e-8))) * 100
+
+
+def limit_threads(model, n_threads):
+    """Set every thread-count param the estimator exposes; returns the previous values."""
+    params = model.get_params()
+    previous = {p: params[p] for p in THREAD_PARAMS if p in params}
+    if n_threads is not None and previous:
+        model.set_params(**{p: n_threads for p in previous})
+    return previous
+
+
+def _split(df, target_col, test_size):
+    """Date-ordered train/test split shared by full and incremental retraining."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+
+    df = df.sort_values("date")
+    split_idx = int(len(df) * (1 - test_size))
+    return df.iloc[:split_idx], df.iloc[split_idx:], get_feature_cols(df.columns)
+
+
+def training_cutoff(df, target_col, test_size=0.2):
+    """Last date of the training split of `df`: what a model fit on that split has seen."""
+    train_df, _, _ = _split(df[["date", target_col]], target_col, test_size)
+    return train_df["date"].max()
+
+
+def _xy(frame, feature_cols, target_col):
+    return frame[feature_cols].fillna(0), frame[target_col].fillna(frame[target_col].mean())
+
+
+def _evaluate(model, X_test, y_test):
+    test_pred = model.predict(X_test)
+    return {
+        "MAE": mean_absolute_error(y_test, test_pred),
+        "RMSE": np.sqrt(mean_squared_error(y_test, test_pred)),
+        "MAPE": mean_absolute_percentage_error(y_test, test_pred),
+        "Bias": np.mean(test_pred - y_test)
+    }
+
+
+def _fit(model, target_col, df, test_size=0.2, n_threads=None, since=None):
+    """
+    Fit and score on the held-out tail; returns (model, metrics, info).
+
+    With `since`, training continues from `model` on the training rows dated
+    after `since` only (see warm_start_fit); otherwise a clone is refit from
+    scratch on every training row. Both are scored on the same test rows.
+    """
+    train_df, test_df, feature_cols = _split(df, target_col, test_size)
+    n_train = len(train_df)
+    if since is not None:
+        train_df = train_df[train_df["date"] > pd.Timestamp(since)]
+
+    X_train, y_train = _xy(train_df, feature_cols, target_col)
+    X_test, y_test = _xy(test_df, feature_cols, target_col)
+
+    if since is not None:
+        new_model = warm_start_fit(model, X_train, y_train, n_threads=n_threads, share=len(train_df) / n_train)
+    else:
+        new_model = clone(model)
+        # Cap native threads while fitting so parallel retrains don't oversubscribe cores
+        previous_threads = limit_threads(new_model, n_threads)
+        new_model.fit(X_train, y_train)
+        if n_threads is not None and previous_threads:
+            new_model.set_params(**previous_threads)
+
+    info = {
+        "mode": "incremental" if since is not None else "full",
+        "train_rows": len(train_df),
+        "trained_through": train_df["date"].max(),
+    }
+    return new_model, _evaluate(new_model, X_test, y_test), info
+
+
+# ---------- Incremental (warm-start) retraining ----------
+# A warm-start update is replaced by a full refit after this many updates in a row,
+# when the last full refit is more than this many days of data old, or when the
+# current model's MAPE on the new rows is this many points worse than just before them.
+FULL_REFIT_EVERY = int(os.environ.get("RETRAIN_FULL_EVERY", 4))
+FULL_REFIT_AFTER_DAYS = int(os.environ.get("RETRAIN_FULL_AFTER_DAYS", 180))
+DRIFT_MAPE_POINTS = float(os.environ.get("RETRAIN_DRIFT_MAPE", 10))
+MIN_NEW_ROWS = int(os.environ.get("RETRAIN_MIN_NEW_ROWS", 30))
+MIN_EXTRA_ROUNDS = 10
+
+
+def boosting_kind(model):
+    """
+    How `model` can keep boosting: "xgboost", "lightgbm", "warm_start" or None.
+
+    Only boosted ensembles qualify; bagged ones (random forests, extra
+    trees, bagging) also accept `warm_start`, but trees fit on the new rows
+    alone would be averaged into the forest, so they get None (full refit).
+    """
+    module = type(model).__module__
+    if module.startswith("xgboost"):
+        return "xgboost"
+    if module.startswith("lightgbm"):
+        return "lightgbm"
+    if isinstance(model, (GradientBoostingRegressor, HistGradientBoostingRegressor)):
+        return "warm_start"
+    return None
+
+
+def _rounds_param(model):
+    """The parameter holding the number of boosting rounds (HistGradientBoosting uses max_iter)."""
+    return "max_iter" if isinstance(model, HistGradientBoostingRegressor) else "n_estimators"
+
+
+def warm_start_fit(model, X_new, y_new, n_threads=None, share=1.0, extra_rounds=None):
+    """
+    Continue boosting `model` on new rows only.
+
+    Adds `extra_rounds` trees (default: the configured tree count times
+    `share`, the fraction of training rows that are new, and at least
+    MIN_EXTRA_ROUNDS) on top of the fitted ensemble, so the cost follows the
+    amount of new data. XGBoost and LightGBM continue from the fitted
+    booster; sklearn gradient boosting uses `warm_start`. `model` is left untouched.
+    """
+    kind = boosting_kind(model)
+    if kind is None:
+        raise ValueError(f"{type(model).__name__} cannot continue training")
+
+    rounds_param = _rounds_param(model)
+    n_estimators = model.get_params()[rounds_param]
+    if extra_rounds is None:
+        extra_rounds = max(MIN_EXTRA_ROUNDS, int(round(n_estimators * share)))
+
+    if kind == "warm_start":
+        new_model = copy.deepcopy(model)
+        previous_threads = limit_threads(new_model, n_threads)
+        fitted_rounds = new_model.n_iter_ if rounds_param == "max_iter" else new_model.n_estimators_
+        new_model.set_params(warm_start=True, **{rounds_param: fitted_rounds + extra_rounds})
+        new_model.fit(X_new, y_new)
+        new_model.set_params(warm_start=model.get_params()["warm_start"])
+    else:
+        new_model = clone(model)
+        previous_threads = limit_threads(new_model, n_threads)
+        new_model.set_params(n_estimators=extra_rounds)
+        if kind == "xgboost":
+            new_model.fit(X_new, y_new, xgb_model=model.get_booster())
+        else:
+            new_model.fit(X_new, y_new, init_model=model.booster_)
+        # Keep the configured size so a later full refit (a clone) grows the usual ensemble
+        new_model.set_params(n_estimators=n_estimators)
+
+    if n_threads is not None and previous_threads:
+        new_model.set_params(**previous_threads)
+    return new_model
+
+
+def _error_drift(model, train_df, new_rows, feature_cols, target_col, since):
+    """MAPE of `model` on the new rows minus its MAPE on as many rows just before `since`."""
+    reference = train_df[train_df["date"] <= pd.Timestamp(since)].tail(len(new_rows))
+    if reference.empty:
+        return None
+    X_new, y_new = _xy(new_rows, feature_cols, target_col)
+    X_ref, y_ref = _xy(reference, feature_cols, target_col)
+    return float(mean_absolute_percentage_error(y_new, model.predict(X_new))
+                 - mean_absolute_percentage_error(y_ref, model.predict(X_ref)))
+
+
+def plan_retrain(model, target_col, df, trained_through, incremental_updates=0,
+                 last_full_refit=None, mode="auto", test_size=0.2):
+    """
+    Choose between a warm-start update and a full refit for one target.
+
+    `trained_through` is the last date the current model was fit on. Returns
+    {"mode": "incremental"|"full", "reason", "since", "new_rows", "drift"};
+    `since` is what to pass on to the retrain. mode="full" always refits and
+    mode="incremental" skips the schedule and drift checks.
+    """
+    plan = {"mode": "full", "reason": None, "since": None, "new_rows": None, "drift": None}
+    if mode == "full":
+        plan["reason"] = "Full refit requested"
+        return plan
+    if boosting_kind(model) is None:
+        plan["reason"] = f"{type(model).__name__} cannot continue training"
+        return plan
+    if trained_through is None:
+        plan["reason"] = "No training date recorded"
+        return plan
+
+    train_df, _, feature_cols = _split(df, target_col, test_size)
+    since = pd.Timestamp(trained_through)
+    new_rows = train_df[train_df["date"] > since]
+    plan["new_rows"] = len(new_rows)
+    if len(new_rows) < MIN_NEW_ROWS:
+        plan["reason"] = f"Only {len(new_rows)} new training rows since {since:%Y-%m-%d}"
+        return plan
+
+    if mode == "auto":
+        if incremental_updates >= FULL_REFIT_EVERY:
+            plan["reason"] = f"Scheduled full refit after {incremental_updates} incremental updates"
+            return plan
+        if last_full_refit is not None and (train_df["date"].max() - pd.Timestamp(last_full_refit)).days > FULL_REFIT_AFTER_DAYS:
+            plan["reason"] = f"Scheduled full refit: the last one is over {FULL_REFIT_AFTER_DAYS} days of data old"
+            return plan
+        plan["drift"] = _error_drift(model, train_df, new_rows, feature_cols, target_col, since)
+        if plan["drift"] is not None and plan["drift"] > DRIFT_MAPE_POINTS:
+            plan["reason"] = f"MAPE drifted by {plan['drift']:.2f} points on new data"
+            return plan
+
+    plan.update(mode="incremental", since=since,
+                reason=f"Continuing from {len(new_rows)} new training rows")
+    return plan
+
+
+# ---------- Parallel retraining ----------
+_worker_df = None
+
+
+def _init_worker(df, n_threads):
+    """Runs once per pool process: keep the training frame and cap OpenMP/BLAS threads."""
+    global _worker_df
+    _worker_df = df
+    if n_threads is not None:
+        os.environ["OMP_NUM_THREADS"] = str(n_threads)
+        if threadpool_limits is not None:
+            threadpool_limits(n_threads)
+
+
+def _timed_retrain(model, target_col, df, n_threads, since=None):
+    start = time.perf_counter()
+    try:
+        new_model, metrics, info = _fit(model, target_col, df, n_threads=n_threads, since=since)
+        return {"target": target_col, "model": new_model, "metrics": metrics,
+                "seconds": time.perf_counter() - start, **info}
+    except Exception as e:
+        print(f"Error in _fit for {target_col}: {str(e)}")
+        return {"target": target_col, "error": str(e), "seconds": time.perf_counter() - start}
+
+
+def _worker_retrain(model, target_col, n_threads, since=None):
+    return _timed_retrain(model, target_col, _worker_df, n_threads, since=since)
+
+
+def default_workers(n_jobs):
+    configured = os.environ.get("RETRAIN_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, min(n_jobs, os.cpu_count() or 1))
+
+
+def default_threads(workers):
+    configured = os.environ.get("RETRAIN_THREADS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def retrain_targets(jobs, df, max_workers=None, n_threads=None, on_result=None):
+    """
+    Retrain several targets, each in its own process.
+
+    `jobs` is a list of (target_col, model) or (target_col, model, since);
+    with `since` the model is updated incrementally from rows after that
+    date. Returns one dict per job, in order, with either `model`/`metrics`
+    (plus `mode`, `train_rows`, `trained_through`) or `error`, and `seconds`.
+    Each estimator is limited to `n_threads` native threads so `max_workers`
+    concurrent fits share the machine instead of oversubscribing it; with a
+    single worker everything runs in the calling process. `on_result` is
+    called with each dict as soon as that target finishes.
+    """
+    if not jobs:
+        return []
+    jobs = [tuple(job) + (None,) * (3 - len(job)) for job in jobs]
+    max_workers = max_workers or default_workers(len(jobs))
+    n_threads = n_threads or default_threads(max_workers)
+
+    if max_workers == 1 or len(jobs) == 1:
+        results = []
+        for target, model, since in jobs:
+            result = _timed_retrain(model, target, df, n_threads, since=since)
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return results
+
+    # spawn, not fork: forking a process whose OpenMP runtime is initialised can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(jobs)),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(df, n_threads),
+    ) as pool:
+        futures = [pool.submit(_worker_retrain, model, target, n_threads, since) for target, model, since in jobs]
+        if on_result is not None:
+            for future in as_completed(futures):
+                on_result(future.result())
+        return [future.result() for future in futures]
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class RollingStats:
+    """
+    Rolling mean/std for any window from prefix sums computed once.
+
+    For each metric the cumulative sums of the (mean-centred) values and of
+    their squares are stored; the mean and sample std (ddof=1, like pandas'
+    `rolling().std()`) of any window ending at any row are then two
+    subtractions, so answering a window over a date slice is O(output).
+    Centring keeps the sum-of-squares subtraction well conditioned.
+    """
+
+    def __init__(self, metrics):
+        self.values = {}
+        self._offset = {}
+        self._cumsum = {}
+        self._cumsum_sq = {}
+        for name, values in metrics.items():
+            values = np.asarray(values, dtype=np.float64)
+            offset = float(np.nanmean(values)) if values.size else 0.0
+            centred = values - offset
+            self.values[name] = values
+            self._offset[name] = offset
+            self._cumsum[name] = np.concatenate(([0.0], np.cumsum(centred)))
+            self._cumsum_sq[name] = np.concatenate(([0.0], np.cumsum(centred * centred)))
+
+    def window(self, metric, window, lo=0, hi=None):
+        """
+        Rolling mean and std of `metric` for rows [lo, hi).
+
+        Rows whose window would reach before the first row are NaN, matching
+        pandas' min_periods=window behaviour.
+        """
+        n = len(self.values[metric])
+        hi = n if hi is None else hi
+        ends = np.arange(lo, hi) + 1
+        starts = ends - window
+        valid = starts >= 0
+        starts = np.where(valid, starts, 0)
+
+        cs = self._cumsum[metric]
+        cs_sq = self._cumsum_sq[metric]
+        sums = cs[ends] - cs[starts]
+        sums_sq = cs_sq[ends] - cs_sq[starts]
+
+        mean = sums / window + self._offset[metric]
+        if window > 1:
+            var = (sums_sq - sums * sums / window) / (window - 1)
+            std = np.sqrt(np.maximum(var, 0.0))
+        else:
+            std = np.full(len(ends), np.nan)
+
+        mean[~valid] = np.nan
+        std[~valid] = np.nan
+        return mean, std
@@ -0,0 +1,130 @@
+import threading
+import time
+from types import MappingProxyType
+
+from flask import g, has_request_context
+
+from services.data_store import load_dataset, dataset_stamp, on_append
+
+
+class Snapshot:
+    """
+    One immutable version of the structures derived from a set of datasets.
+
+    Fields are read as attributes (`snapshot.df`). A published snapshot is
+    never changed: a reload builds a new one next to it, so requests still
+    holding the old version keep a consistent view until they finish.
+    """
+
+    __slots__ = ("version", "stamps", "loaded_at", "_fields")
+
+    def __init__(self, version, stamps, fields):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "stamps", stamps)
+        object.__setattr__(self, "loaded_at", time.time())
+        object.__setattr__(self, "_fields", MappingProxyType(dict(fields)))
+
+    def __getattr__(self, name):
+        try:
+            return self._fields[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshots are read-only; build a new version instead")
+
+
+class SnapshotHolder:
+    """
+    The current Snapshot of one or more data-store datasets.
+
+    `build(frames)` turns {dataset name: shared frame} into the snapshot's
+    fields. `get()` stats the source CSVs at most every `check_interval`
+    seconds; when one has changed, the next version is loaded and built in
+    a background thread and published with a single reference assignment,
+    so readers never wait on a reload or take a lock. Rows appended through
+    the data store are published synchronously, before the ingest returns.
+
+    Within a request `get()` always returns the snapshot it returned first
+    (pinned on flask.g), so a request that straddles a swap still reads a
+    single version from start to finish.
+    """
+
+    def __init__(self, name, sources, build, check_interval=2.0):
+        self.name = name
+        self.sources = list(sources)
+        self.build = build
+        self.check_interval = check_interval
+        self._current = None
+        self._checked_at = 0.0
+        self._loading = False
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+        for source in self.sources:
+            on_append(source, lambda frame, rows: self.reload())
+
+    def on_swap(self, callback):
+        """Call `callback(snapshot)` after a new version is published."""
+        self._listeners.append(callback)
+
+    def _stamps(self):
+        return tuple(dataset_stamp(source) for source in self.sources)
+
+    def _reload(self):
+        with self._reload_lock:
+            try:
+                # Stamps are taken before loading: a write in between only triggers another reload
+                stamps = self._stamps()
+                frames = {source: load_dataset(source) for source in self.sources}
+                version = self._current.version + 1 if self._current is not None else 1
+                snapshot = Snapshot(version, stamps, self.build(frames))
+                self._current = snapshot
+            except Exception as e:
+                if self._current is None:
+                    raise
+                print(f"Reloading {self.name} failed, still serving version {self._current.version}: {e}")
+                return
+            finally:
+                self._loading = False
+        for callback in self._listeners:
+            callback(snapshot)
+
+    def reload(self, wait=True):
+        """Build and publish the next version; with `wait=False` in a background thread."""
+        if wait:
+            self._reload()
+        elif not self._loading:
+            self._loading = True
+            threading.Thread(target=self._reload, name=f"reload-{self.name}", daemon=True).start()
+        return self._current
+
+    def _check(self):
+        now = time.monotonic()
+        if self._loading or now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            stale = self._stamps() != self._current.stamps
+        except OSError:
+            # A source being replaced right now; the old version keeps serving
+            return
+        if stale:
+            self.reload(wait=False)
+
+    def current(self):
+        """The latest published snapshot, loading the first version if needed."""
+        if self._current is None:
+            self._reload()
+        else:
+            self._check()
+        return self._current
+
+    def get(self):
+        """The snapshot pinned to the current request (the latest one outside a request)."""
+        if not has_request_context():
+            return self.current()
+        pinned = g.setdefault("snapshots", {})
+        snapshot = pinned.get(self.name)
+        if snapshot is None:
+            snapshot = pinned[self.name] = self.current()
+        return snapshot
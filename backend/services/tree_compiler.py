@@ -0,0 +1,281 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# Objectives whose prediction is the raw margin (no link function)
+IDENTITY_OBJECTIVES = ["reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror", "reg:quantileerror"]
+
+
+class CompiledEnsemble:
+    """
+    A tree ensemble flattened into NumPy node arrays.
+
+    Every tree's nodes live in shared `feature` / `threshold` / `left` /
+    `right` / `default_left` / `value` arrays (child indices are global) and
+    `roots` holds each tree's first node. Leaves point to themselves with an
+    always-true split, so `predict` walks every tree for every row in
+    lock-step for `max_depth` vectorized steps with no per-call validation,
+    DMatrix construction or thread pool.
+
+    `strict_less` selects the split test (XGBoost: x < t, sklearn/LightGBM:
+    x <= t); `float32_input` casts features to float32 first, as XGBoost and
+    sklearn do. Leaves are added tree by tree in float32 when
+    `float32_sum` is set (XGBoost's accumulation), else summed in float64.
+
+    The walk is fastest for small batches; `compile_model` keeps the
+    original estimator as `fallback` so callers can hand batches larger than
+    `max_rows` back to its native predict.
+    """
+
+    def __init__(self, trees, base_score=0.0, scale=1.0, strict_less=True,
+                 float32_input=True, float32_sum=False, n_features=None, source=None):
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            n = len(tree["feature"])
+            is_leaf = tree["left"] < 0
+            self_index = np.arange(n)
+            feature.append(np.where(is_leaf, 0, tree["feature"]))
+            threshold.append(np.where(is_leaf, np.inf, tree["threshold"]))
+            left.append(np.where(is_leaf, self_index, tree["left"]) + offset)
+            right.append(np.where(is_leaf, self_index, tree["right"]) + offset)
+            default_left.append(np.where(is_leaf, True, tree["default_left"]))
+            value.append(tree["value"])
+            roots.append(offset)
+            max_depth = max(max_depth, _depth(tree["left"], tree["right"]))
+            offset += n
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold).astype(np.float64)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.default_left = np.concatenate(default_left).astype(bool)
+        self.value = np.concatenate(value).astype(np.float32 if float32_sum else np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.base_score = base_score
+        self.scale = scale
+        self.strict_less = strict_less
+        self.float32_input = float32_input
+        self.float32_sum = float32_sum
+        self.n_features = n_features
+        self.source = source
+        self.fallback = None
+        self.max_rows = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def leaves(self, X):
+        """Global leaf index reached in every tree: an (n_trees, n_rows) array."""
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy()
+        X = np.asarray(X, dtype=np.float32 if self.float32_input else np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_rows = len(X)
+        # Feature-major copy so one tree level is a single gather at feature * n_rows + row
+        flat = X.T.astype(np.float64).ravel()
+        rows = np.arange(n_rows)
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            x = flat[self.feature[node] * n_rows + rows]
+            threshold = self.threshold[node]
+            go_left = x < threshold if self.strict_less else x <= threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict(self, X):
+        node = self.leaves(X)
+        if self.float32_sum:
+            # Sequential float32 accumulation in tree order, starting from the base score
+            leaf_values = np.empty((node.shape[0] + 1, node.shape[1]), dtype=np.float32)
+            leaf_values[0] = self.base_score
+            leaf_values[1:] = self.value[node]
+            return np.cumsum(leaf_values, axis=0, dtype=np.float32)[-1]
+        return self.base_score + self.scale * self.value[node].sum(axis=0)
+
+
+def _depth(left, right):
+    depth = np.zeros(len(left), dtype=np.intp)
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+# ---------- Exporters ----------
+def _xgboost_tree(tree, features):
+    """Node arrays of one tree from `get_dump(dump_format="json")`; node ids are the array positions."""
+    nodes = {}
+    stack = [json.loads(tree)]
+    while stack:
+        node = stack.pop()
+        nodes[node["nodeid"]] = node
+        stack.extend(node.get("children", []))
+
+    n = len(nodes)
+    exported = {
+        "feature": np.full(n, -1, dtype=np.int64),
+        "threshold": np.zeros(n, dtype=np.float64),
+        "left": np.full(n, -1, dtype=np.int64),
+        "right": np.full(n, -1, dtype=np.int64),
+        "default_left": np.zeros(n, dtype=bool),
+        "value": np.zeros(n, dtype=np.float32),
+    }
+    for node_id, node in nodes.items():
+        if "leaf" in node:
+            exported["value"][node_id] = np.float32(node["leaf"])
+            continue
+        if "categories" in node or isinstance(node["split_condition"], list):
+            raise ValueError("Categorical XGBoost splits cannot be compiled")
+        split = node["split"]
+        exported["feature"][node_id] = features[split] if split in features else int(split.lstrip("f"))
+        # Dumped with float32 round-trip precision; XGBoost compares float32 values
+        exported["threshold"][node_id] = np.float32(node["split_condition"])
+        exported["left"][node_id] = node["yes"]
+        exported["right"][node_id] = node["no"]
+        exported["default_left"][node_id] = node["missing"] == node["yes"]
+    return exported
+
+
+def _from_xgboost(model):
+    # save_config / get_dump(json) exist since XGBoost 1.0, unlike save_raw("json")
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())["learner"]
+    objective = config["objective"]["name"]
+    if objective not in IDENTITY_OBJECTIVES:
+        raise ValueError(f"Unsupported XGBoost objective '{objective}'")
+    params = config["learner_model_param"]
+    if int(params.get("num_target", 1)) != 1 or int(params.get("num_class", 0)) > 1:
+        raise ValueError("Only single-output XGBoost models can be compiled")
+    if config["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"Unsupported XGBoost booster '{config['gradient_booster']['name']}'")
+
+    trees = booster.get_dump(dump_format="json")
+    try:
+        num_parallel_tree = int(config["gradient_booster"]["gbtree_model_param"]["num_parallel_tree"])
+        trees = trees[:(model.best_iteration + 1) * num_parallel_tree]
+    except (AttributeError, KeyError):  # no early stopping: predict uses every tree
+        pass
+
+    features = {name: i for i, name in enumerate(booster.feature_names or [])}
+    exported = [_xgboost_tree(tree, features) for tree in trees]
+
+    base_score = float(re.findall(r"[-+0-9.eE]+", params["base_score"])[0])
+    return CompiledEnsemble(exported, base_score=np.float32(base_score), strict_less=True,
+                            float32_input=True, float32_sum=True,
+                            n_features=int(params["num_feature"]), source="xgboost")
+
+
+def _sklearn_tree(tree, scale=1.0):
+    t = tree.tree_
+    return {
+        "feature": t.feature.astype(np.int64),
+        "threshold": t.threshold,
+        "left": t.children_left.astype(np.int64),
+        "right": t.children_right.astype(np.int64),
+        # sklearn sends missing values to the side chosen during fit when trained with NaNs
+        "default_left": getattr(t, "missing_go_to_left", np.zeros(t.node_count, dtype=np.uint8)).astype(bool),
+        "value": t.value[:, 0, 0] * scale,
+    }
+
+
+def _from_sklearn(model):
+    name = type(model).__name__
+    if name in ["RandomForestRegressor", "ExtraTreesRegressor"]:
+        trees = [_sklearn_tree(est) for est in model.estimators_]
+        return CompiledEnsemble(trees, base_score=0.0, scale=1.0 / len(trees), strict_less=False,
+                                float32_input=True, n_features=model.n_features_in_, source=name)
+    if name == "GradientBoostingRegressor":
+        if model.init_ != "zero" and not hasattr(model.init_, "constant_"):
+            raise ValueError("Only constant GradientBoosting initial estimators can be compiled")
+        base = 0.0 if model.init_ == "zero" else float(np.ravel(model.init_.constant_)[0])
+        trees = [_sklearn_tree(est[0], scale=model.learning_rate) for est in model.estimators_]
+        return CompiledEnsemble(trees, base_score=base, strict_less=False,
+                                float32_input=True, n_features=model.n_features_in_, source=name)
+    raise ValueError(f"Unsupported sklearn model '{name}'")
+
+
+def _from_lightgbm(model):
+    dump = model.booster_.dump_model()
+    if dump.get("num_class", 1) != 1:
+        raise ValueError("Only single-output LightGBM models can be compiled")
+    exported = []
+    for info in dump["tree_info"]:
+        feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+
+        def add(node):
+            index = len(feature)
+            feature.append(-1)
+            threshold.append(0.0)
+            left.append(-1)
+            right.append(-1)
+            default_left.append(True)
+            value.append(0.0)
+            if "leaf_value" in node:
+                value[index] = node["leaf_value"]
+                return index
+            if node["decision_type"] != "<=":
+                raise ValueError("Categorical LightGBM splits cannot be compiled")
+            if node.get("missing_type") == "Zero":
+                raise ValueError("LightGBM zero-as-missing splits cannot be compiled")
+            feature[index] = node["split_feature"]
+            threshold[index] = node["threshold"]
+            default_left[index] = node["default_left"]
+            left[index] = add(node["left_child"])
+            right[index] = add(node["right_child"])
+            return index
+
+        add(info["tree_structure"])
+        exported.append({
+            "feature": np.asarray(feature, dtype=np.int64),
+            "threshold": np.asarray(threshold, dtype=np.float64),
+            "left": np.asarray(left, dtype=np.int64),
+            "right": np.asarray(right, dtype=np.int64),
+            "default_left": np.asarray(default_left, dtype=bool),
+            "value": np.asarray(value, dtype=np.float64),
+        })
+    return CompiledEnsemble(exported, base_score=0.0, strict_less=False, float32_input=False,
+                            n_features=dump["max_feature_idx"] + 1, source="lightgbm")
+
+
+def compile_model(model, max_rows=None):
+    """
+    Export a fitted XGBoost / LightGBM / sklearn forest or boosting regressor into a CompiledEnsemble.
+
+    Raises ValueError for unsupported models, objectives or split types.
+    """
+    module = type(model).__module__
+    if module.startswith("xgboost"):
+        compiled = _from_xgboost(model)
+    elif module.startswith("lightgbm"):
+        compiled = _from_lightgbm(model)
+    elif module.startswith("sklearn"):
+        compiled = _from_sklearn(model)
+    else:
+        raise ValueError(f"Unsupported model type '{type(model).__name__}'")
+    compiled.fallback = model
+    compiled.max_rows = max_rows
+    return compiled
+
+
+def validate(compiled, model, X, rtol=1e-5, atol=1e-4):
+    """Largest absolute difference between the compiled and original predictions, and whether it is within tolerance."""
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    actual = np.asarray(compiled.predict(X), dtype=np.float64)
+    diff = np.abs(actual - expected)
+    return float(diff.max()) if diff.size else 0.0, bool(np.all(diff <= atol + rtol * np.abs(expected)))
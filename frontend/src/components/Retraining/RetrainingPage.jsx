@@ -39,7 +39,17 @@ const RetrainingPage = () => {
       setLoading(true);
       const endpoint = `${model_endpoints.model_retrain}${force ? '?force=true' : ''}`;
       const result = await fetch(`http://localhost:5000/api/${endpoint}`, { method: 'POST' });
-      const data = await result.json();
+      let data = await result.json();
+
+      // Retraining runs in the background; poll the job until every target is done
+      if (data.job_id) {
+        let job = await fetchData(model_endpoints.model_retrain_job(data.job_id));
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise((resolve) => setTimeout(resolve, 2000));
+          job = await fetchData(model_endpoints.model_retrain_job(data.job_id));
+        }
+        data = job;
+      }
       
       if (data.models_status && data.models_status.length > 0) {
         const successCount = data.models_status.filter(m => !m.error).length;
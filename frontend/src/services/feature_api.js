@@ -38,4 +38,8 @@ export const feature_endpoints = {
   cpuRoll: (window) => `cpu/rolling/${window}`,
   storageRoll: (window) => `storage/rolling/${window}`,
   usersRoll: (window) => `users/rolling/${window}`,
+
+  cpuRollWindows: (windows) => `cpu/rolling?windows=${windows.join(',')}`,
+  storageRollWindows: (windows) => `storage/rolling?windows=${windows.join(',')}`,
+  usersRollWindows: (windows) => `users/rolling?windows=${windows.join(',')}`,
 };
@@ -15,6 +15,10 @@ export const model_endpoints = {
   march_cpu: "models/predict/march/cpu",
   march_storage: "models/predict/march/storage",
   march_users: "models/predict/march/users",
+  predict_range: (target, from, to, region) =>
+    `models/predict?target=${target}` +
+    (from ? `&from=${from}` : '') + (to ? `&to=${to}` : '') +
+    (region !== undefined && region !== null ? `&region=${region}` : ''),
   forecast_cpu: 'models/forecast/cpu',
   forecast_storage: 'models/forecast/storage',
   forecast_users: 'models/forecast/users',
@@ -23,6 +27,9 @@ export const model_endpoints = {
   model_retrain_compare : 'models/retrain/compare',
   model_retrain : 'models/retrain',
   model_switch : 'models/retrain/switch',
+  model_retrain_job : (jobId) => `models/retrain/jobs/${jobId}`,
+  model_backtest : 'models/backtest',
+  model_backtest_job : (jobId) => `models/backtest/jobs/${jobId}`,
 
   forecast_cpu: (region, horizon = 30) =>
     `models/forecast?region=${region}&service=compute&horizon=${horizon}`,
@@ -36,4 +43,10 @@ export const model_endpoints = {
   download_forecast: (region, service, horizon = 30) =>
     `models/forecast/download?region=${region}&service=${service}&horizon=${horizon}`,
 
+  forecast_probabilistic: (service, region, horizon = 30, paths = 1000) =>
+    `models/forecast/probabilistic?service=${service}&region=${region}&horizon=${horizon}&paths=${paths}`,
+
+  forecast_batch: (services = 'compute,storage,users', region = 'all', horizon = 30) =>
+    `models/forecast/batch?service=${services}&region=${region}&horizon=${horizon}`,
+
 };